@@ -4,7 +4,6 @@ import threading
 import os
 import hashlib
 import secrets
-import sqlite3
 import json
 from datetime import datetime, timedelta
 from functools import wraps
@@ -81,7 +80,7 @@ def _init_schedule():
             task_status['schedule_times'] = times
 
             for time_str in times:
-                schedule.every().day.at(time_str).do(lambda: perform_checkin('scheduled', 'system'))
+                schedule.every().day.at(time_str).do(lambda: perform_scheduled_task())
                 logging.info(f"已设置定时任务: {time_str}")
         else:
             logging.info("定时任务未启用")
@@ -1826,7 +1825,7 @@ receiver2@example.com"></textarea>
                         html += `<strong>时间:</strong> ${log.start_time}<br>`;
                         html += `<strong>触发方式:</strong> ${log.trigger_type}<br>`;
                         html += `<strong>账号数:</strong> ${log.total_accounts}<br>`;
-                        html += `<strong>成功:</strong> ${log.success_count}, <strong>失败:</strong> ${log.failed_count}<br>`;
+                        html += `<strong>成功:</strong> ${log.success_count}, <strong>失败:</strong> ${log.failed_count}, <strong>跳过:</strong> ${log.skipped_count || 0}<br>`;
                         if (log.accounts && log.accounts.length > 0) {
                             html += '<details><summary style="cursor: pointer; color: #007AFF;">详细信息</summary><ul style="margin-top: 10px;">';
                             log.accounts.forEach(acc => {
@@ -2661,18 +2660,39 @@ def load_config():
             logging.error(f"加载配置失败: {e}")
             return {}
 
-def perform_checkin(trigger_type='api', trigger_by=None):
-    """执行签到任务"""
+def perform_checkin(trigger_type='api', trigger_by=None, force=False):
+    """执行签到任务（force为True时不跳过今天已签到的账号）"""
     from cli import run_checkin
     try:
         logging.info(f"开始执行签到任务 (触发方式: {trigger_type})")
-        result = run_checkin(headless=False, trigger_type=trigger_type, trigger_by=trigger_by)
+        result = run_checkin(headless=False, trigger_type=trigger_type, trigger_by=trigger_by, force=force)
         task_status['last_checkin'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        return result is not None and result.get('success', 0) > 0
+        return result is not None and (result.get('success', 0) > 0 or result.get('skipped', 0) > 0)
     except Exception as e:
         logging.error(f"签到任务失败: {e}", exc_info=True)
         return False
 
+def perform_scheduled_task():
+    """执行定时任务（配置了schedule_use_pipeline时运行账号流水线，否则只签到）"""
+    try:
+        pipeline_config = ConfigManager().get_pipeline_config()
+    except Exception as e:
+        logging.warning(f"读取流水线配置失败，执行签到: {e}")
+        pipeline_config = {'schedule_enabled': False}
+
+    if not pipeline_config['schedule_enabled']:
+        return perform_checkin('scheduled', 'system')
+
+    from cli import run_pipeline
+    try:
+        logging.info(f"开始执行定时账号流水线: {', '.join(pipeline_config['tasks'])}")
+        result = run_pipeline(pipeline_config['tasks'], trigger_type='scheduled', trigger_by='system')
+        task_status['last_checkin'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return result is not None and result.get('success', 0) > 0
+    except Exception as e:
+        logging.error(f"定时账号流水线失败: {e}", exc_info=True)
+        return False
+
 def redeem_code(code, account_email, driver, domain='gptgod.online'):
     """兑换单个兑换码"""
     try:
@@ -3027,7 +3047,8 @@ def api_checkin():
     try:
         # 获取触发者信息
         trigger_by = session.get('username', 'api')
-        result = perform_checkin('api', trigger_by)
+        force = bool((request.get_json(silent=True) or {}).get('force', False))
+        result = perform_checkin('api', trigger_by, force=force)
         if result:
             return jsonify({'success': True, 'message': '签到任务已完成', 'results': task_status['checkin_results']})
         else:
@@ -3041,6 +3062,10 @@ def api_checkin_stream():
     """SSE接口：执行签到任务（使用新的CheckinService）"""
     # 在请求上下文中获取session数据
     trigger_by = session.get('username', 'api')
+    # 并发浏览器数量（可选，默认使用配置值）
+    max_workers = request.args.get('workers', type=int)
+    # 强制签到（不跳过今天已签到的账号）
+    force = request.args.get('force', 'false').lower() in ('1', 'true', 'yes')
 
     def generate():
         """生成SSE事件流"""
@@ -3077,15 +3102,20 @@ def api_checkin_stream():
                 domains.append(domain_config.get('backup'))
 
             # 执行批量签到（包含邮件发送逻辑）
-            yield f"data: {json.dumps({'type': 'info', 'message': f'使用域名: {', '.join(domains)}'})}\n\n"
+            domains_text = ', '.join(domains)
+            yield f"data: {json.dumps({'type': 'info', 'message': f'使用域名: {domains_text}'})}\n\n"
+            if max_workers and max_workers > 1:
+                yield f"data: {json.dumps({'type': 'info', 'message': f'并发签到: {max_workers} 个浏览器'})}\n\n"
 
-            result = service.batch_checkin(domains=domains, trigger_type='manual', trigger_by=trigger_by)
+            result = service.batch_checkin(domains=domains, trigger_type='manual', trigger_by=trigger_by,
+                                           max_workers=max_workers, force=force)
 
             # 发送签到结果
             success_count = result["success"]
             total_count = result["total"]
             failed_count = result["failed"]
-            message = f'签到完成: 成功{success_count}/{total_count}，失败{failed_count}'
+            skipped_count = result.get("skipped", 0)
+            message = f'签到完成: 成功{success_count}/{total_count}，失败{failed_count}，跳过今天已签到{skipped_count}'
             yield f"data: {json.dumps({'type': 'info', 'message': message})}\n\n"
 
             # 发送每个账号的详细结果
@@ -3150,18 +3180,18 @@ def api_redeem():
             email = account['mail']
             password = account['password']
 
-            # 为每个兑换码执行兑换
-            for code in codes:
-                try:
-                    result = service.redeem_code(
-                        domain=primary_domain,
-                        email=email,
-                        password=password,
-                        code=code
-                    )
-                    results.append(f"{email}: {code} - {result['message']}")
-                except Exception as e:
-                    results.append(f"{email}: {code} - 兑换失败: {str(e)}")
+            # 每个账号只登录一次，依次提交所有兑换码（已知无效或已使用的兑换码直接跳过）
+            try:
+                summary = service.batch_redeem(
+                    domain=primary_domain,
+                    email=email,
+                    password=password,
+                    codes=codes
+                )
+                for result in summary['results']:
+                    results.append(f"{email}: {result['code']} - {result['message']}")
+            except Exception as e:
+                results.append(f"{email}: 兑换失败: {str(e)}")
 
         task_status['last_redeem'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         task_status['redeem_results'] = results
@@ -3175,10 +3205,15 @@ def api_redeem():
 @require_auth
 def api_status():
     """获取服务状态"""
+    from src.infrastructure.browser.clearance_store import get_clearance_store
+    from src.infrastructure.browser.resource_blocker import get_resource_blocking_stats
+
     return jsonify({
         'status': 'running',
         'last_checkin': task_status['last_checkin'],
-        'last_redeem': task_status['last_redeem']
+        'last_redeem': task_status['last_redeem'],
+        'cf_clearance': get_clearance_store().stats(),
+        'resource_blocking': get_resource_blocking_stats()
     })
 
 # 数据库日志API
@@ -3201,6 +3236,7 @@ def api_logs():
                 'total_accounts': session['total_accounts'],
                 'success_count': session['success_count'],
                 'failed_count': session['failed_count'],
+                'skipped_count': session['skipped_count'],
                 'status': session['status'],
                 'accounts': []  # 详细账号信息需要额外查询
             })
@@ -3220,6 +3256,40 @@ def api_stats():
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
+@app.route('/api/redeem/cache', methods=['GET', 'DELETE'])
+@require_auth
+def api_redeem_cache():
+    """兑换码状态缓存（GET查询，DELETE清除，可用code参数只清除单个兑换码）"""
+    try:
+        from src.data.repositories.redeem_repository import RedeemCodeCache
+
+        cache = RedeemCodeCache(ttl=ConfigManager().get_system_config('redeem_cache_ttl', 604800))
+        if request.method == 'DELETE':
+            removed = cache.clear(request.args.get('code') or None)
+            return jsonify({'success': True, 'message': f'已清除 {removed} 条兑换码缓存'})
+
+        return jsonify({'success': True, 'entries': cache.get_entries()})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/api/selector-stats', methods=['GET', 'DELETE'])
+@require_auth
+def api_selector_stats():
+    """页面选择器命中统计（GET查询，DELETE清除后重新学习候选顺序）"""
+    try:
+        from src.data.repositories.selector_stats_repository import SelectorStatsRepository
+
+        repository = SelectorStatsRepository()
+        domain = request.args.get('domain')
+        if request.method == 'DELETE':
+            repository.reset(domain)
+            return jsonify({'success': True, 'message': '选择器统计已清除'})
+
+        stats = repository.get_stats(domain=domain, page=request.args.get('page'))
+        return jsonify({'success': True, 'stats': stats})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)})
+
 @app.route('/api/schedule', methods=['GET', 'POST'])
 @require_auth
 def api_schedule():
@@ -3275,12 +3345,24 @@ def api_domains():
 
     if request.method == 'GET':
         try:
+            from src.utils.domain_health import get_domain_health
+
             domain_config = config_manager.get_domain_config()
+            primary = domain_config.get('primary', 'gptgod.work')
+            backup = domain_config.get('backup', 'gptgod.online')
+            auto_switch = domain_config.get('auto_switch', True)
+
+            # 按健康状态排列后的尝试顺序（开启自动切换时最快的健康域名排在最前）
+            domain_health = get_domain_health(**config_manager.get_domain_health_config())
+            order = domain_health.rank([d for d in (primary, backup) if d], auto_switch)
             return jsonify({
                 'success': True,
-                'primary': domain_config.get('primary', 'gptgod.work'),
-                'backup': domain_config.get('backup', 'gptgod.online'),
-                'auto_switch': domain_config.get('auto_switch', True)
+                'primary': primary,
+                'backup': backup,
+                'auto_switch': auto_switch,
+                'active_primary': order[0] if order else primary,
+                'order': order,
+                'health': domain_health.snapshot()
             })
         except Exception as e:
             return jsonify({'success': False, 'message': str(e)})
@@ -3336,7 +3418,7 @@ def reload_schedule():
         task_status['schedule_times'] = times
 
         for time_str in times:
-            schedule.every().day.at(time_str).do(lambda: perform_checkin('scheduled', 'system'))
+            schedule.every().day.at(time_str).do(lambda: perform_scheduled_task())
             logging.info(f"已设置定时任务: {time_str}")
     else:
         task_status['schedule_times'] = []
@@ -3350,26 +3432,20 @@ def api_points():
         from src.data.repositories.points_repository import PointsHistoryManager
         history_manager = PointsHistoryManager()
 
-        # 获取统计信息
-        stats = history_manager.get_statistics()
-
-        # 获取账号映射
-        conn = sqlite3.connect('accounts_data/gptgod_checkin.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT uid, email FROM account_mapping ORDER BY last_update DESC')
-        accounts = cursor.fetchall()
-        conn.close()
+        # 从积分汇总表一次性获取所有账号统计，并合计为全局统计
+        account_rollups = history_manager.get_account_rollups()
+        stats = history_manager.summarize_rollups(account_rollups)
 
-        # 为每个账号获取积分（从统计中获取）
         accounts_detail = []
         total_points = stats.get('total_points', 0)
 
-        for uid, email in accounts:
-            account_stats = history_manager.get_statistics(uid=uid)
-            account_points = account_stats.get('total_points', 0)
+        for account in account_rollups:
+            if not account['email']:
+                continue
+            account_points = account['stats'].get('total_points', 0)
 
             accounts_detail.append({
-                'email': email,
+                'email': account['email'],
                 'points': account_points,
                 'percentage': round((account_points / total_points * 100), 2) if total_points > 0 else 0
             })
@@ -3482,32 +3558,19 @@ def api_points_history_overview():
     try:
         history_manager = PointsHistoryManager()
 
-        # 获取所有账号的统计信息
-        all_stats = history_manager.get_statistics()
-
-        # 获取账号映射
-        conn = sqlite3.connect('accounts_data/gptgod_checkin.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT uid, email FROM account_mapping ORDER BY last_update DESC')
-        accounts = [{'uid': row[0], 'email': row[1]} for row in cursor.fetchall()]
-        conn.close()
+        # 从积分汇总表一次性获取所有账号统计，并合计为全局统计
+        account_rollups = history_manager.get_account_rollups()
+        all_stats = history_manager.summarize_rollups(account_rollups)
 
-        # 为每个账号获取统计
-        account_stats = []
-        for account in accounts:
-            stats = history_manager.get_statistics(uid=account['uid'])
-            account_stats.append({
-                'uid': account['uid'],
-                'email': account['email'],
-                'stats': stats
-            })
+        # 只列出已建立账号映射的账号
+        account_stats = [account for account in account_rollups if account['email']]
 
         return jsonify({
             'success': True,
             'overview': {
                 'total_stats': all_stats,
                 'account_stats': account_stats,
-                'total_accounts': len(accounts)
+                'total_accounts': len(account_stats)
             }
         })
     except Exception as e:
@@ -30,7 +30,7 @@ logging.basicConfig(
 )
 
 
-def run_checkin(headless=False, trigger_type='manual', trigger_by=None):
+def run_checkin(headless=False, trigger_type='manual', trigger_by=None, max_workers=None, force=False):
     """
     运行签到任务
 
@@ -38,6 +38,8 @@ def run_checkin(headless=False, trigger_type='manual', trigger_by=None):
         headless: 是否使用无头模式
         trigger_type: 触发类型 ('manual', 'scheduled', 'api')
         trigger_by: 触发者（用户名或系统标识）
+        max_workers: 并发浏览器数量（None表示使用配置值）
+        force: 是否强制签到（默认跳过今天已签到的账号）
     """
     logging.info("="*60)
     logging.info("GPT-GOD自动签到任务开始")
@@ -52,7 +54,12 @@ def run_checkin(headless=False, trigger_type='manual', trigger_by=None):
         service = CheckinService(headless=headless)
 
         # 执行批量签到
-        result = service.batch_checkin()
+        result = service.batch_checkin(
+            trigger_type=trigger_type,
+            trigger_by=trigger_by,
+            max_workers=max_workers,
+            force=force
+        )
 
         # 输出结果
         logging.info("\n" + "="*60)
@@ -60,6 +67,7 @@ def run_checkin(headless=False, trigger_type='manual', trigger_by=None):
         logging.info(f"总账号数: {result['total']}")
         logging.info(f"成功: {result['success']}")
         logging.info(f"失败: {result['failed']}")
+        logging.info(f"跳过(今天已签到): {result['skipped']}")
         logging.info("="*60)
 
         # 详细结果
@@ -74,13 +82,14 @@ def run_checkin(headless=False, trigger_type='manual', trigger_by=None):
         return None
 
 
-def run_sync_points(headless=True, max_pages=None):
+def run_sync_points(headless=True, max_pages=None, full_sync=None):
     """
     运行积分同步任务
 
     Args:
         headless: 是否使用无头模式
         max_pages: 每个账号最大页数
+        full_sync: 是否全量同步（None表示按配置周期自动决定，默认增量同步）
     """
     logging.info("="*60)
     logging.info("积分历史同步任务开始")
@@ -92,11 +101,11 @@ def run_sync_points(headless=True, max_pages=None):
         service = PointsSyncService(headless=headless)
 
         # 执行同步
-        result = service.sync_all_accounts(max_pages=max_pages)
+        result = service.sync_all_accounts(max_pages=max_pages, full_sync=full_sync)
 
         # 输出结果
         logging.info("\n" + "="*60)
-        logging.info("同步任务完成")
+        logging.info(f"同步任务完成 ({'全量' if result.get('mode') == 'full' else '增量'})")
         logging.info(f"总账号数: {result['total']}")
         logging.info(f"成功: {result['success']}")
         logging.info(f"失败: {result['failed']}")
@@ -111,6 +120,87 @@ def run_sync_points(headless=True, max_pages=None):
         return None
 
 
+def run_pipeline(tasks, headless=False, codes=None, trigger_type='manual', trigger_by=None,
+                 max_pages=None, full_sync=None, force=False):
+    """
+    运行账号流水线：每个账号只登录一次，依次执行多个任务
+
+    Args:
+        tasks: 任务列表（checkin/balance/sync/redeem）
+        headless: 是否使用无头模式
+        codes: 兑换码列表（redeem任务使用）
+        trigger_type: 触发类型 ('manual', 'scheduled', 'api')
+        trigger_by: 触发者（用户名或系统标识）
+        max_pages: 积分同步时每个账号最大页数
+        full_sync: 是否全量同步积分（None表示按配置周期自动决定）
+        force: 是否强制签到（默认跳过今天已签到的账号的签到任务）
+    """
+    logging.info("="*60)
+    logging.info("账号流水线任务开始")
+    logging.info(f"时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    logging.info(f"任务: {', '.join(tasks)}")
+    logging.info("="*60)
+
+    try:
+        from src.core.account_pipeline_service import AccountPipelineService
+
+        service = AccountPipelineService(headless=headless)
+        result = service.run_all(
+            tasks,
+            codes=codes,
+            trigger_type=trigger_type,
+            trigger_by=trigger_by,
+            max_pages=max_pages,
+            full_sync=full_sync,
+            force=force
+        )
+
+        # 详细结果
+        for outcome in result['results']:
+            status = "✅" if outcome['success'] else "❌"
+            details = ', '.join(
+                f"{task}: {task_result.get('message', '')}" for task, task_result in outcome['tasks'].items()
+            ) or '登录失败'
+            logging.info(f"{status} {outcome['email']}: {details}")
+
+        return result
+
+    except Exception as e:
+        logging.error(f"账号流水线任务异常: {e}", exc_info=True)
+        return None
+
+
+def run_clear_redeem_cache(codes=None):
+    """清除兑换码状态缓存（codes为空时清除全部）"""
+    try:
+        from src.data.repositories.redeem_repository import RedeemCodeCache
+
+        cache = RedeemCodeCache(ttl=ConfigManager().get_system_config('redeem_cache_ttl', 604800))
+        removed = sum(cache.clear(code) for code in codes) if codes else cache.clear()
+        logging.info(f"兑换码缓存已清除: {removed} 条")
+        return True
+
+    except Exception as e:
+        logging.error(f"清除兑换码缓存失败: {e}", exc_info=True)
+        return False
+
+
+def run_rebuild_stats():
+    """从积分历史重建积分汇总表和每日汇总表，并更新查询优化器统计信息"""
+    try:
+        from src.data.repositories.points_repository import PointsHistoryManager
+
+        manager = PointsHistoryManager()
+        accounts = manager.rebuild_rollups()
+        manager.db.execute('PRAGMA optimize')
+        logging.info(f"积分汇总表重建完成: {accounts} 个账号")
+        return True
+
+    except Exception as e:
+        logging.error(f"重建积分汇总表失败: {e}", exc_info=True)
+        return False
+
+
 def show_config():
     """显示当前配置"""
     try:
@@ -165,9 +255,16 @@ def main():
 示例:
   python cli.py                     # 运行签到（显示浏览器）
   python cli.py --headless          # 运行签到（无头模式）
+  python cli.py --headless --workers 4  # 并发签到（4个浏览器同时运行）
+  python cli.py --force             # 强制签到（不跳过今天已签到的账号）
   python cli.py --sync              # 同步积分历史
   python cli.py --config            # 显示配置
   python cli.py --sync --max-pages 5  # 同步积分（每个账号最多5页）
+  python cli.py --sync --full-sync  # 全量同步积分（对账）
+  python cli.py --rebuild-stats     # 重建积分汇总表和每日汇总表
+  python cli.py --pipeline          # 每个账号登录一次，依次签到、查询余额、同步积分
+  python cli.py --pipeline --tasks checkin,redeem --codes CODE1,CODE2  # 签到后兑换兑换码
+  python cli.py --clear-redeem-cache --codes CODE1  # 清除兑换码状态缓存（不指定--codes时清除全部）
         """
     )
 
@@ -189,6 +286,44 @@ def main():
         help='显示当前配置'
     )
 
+    parser.add_argument(
+        '--rebuild-stats',
+        action='store_true',
+        help='从积分历史重建积分汇总表和每日汇总表'
+    )
+
+    parser.add_argument(
+        '--pipeline',
+        action='store_true',
+        help='运行账号流水线（每个账号只登录一次，依次执行--tasks中的任务）'
+    )
+
+    parser.add_argument(
+        '--tasks',
+        type=str,
+        default=None,
+        help='流水线任务，逗号分隔: checkin,balance,sync,redeem（默认使用配置值）'
+    )
+
+    parser.add_argument(
+        '--codes',
+        type=str,
+        default=None,
+        help='流水线redeem任务的兑换码，逗号分隔'
+    )
+
+    parser.add_argument(
+        '--clear-redeem-cache',
+        action='store_true',
+        help='清除兑换码状态缓存（只清除--codes中的兑换码，未指定时清除全部）'
+    )
+
+    parser.add_argument(
+        '--full-sync',
+        action='store_true',
+        help='全量同步积分历史（默认只增量同步上次之后的新记录）'
+    )
+
     parser.add_argument(
         '--max-pages',
         type=int,
@@ -196,6 +331,19 @@ def main():
         help='同步时每个账号的最大页数'
     )
 
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='签到时的并发浏览器数量（默认使用配置值）'
+    )
+
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='强制签到所有账号（默认跳过今天已签到的账号）'
+    )
+
     parser.add_argument(
         '--trigger-type',
         type=str,
@@ -217,9 +365,42 @@ def main():
         show_config()
         return
 
+    # 重建积分汇总表和每日汇总表
+    if args.rebuild_stats:
+        sys.exit(0 if run_rebuild_stats() else 1)
+
+    # 清除兑换码状态缓存
+    if args.clear_redeem_cache:
+        codes = [code.strip() for code in (args.codes or '').split(',') if code.strip()]
+        sys.exit(0 if run_clear_redeem_cache(codes) else 1)
+
+    # 账号流水线
+    if args.pipeline:
+        if args.tasks:
+            tasks = [task for task in args.tasks.split(',') if task.strip()]
+        else:
+            tasks = ConfigManager().get_pipeline_config()['tasks']
+        codes = [code.strip() for code in (args.codes or '').split(',') if code.strip()]
+
+        result = run_pipeline(
+            tasks,
+            headless=args.headless,
+            codes=codes,
+            trigger_type=args.trigger_type,
+            trigger_by=args.trigger_by,
+            max_pages=args.max_pages,
+            full_sync=True if args.full_sync else None,
+            force=args.force
+        )
+        sys.exit(0 if result and result['success'] > 0 else 1)
+
     # 同步积分
     if args.sync:
-        result = run_sync_points(headless=args.headless, max_pages=args.max_pages)
+        result = run_sync_points(
+            headless=args.headless,
+            max_pages=args.max_pages,
+            full_sync=True if args.full_sync else None
+        )
         if result and result['success'] > 0:
             sys.exit(0)
         else:
@@ -229,9 +410,11 @@ def main():
         result = run_checkin(
             headless=args.headless,
             trigger_type=args.trigger_type,
-            trigger_by=args.trigger_by
+            trigger_by=args.trigger_by,
+            max_workers=args.workers,
+            force=args.force
         )
-        if result and result['success'] > 0:
+        if result and (result['success'] > 0 or result['skipped'] > 0):
             sys.exit(0)
         else:
             sys.exit(1)
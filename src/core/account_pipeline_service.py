@@ -0,0 +1,311 @@
+"""
+账号流水线服务
+在一次登录会话中依次完成同一账号的多个任务（签到、查询余额、同步积分历史、兑换码兑换），
+避免每个任务各自启动浏览器、各自登录。
+"""
+import logging
+from src.core.browser_service import BrowserService
+from src.core.checkin_service import CheckinService
+from src.core.points_sync_service import PointsSyncService
+from src.core.redeem_service import RedeemService
+from src.data.repositories.config_repository import ConfigManager
+from src.utils.rate_limiter import DomainRateLimiter
+
+
+class AccountPipelineService(BrowserService):
+    """
+    账号流水线服务类
+    登录一次后把浏览器借给各业务服务执行任务，结果通过各服务原有的仓储写入数据库
+    """
+
+    TASK_CHECKIN = 'checkin'
+    TASK_BALANCE = 'balance'
+    TASK_SYNC = 'sync'
+    TASK_REDEEM = 'redeem'
+
+    # 支持的任务（按推荐执行顺序）
+    TASKS = (TASK_CHECKIN, TASK_BALANCE, TASK_SYNC, TASK_REDEEM)
+
+    def __init__(self, headless=False, use_pool=None):
+        """
+        初始化账号流水线服务
+
+        Args:
+            headless: 是否使用无头模式
+            use_pool: 是否使用浏览器池（None表示使用配置值）
+        """
+        super().__init__(headless=headless, use_pool=use_pool)
+        self.config_manager = ConfigManager()
+        self.checkin_service = CheckinService(headless=headless, use_pool=use_pool)
+        self.sync_service = PointsSyncService(headless=headless)
+        self.redeem_service = RedeemService(headless=headless)
+
+    @classmethod
+    def normalize_tasks(cls, tasks):
+        """
+        校验任务列表并去重（保持给定顺序）
+
+        Raises:
+            ValueError: 包含不支持的任务
+        """
+        normalized = []
+        for task in tasks:
+            task = task.strip().lower()
+            if task not in cls.TASKS:
+                raise ValueError(f"不支持的任务: {task}（可选: {', '.join(cls.TASKS)}）")
+            if task not in normalized:
+                normalized.append(task)
+        return normalized
+
+    def run_account(self, domain, email, password, tasks, codes=None, session_id=None,
+                    max_pages=None, full_sync=False):
+        """
+        在一次登录会话中执行单个账号的任务
+
+        Args:
+            domain: 域名
+            email: 邮箱
+            password: 密码
+            tasks: 任务列表（checkin/balance/sync/redeem）
+            codes: 兑换码列表（redeem任务使用）
+            session_id: 签到会话ID（checkin任务使用，可选）
+            max_pages: 积分同步的最大页数
+            full_sync: 积分同步是否全量对账
+
+        Returns:
+            dict: {
+                'email': str,
+                'domain': str,
+                'logged_in': bool,
+                'success': bool,  # 所有任务均成功
+                'tasks': {任务名: 任务结果}
+            }
+        """
+        tasks = self.normalize_tasks(tasks)
+        outcome = {
+            'email': email,
+            'domain': domain,
+            'logged_in': False,
+            'success': False,
+            'tasks': {}
+        }
+
+        try:
+            with self.get_browser() as driver:
+                if not self.login_account(domain, email, password):
+                    logging.error(f"流水线登录失败: {email} @ {domain}")
+                    if self.TASK_CHECKIN in tasks and session_id:
+                        self.checkin_service.logger_db.log_account_result(
+                            session_id, email, 'login_failed', '登录失败', 0, domain
+                        )
+                    return outcome
+
+                outcome['logged_in'] = True
+                for task in tasks:
+                    logging.info(f"执行任务 [{task}]: {email}")
+                    try:
+                        outcome['tasks'][task] = self._run_task(
+                            task, driver, domain, email, codes, session_id, max_pages, full_sync
+                        )
+                    except Exception as e:
+                        logging.error(f"任务 [{task}] 出错: {e}", exc_info=True)
+                        outcome['tasks'][task] = {'success': False, 'message': f'任务异常: {str(e)}'}
+                        if task == self.TASK_CHECKIN and session_id:
+                            self.checkin_service.logger_db.log_account_result(
+                                session_id, email, 'error', str(e), 0, domain
+                            )
+
+        except Exception as e:
+            logging.error(f"账号流水线出错: {e}", exc_info=True)
+
+        outcome['success'] = outcome['logged_in'] and all(
+            outcome['tasks'].get(task, {}).get('success') for task in tasks
+        )
+        return outcome
+
+    def _run_task(self, task, driver, domain, email, codes, session_id, max_pages, full_sync):
+        """在已登录的浏览器中执行单个任务"""
+        if task == self.TASK_CHECKIN:
+            result = CheckinService.new_result(domain, email)
+            with self.lend_browser(self.checkin_service):
+                return self.checkin_service._checkin_on_page(driver, domain, email, session_id, result)
+
+        if task == self.TASK_BALANCE:
+            return self._fetch_balance(driver, email)
+
+        if task == self.TASK_SYNC:
+            result, watermark = self.sync_service._start_history_result(email, full_sync)
+            if self.sync_service._sync_history_via_api(domain, email, watermark, max_pages, result):
+                return result
+            with self.lend_browser(self.sync_service):
+                return self.sync_service._sync_history_on_page(driver, domain, email, watermark, max_pages, result)
+
+        return self._redeem_codes(driver, domain, email, codes or [])
+
+    def _fetch_balance(self, driver, email):
+        """读取当前积分余额（优先使用页面已请求到的用户信息）"""
+        user_info = self.captured_user_info()
+        if user_info is not None:
+            current_points = user_info.get('tokens', 0)
+            logging.info(f"账号 {email} 当前积分: {current_points}")
+        else:
+            with self.lend_browser(self.checkin_service):
+                current_points = self.checkin_service._refresh_current_points(driver, email)
+
+        return {
+            'success': True,
+            'current_points': current_points,
+            'message': f'当前积分 {current_points}'
+        }
+
+    def _redeem_codes(self, driver, domain, email, codes):
+        """在同一页面会话中依次兑换兑换码（已缓存为无效或已使用的兑换码直接跳过）"""
+        results = {}
+        pending = self.redeem_service.skip_cached(email, codes, results)
+        if pending:
+            with self.lend_browser(self.redeem_service):
+                self.redeem_service._redeem_codes_on_page(driver, domain, email, pending, results)
+
+        results = [results[code] for code in dict.fromkeys(codes)]
+        success_count = sum(1 for r in results if r['success'])
+        return {
+            'success': bool(results) and success_count == len(results),
+            'total': len(results),
+            'redeemed': success_count,
+            'results': results,
+            'message': f'兑换成功 {success_count}/{len(results)}' if results else '没有兑换码'
+        }
+
+    def run_all(self, tasks, codes=None, domains=None, trigger_type='manual', trigger_by=None,
+                max_pages=None, full_sync=None, force=False):
+        """
+        对所有账号执行流水线
+
+        每个账号按健康状态依次尝试各域名（跳过熔断中的域名），登录成功的域名上执行全部任务。
+        当前签到日已签到的账号不再执行签到任务，没有其他任务时不登录。
+
+        Args:
+            tasks: 任务列表
+            codes: 兑换码列表（redeem任务使用）
+            domains: 域名列表（可选，默认主域名和备用域名）
+            trigger_type: 触发类型（manual/scheduled/api），用于签到会话记录
+            trigger_by: 触发者
+            max_pages: 积分同步的最大页数
+            full_sync: 是否全量同步积分（None表示按配置周期性执行）
+            force: 是否强制签到（不跳过当前签到日已签到的账号）
+
+        Returns:
+            dict: 批量执行结果统计
+        """
+        tasks = self.normalize_tasks(tasks)
+
+        if self.TASK_SYNC in tasks and full_sync is None:
+            full_sync = self.sync_service.is_full_sync_due()
+        full_sync = bool(full_sync)
+
+        accounts = self.config_manager.get_accounts()
+        if not accounts:
+            logging.warning("没有配置任何账号")
+            return {'total': 0, 'success': 0, 'failed': 0, 'skipped': 0, 'tasks': tasks, 'results': []}
+
+        logger_db = self.checkin_service.logger_db
+        session_id = None
+        result_writer = None
+        skipped = set()
+        if self.TASK_CHECKIN in tasks:
+            # 先查询签到记录，当前签到日已完成签到的账号只执行其他任务
+            if not force:
+                _, checked = self.checkin_service.split_checked_accounts(accounts)
+                skipped = {account['mail'] for account in checked}
+                if skipped:
+                    logging.info(f"跳过今天已签到的 {len(skipped)} 个账号的签到任务: {', '.join(skipped)}")
+
+            session_id = logger_db.log_checkin_start(trigger_type=trigger_type, trigger_by=trigger_by)
+            logger_db.log_skipped(session_id, len(skipped))
+            result_writer = logger_db.open_result_writer(session_id)
+
+        rate_limiter = DomainRateLimiter(self.config_manager.get_checkin_config()['domain_interval'])
+        outcomes = []
+        try:
+            for account in accounts:
+                email = account['mail']
+                account_tasks = [task for task in tasks if not (task == self.TASK_CHECKIN and email in skipped)]
+                outcome = None
+                if not account_tasks:
+                    # 只有签到任务且今天已签到，不需要登录
+                    outcome = {'email': email, 'domain': None, 'logged_in': False, 'success': True, 'tasks': {}}
+                else:
+                    # 按健康状态排列域名，熔断中的域名不再分配账号
+                    for domain in self.iter_domains(domains):
+                        rate_limiter.acquire(domain)
+
+                        logging.info(f"\n{'='*60}")
+                        logging.info(f"账号流水线: {email} @ {domain} 任务: {', '.join(account_tasks)}")
+                        logging.info(f"{'='*60}")
+
+                        outcome = self.run_account(
+                            domain, email, account['password'], account_tasks, codes=codes, session_id=session_id,
+                            max_pages=max_pages, full_sync=full_sync
+                        )
+                        if outcome['logged_in']:
+                            break
+
+                if outcome is None:
+                    logging.warning(f"所有域名均在熔断中，跳过账号: {email}")
+                    outcome = {'email': email, 'domain': None, 'logged_in': False, 'success': False, 'tasks': {}}
+                    if session_id and email not in skipped:
+                        logger_db.log_account_result(
+                            session_id, email, 'domain_unavailable', '所有域名均不可用（熔断中）', 0, None
+                        )
+
+                if email in skipped:
+                    outcome['tasks'][self.TASK_CHECKIN] = {
+                        'success': True, 'skipped': True, 'message': '今天已签到，跳过'
+                    }
+
+                outcome['send_email_notification'] = account.get('send_email_notification', False)
+                outcomes.append(outcome)
+        finally:
+            if result_writer:
+                result_writer.close()
+
+        if session_id is not None:
+            checkin_results = []
+            for outcome in outcomes:
+                if outcome['email'] in skipped:
+                    continue
+                result = outcome['tasks'].get(self.TASK_CHECKIN) or {
+                    **CheckinService.new_result(outcome['domain'], outcome['email']),
+                    'message': '登录失败'
+                }
+                result['send_email_notification'] = outcome['send_email_notification']
+                checkin_results.append(result)
+
+            # 所有账号都已跳过时不发送
+            email_sent = self.checkin_service.send_notifications(checkin_results) if checkin_results else False
+            logger_db.log_checkin_end(session_id, email_sent=email_sent)
+
+        # 记录全量对账时间（仅在全部账号同步成功且未限制页数时）
+        if self.TASK_SYNC in tasks and full_sync and not max_pages and all(
+                o['tasks'].get(self.TASK_SYNC, {}).get('success') for o in outcomes):
+            self.sync_service.mark_full_sync_done()
+
+        success_count = sum(1 for o in outcomes if o['success'])
+        logging.info(f"\n{'='*60}")
+        logging.info("账号流水线完成统计:")
+        logging.info(f"  任务: {', '.join(tasks)}")
+        logging.info(f"  总账号数: {len(accounts)}")
+        logging.info(f"  全部成功: {success_count}")
+        logging.info(f"  存在失败: {len(outcomes) - success_count}")
+        if skipped:
+            logging.info(f"  跳过签到: {len(skipped)}")
+        logging.info(f"{'='*60}")
+
+        return {
+            'total': len(accounts),
+            'success': success_count,
+            'failed': len(outcomes) - success_count,
+            'skipped': len(skipped),
+            'tasks': tasks,
+            'results': outcomes
+        }
@@ -48,8 +48,8 @@ class AccountVerifyService(BrowserService):
 
         try:
             with self.get_browser() as driver:
-                # 尝试登录
-                login_success = self.login_account(domain, email, password)
+                # 尝试登录（验证的是账号密码，不使用缓存的登录会话）
+                login_success = self.login_account(domain, email, password, use_cache=False)
 
                 if login_success:
                     result['success'] = True
@@ -5,8 +5,18 @@
 import logging
 import time
 from contextlib import contextmanager
+from src.data.repositories.config_repository import ConfigManager
+from src.data.repositories.selector_stats_repository import SelectorStatsRepository
+from src.infrastructure.api.api_client import GptGodApiClient
 from src.infrastructure.browser.browser_manager import BrowserManager
+from src.infrastructure.browser.browser_pool import get_browser_pool
+from src.infrastructure.browser.clearance_store import CLEARANCE_COOKIE, get_clearance_store
 from src.infrastructure.browser.cloudflare_bypasser import CloudflareBypasser
+from src.infrastructure.browser.network_capture import NetworkCapture
+from src.infrastructure.browser.page_waiter import PageWaiter
+from src.infrastructure.browser.resource_blocker import ResourceBlocker
+from src.infrastructure.browser.session_cache import get_session_cache
+from src.utils.domain_health import get_domain_health
 
 
 class BrowserService:
@@ -15,17 +25,123 @@ class BrowserService:
     提供统一的浏览器创建、管理和Cloudflare绕过功能
     """
 
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, use_pool=None):
         """
         初始化浏览器服务
 
         Args:
             headless: 是否使用无头模式
+            use_pool: 是否从浏览器池租用浏览器（None表示使用配置值）
         """
         self.headless = headless
         self.browser_manager = None
         self.driver = None
         self.bypasser = None
+        self.waiter = None
+
+        # 当前域名及注入的Cloudflare验证凭证
+        self.clearance_store = get_clearance_store()
+        self.current_domain = None
+        self.user_agent = None
+        self.clearance_injected = False
+
+        config_manager = ConfigManager()
+        self.pool_config = config_manager.get_browser_pool_config()
+        self.use_pool = self.pool_config['enabled'] if use_pool is None else use_pool
+
+        session_config = config_manager.get_session_cache_config()
+        self.session_cache = get_session_cache(session_config['max_age']) if session_config['enabled'] else None
+        self.use_api = config_manager.get_system_config('api_client_enabled', True)
+        self.blocking_config = config_manager.get_resource_blocking_config()
+        self.cache_config = config_manager.get_browser_cache_config()
+        self.resource_blocker = None
+        self.network_capture = None
+        self.selector_stats = SelectorStatsRepository() if config_manager.get_selector_ranking_enabled() else None
+        self.domain_health = get_domain_health(**config_manager.get_domain_health_config())
+
+    def get_pool(self):
+        """获取当前服务使用的全局浏览器池"""
+        return get_browser_pool(
+            self.headless,
+            max_size=self.pool_config['max_size'],
+            max_uses=self.pool_config['max_uses'],
+            idle_timeout=self.pool_config['idle_timeout'],
+            max_contexts=self.pool_config['max_contexts'],
+            shared_cache_dir=self.cache_config['dir'] if self.cache_config['pool_enabled'] else None,
+            cache_size_mb=self.cache_config['size_mb']
+        )
+
+    def _start_resource_blocking(self):
+        """在首次访问页面前启用资源拦截"""
+        if not self.blocking_config['enabled']:
+            return
+
+        blocker = ResourceBlocker(
+            block_types=self.blocking_config['block_types'],
+            block_patterns=self.blocking_config['block_patterns'],
+            allow_patterns=self.blocking_config['allow_patterns']
+        )
+        try:
+            if blocker.attach(self.driver):
+                self.resource_blocker = blocker
+        except Exception as e:
+            logging.debug(f"启用资源拦截失败: {e}")
+
+    def _stop_resource_blocking(self):
+        """停用资源拦截并记录本次节省的请求和流量"""
+        blocker, self.resource_blocker = self.resource_blocker, None
+        if blocker is None:
+            return
+
+        try:
+            stats = blocker.detach()
+            logging.info(
+                f"资源拦截: 拦截 {stats['requests_blocked']} 个请求，"
+                f"节省 {stats['bytes_saved'] / 1024:.1f} KB"
+            )
+        except Exception as e:
+            logging.debug(f"停用资源拦截时出错: {e}")
+
+    def _start_network_capture(self):
+        """在首次访问页面前开始捕获用户信息、签到等接口的响应"""
+        capture = NetworkCapture()
+        try:
+            if capture.attach(self.driver):
+                self.network_capture = capture
+        except Exception as e:
+            logging.debug(f"启用网络捕获失败: {e}")
+
+    def _stop_network_capture(self):
+        """停止网络捕获"""
+        capture, self.network_capture = self.network_capture, None
+        if capture is not None:
+            try:
+                capture.detach()
+            except Exception as e:
+                logging.debug(f"停用网络捕获时出错: {e}")
+
+    def captured_user_info(self, after=None, timeout=0):
+        """
+        获取页面已请求到的用户信息
+
+        Args:
+            after: 捕获序号（network_capture.marker()），只接受之后收到的响应
+            timeout: 没有可用响应时的最长等待时间（秒）
+
+        Returns:
+            dict: 用户信息，没有捕获到有效响应时返回None
+        """
+        if self.network_capture is None:
+            return None
+
+        if after is None and not timeout:
+            body = self.network_capture.latest('user_info')
+        else:
+            body = self.network_capture.wait_for('user_info', after=after or 0, timeout=timeout)
+
+        if body and body.get('code') == 0 and isinstance(body.get('data'), dict):
+            return body['data']
+        return None
 
     @contextmanager
     def get_browser(self):
@@ -37,23 +153,89 @@ class BrowserService:
                 driver.get('https://example.com')
 
         Yields:
-            driver: ChromiumPage实例
+            driver: ChromiumPage实例（使用浏览器池时为独立上下文中的ChromiumTab）
         """
+        if self.use_pool:
+            # 从浏览器池租用已预热的浏览器，每次租用都不带上一个账号的cookies和存储
+            # （启用共享缓存时复用进程的磁盘缓存）
+            try:
+                with self.get_pool().lease() as tab:
+                    self.driver = tab
+                    self.bypasser = CloudflareBypasser(self.driver)
+                    self.waiter = PageWaiter(self.driver)
+                    self._start_resource_blocking()
+                    self._start_network_capture()
+
+                    logging.info("已从浏览器池获取浏览器上下文")
+                    try:
+                        yield self.driver
+                    finally:
+                        # 在上下文销毁前停用拦截和捕获
+                        self._stop_network_capture()
+                        self._stop_resource_blocking()
+            finally:
+                self.driver = None
+                self.bypasser = None
+                self.waiter = None
+                logging.info("浏览器上下文已归还")
+            return
+
         try:
-            # 创建浏览器
-            self.browser_manager = BrowserManager(headless=self.headless)
-            self.driver = self.browser_manager.create_browser()
+            # 创建浏览器（启用共享缓存时不使用无痕模式：临时用户目录已保证账号隔离，
+            # 无痕模式下Chromium不使用磁盘缓存）
+            shared_cache = self.cache_config['enabled']
+            self.browser_manager = BrowserManager(
+                headless=self.headless,
+                shared_cache_dir=self.cache_config['dir'] if shared_cache else None,
+                cache_size_mb=self.cache_config['size_mb']
+            )
+            self.driver = self.browser_manager.create_browser(incognito=not shared_cache)
             self.bypasser = CloudflareBypasser(self.driver)
+            self.waiter = PageWaiter(self.driver)
+            self._start_resource_blocking()
+            self._start_network_capture()
 
             logging.info("浏览器创建成功")
             yield self.driver
 
         finally:
+            self._stop_network_capture()
+            self._stop_resource_blocking()
             # 清理资源
             if self.browser_manager:
                 self.browser_manager.close()
                 logging.info("浏览器已关闭")
 
+    # 借出浏览器时需要同步给其他服务的状态
+    SHARED_BROWSER_STATE = (
+        'driver', 'bypasser', 'waiter', 'network_capture',
+        'current_domain', 'user_agent', 'clearance_injected'
+    )
+
+    @contextmanager
+    def lend_browser(self, service):
+        """
+        把当前已登录的浏览器借给另一个服务使用，用于在同一个登录会话中执行多个任务
+
+        Usage:
+            with self.get_browser() as driver:
+                self.login_account(domain, email, password)
+                with self.lend_browser(checkin_service):
+                    checkin_service._checkin_on_page(driver, ...)
+
+        Yields:
+            service: 已绑定当前浏览器的服务
+        """
+        for name in self.SHARED_BROWSER_STATE:
+            setattr(service, name, getattr(self, name))
+        try:
+            yield service
+        finally:
+            # 借用期间可能重新通过了Cloudflare验证
+            self.clearance_injected = service.clearance_injected
+            for name in self.SHARED_BROWSER_STATE:
+                setattr(service, name, None)
+
     def bypass_cloudflare(self, max_retries=3):
         """
         绕过Cloudflare验证
@@ -70,12 +252,15 @@ class BrowserService:
         if not self.driver or not self.bypasser:
             raise RuntimeError("浏览器未初始化，请先调用get_browser()")
 
+        # 点击签到、兑换后的页内Turnstile验证与cf_clearance是否有效无关，这里不作废注入的凭证
         for attempt in range(max_retries):
             try:
                 logging.info(f"尝试绕过Cloudflare（第{attempt + 1}/{max_retries}次）...")
 
                 if self.bypasser.bypass():
                     logging.info("✅ Cloudflare绕过成功")
+                    self.remember_clearance()
+                    self._record_challenge(True)
                     return True
                 else:
                     logging.warning(f"第{attempt + 1}次绕过失败")
@@ -87,19 +272,225 @@ class BrowserService:
                 if attempt < max_retries - 1:
                     time.sleep(2)
                 else:
+                    self._record_challenge(False)
                     raise
 
         logging.error("❌ 所有Cloudflare绕过尝试均失败")
+        self._record_challenge(False)
+        return False
+
+    def pass_navigation_challenge(self, timeout=15):
+        """
+        访问页面时出现Cloudflare托管验证：注入的凭证没能免除验证，作废后尝试通过验证
+
+        Returns:
+            bool: 是否已通过验证，没有出现验证时返回None
+        """
+        if not self.bypasser or not self.bypasser.locate_turnstile():
+            return None
+
+        logging.info("访问页面时检测到Cloudflare验证，尝试绕过...")
+        if self.clearance_injected:
+            self.clearance_store.reject(self.current_domain, self.user_agent)
+            self.clearance_injected = False
+
+        self.bypasser.click_verification_button()
+        passed = bool(self.waiter.until(lambda: not self.bypasser.locate_turnstile(), timeout=timeout))
+        self._record_challenge(passed)
+        if passed:
+            logging.info("✅ Cloudflare验证已通过")
+            self.remember_clearance()
+        return passed
+
+    def _record_challenge(self, passed):
+        """记录当前域名的一次Cloudflare验证结果"""
+        if not self.current_domain:
+            return
+        self.domain_health.record_challenge(self.current_domain, passed)
+        if not passed:
+            self.domain_health.record_failure(self.current_domain, 'cf_failed')
+
+    def apply_clearance(self, domain):
+        """
+        访问域名前注入已缓存的Cloudflare验证凭证
+
+        Args:
+            domain: 即将访问的域名
+
+        Returns:
+            bool: 是否注入了凭证
+        """
+        self.current_domain = domain
+        self.clearance_injected = False
+
+        try:
+            self.user_agent = self.driver.run_cdp('Browser.getVersion').get('userAgent')
+            cookie = self.clearance_store.get(domain, self.user_agent)
+            if cookie:
+                self.driver.set.cookies([cookie])
+                self.clearance_injected = True
+                logging.info(f"已注入 {domain} 的Cloudflare验证凭证")
+        except Exception as e:
+            logging.debug(f"注入Cloudflare验证凭证失败: {e}")
+
+        return self.clearance_injected
+
+    def remember_clearance(self):
+        """将当前上下文中的cf_clearance保存到凭证缓存，供其他浏览器上下文复用"""
+        if not self.driver or not self.current_domain:
+            return False
+
+        try:
+            for cookie in self.driver.cookies(all_info=True):
+                if cookie.get('name') == CLEARANCE_COOKIE:
+                    return self.clearance_store.put(
+                        self.current_domain, self.user_agent,
+                        {field: cookie[field] for field in self.SESSION_COOKIE_FIELDS if field in cookie}
+                    )
+        except Exception as e:
+            logging.debug(f"读取Cloudflare验证凭证失败: {e}")
         return False
 
-    def login_account(self, domain, email, password):
+    # 保存/恢复登录会话时保留的cookie字段
+    SESSION_COOKIE_FIELDS = ('name', 'value', 'domain', 'path', 'expires', 'secure', 'httpOnly', 'sameSite')
+
+    def restore_session(self, domain, email):
+        """
+        恢复缓存的登录会话，并通过用户信息接口确认会话仍然有效
+
+        Args:
+            domain: 域名
+            email: 邮箱
+
+        Returns:
+            bool: 是否已通过缓存会话登录
+        """
+        if not self.session_cache:
+            return False
+
+        state = self.session_cache.load(domain, email)
+        if not state:
+            return False
+
+        try:
+            now = time.time()
+            cookies = [
+                cookie for cookie in state['cookies']
+                if (not cookie.get('expires') or cookie['expires'] <= 0 or cookie['expires'] > now)
+                and not (self.clearance_injected and cookie.get('name') == CLEARANCE_COOKIE)
+            ]
+            if cookies:
+                self.driver.set.cookies(cookies)
+
+            # localStorage只能在同源页面中写入
+            self.driver.get(f'https://{domain}/')
+            self.driver.run_js(
+                'const items = arguments[0]; for (const key in items) { localStorage.setItem(key, items[key]); }',
+                state['local_storage']
+            )
+
+            # 带着恢复的登录状态重新加载页面，由用户信息接口判断会话是否被接受
+            self.driver.listen.start('api/user/info', method='GET')
+            try:
+                self.driver.get(f'https://{domain}/#/token')
+                self.driver.refresh()
+                body = self.waiter.json_response(timeout=10)
+            finally:
+                self.driver.listen.stop()
+
+            if body and body.get('code') == 0 and 'login' not in (self.driver.url or '').lower():
+                logging.info(f"✅ 账号 {email} 已使用缓存的登录会话")
+                return True
+
+            logging.info(f"缓存的登录会话已失效，重新登录: {email}")
+
+        except Exception as e:
+            logging.warning(f"恢复登录会话失败，重新登录: {e}")
+
+        self.session_cache.invalidate(domain, email)
+        self._clear_session_state()
+        return False
+
+    def get_api_client(self, domain, email):
+        """
+        使用缓存的登录会话创建HTTP API客户端
+
+        Returns:
+            GptGodApiClient实例，未启用、没有缓存会话或会话中没有登录令牌时返回None
+        """
+        if not self.use_api or not self.session_cache:
+            return None
+
+        state = self.session_cache.load(domain, email)
+        if state:
+            # 优先使用凭证缓存中较新的cf_clearance（与会话的User-Agent匹配）
+            clearance = self.clearance_store.get(domain, state.get('user_agent'))
+            if clearance:
+                state['cookies'] = [c for c in state['cookies'] if c.get('name') != CLEARANCE_COOKIE]
+                state['cookies'].append(clearance)
+        return GptGodApiClient.from_session_state(domain, state)
+
+    def _clear_session_state(self):
+        """清除当前上下文中恢复的cookies和localStorage"""
+        try:
+            self.driver.run_js('localStorage.clear();')
+        except Exception as e:
+            logging.debug(f"清除localStorage失败: {e}")
+        try:
+            self.driver.set.cookies.clear()
+        except Exception as e:
+            logging.debug(f"清除cookies失败: {e}")
+
+    def save_session(self, domain, email):
+        """保存当前登录会话到缓存"""
+        if not self.session_cache:
+            return False
+
+        try:
+            cookies = [
+                {field: cookie[field] for field in self.SESSION_COOKIE_FIELDS if field in cookie}
+                for cookie in self.driver.cookies(all_info=True)
+            ]
+            local_storage = self.driver.run_js('return Object.assign({}, localStorage);') or {}
+            user_agent = self.driver.run_js('return navigator.userAgent;')
+            return self.session_cache.save(domain, email, cookies, local_storage, user_agent)
+        except Exception as e:
+            logging.warning(f"保存登录会话失败: {e}")
+            return False
+
+    # 登录表单候选选择器（默认顺序，运行时按历史命中率调整，每组在一次页面脚本中检查）
+    EMAIL_INPUT_SELECTORS = [
+        'xpath://input[@placeholder="请输入邮箱"]',
+        'xpath://input[@type="text" and contains(@class, "ant-input")]',
+        'xpath://input[@type="email"]',
+        '#email'
+    ]
+    PASSWORD_INPUT_SELECTORS = [
+        'xpath://input[@type="password"]',
+        'xpath://input[contains(@placeholder, "密码")]',
+        '#password'
+    ]
+    LOGIN_BUTTON_SELECTORS = [
+        'xpath://button[contains(@class, "ant-btn-primary")]',
+        'xpath://button[contains(., "登录")]',
+        'xpath://button[contains(., "Login")]',
+        'xpath://button[@type="submit"]',
+        # 兜底：按钮文字包含login（不区分大小写）
+        'xpath://button[contains(translate(., "LOGIN", "login"), "login")]'
+    ]
+
+    def login_account(self, domain, email, password, use_cache=True):
         """
         登录GPT-GOD账号
 
+        优先恢复缓存的登录会话，会话不存在或被拒绝时填写登录表单，
+        表单登录成功后更新会话缓存。
+
         Args:
             domain: 域名
             email: 邮箱
             password: 密码
+            use_cache: 是否尝试恢复缓存的登录会话
 
         Returns:
             bool: 是否登录成功
@@ -110,116 +501,136 @@ class BrowserService:
         if not self.driver:
             raise RuntimeError("浏览器未初始化，请先调用get_browser()")
 
+        login_start = time.monotonic()
+        self.apply_clearance(domain)
+
+        if use_cache and self.restore_session(domain, email):
+            self.remember_clearance()
+            self.domain_health.record_success(domain, time.monotonic() - login_start)
+            return True
+
         try:
             login_url = f'https://{domain}/#/login'
             logging.info(f"访问登录页面: {login_url}")
 
             self.driver.get(login_url)
-            time.sleep(5)
 
-            # 填写登录表单
+            # 填写登录信息（等待登录表单渲染完成，任一候选选择器命中即返回）
             logging.info(f"填写登录信息: {email}")
 
-            # 多种方式尝试定位邮箱输入框
-            email_input = None
-            for selector in [
-                'xpath://input[@placeholder="请输入邮箱"]',
-                'xpath://input[@type="text" and contains(@class, "ant-input")]',
-                'xpath://input[@type="email"]',
-                '#email'
-            ]:
-                try:
-                    email_input = self.driver.ele(selector, timeout=3)
-                    if email_input:
-                        logging.info(f"找到邮箱输入框: {selector}")
-                        break
-                except:
-                    continue
+            _, email_input = self.find_element('login.email', self.EMAIL_INPUT_SELECTORS, timeout=15)
+
+            # 登录页面被Cloudflare托管验证拦截时先通过验证
+            challenge = None
+            if not email_input:
+                challenge = self.pass_navigation_challenge()
+                if challenge:
+                    _, email_input = self.find_element('login.email', self.EMAIL_INPUT_SELECTORS, timeout=15)
 
             if not email_input:
                 logging.error("未找到邮箱输入框")
+                if challenge is not False:
+                    # 登录页面没有渲染出来，多半是域名无法访问（验证失败已记录为cf_failed）
+                    self.domain_health.record_failure(domain, 'page_unavailable')
                 return False
 
-            # 多种方式尝试定位密码输入框
-            password_input = None
-            for selector in [
-                'xpath://input[@type="password"]',
-                'xpath://input[contains(@placeholder, "密码")]',
-                '#password'
-            ]:
-                try:
-                    password_input = self.driver.ele(selector, timeout=3)
-                    if password_input:
-                        logging.info(f"找到密码输入框: {selector}")
-                        break
-                except:
-                    continue
+            _, password_input = self.find_element('login.password', self.PASSWORD_INPUT_SELECTORS, timeout=5)
 
             if not password_input:
                 logging.error("未找到密码输入框")
+                self.domain_health.record_failure(domain, 'page_unavailable')
                 return False
 
             # 输入凭证
             logging.info("清空并输入邮箱...")
             email_input.clear()
             email_input.input(email)
-            time.sleep(0.5)
 
             logging.info("清空并输入密码...")
             password_input.clear()
             password_input.input(password)
-            time.sleep(0.5)
-
-            # 查找并点击登录按钮 - 多种选择器尝试
-            login_button = None
-            login_selectors = [
-                'xpath://button[contains(@class, "ant-btn-primary")]',
-                'xpath://button[contains(., "登录")]',
-                'xpath://button[contains(., "Login")]',
-                'xpath://button[@type="submit"]'
-            ]
-
-            for selector in login_selectors:
-                try:
-                    login_button = self.driver.ele(selector, timeout=3)
-                    if login_button and not login_button.attr('disabled'):
-                        logging.info(f"找到登录按钮: {selector}")
-                        break
-                except:
-                    continue
-
-            # 如果还是没找到，遍历所有按钮
-            if not login_button:
-                logging.info("尝试遍历所有按钮查找登录按钮")
-                buttons = self.driver.eles('tag:button')
-                for btn in buttons:
-                    btn_text = btn.text
-                    if ('登录' in btn_text or 'Login' in btn_text.lower()) and not btn.attr('disabled'):
-                        login_button = btn
-                        logging.info(f"通过文本找到登录按钮: {btn_text}")
-                        break
 
+            # 查找并点击登录按钮 - 整组候选选择器在一次页面脚本中检查（等待按钮变为可用）
+            login_selector, login_button = self.find_element(
+                'login.button', self.LOGIN_BUTTON_SELECTORS, timeout=5, enabled=True
+            )
             if not login_button:
                 logging.error("未找到登录按钮")
+                self.domain_health.record_failure(domain, 'page_unavailable')
                 return False
+            logging.info(f"找到登录按钮: {login_selector}")
 
             login_button.click()
             logging.info("登录按钮点击成功")
-            time.sleep(8)  # 等待登录完成和页面跳转
 
-            # 验证是否登录成功（检查URL变化）
-            current_url = self.driver.url
-            if 'login' in current_url.lower():
-                logging.error(f"登录失败，仍在登录页面: {current_url}")
+            # 验证是否登录成功（等待URL离开登录页）
+            if not self.waiter.url_change(excludes='login', timeout=15):
+                logging.error(f"登录失败，仍在登录页面: {self.driver.url}")
+                self.domain_health.record_failure(domain, 'login_rejected')
                 return False
 
             logging.info(f"✅ 账号 {email} 登录成功")
+            self.remember_clearance()
+            self.save_session(domain, email)
+            self.domain_health.record_success(domain, time.monotonic() - login_start)
             return True
 
         except Exception as e:
             logging.error(f"登录过程出错: {e}", exc_info=True)
+            self.domain_health.record_failure(domain, 'exception')
             return False
 
+    def iter_domains(self, domains=None, auto_switch=None):
+        """
+        按健康状态依次给出可以尝试的域名，跳过熔断中的域名
+
+        Args:
+            domains: 域名列表（可选，默认配置的主域名和备用域名）
+            auto_switch: 是否优先使用最快的健康域名（None表示使用配置值）
+
+        Yields:
+            str: 域名
+        """
+        if not domains or auto_switch is None:
+            domain_config = ConfigManager().get_domain_config()
+            if not domains:
+                domains = [domain_config.get('primary', 'gptgod.online'), domain_config.get('backup', 'gptgod.work')]
+                domains = [d for d in domains if d]
+            if auto_switch is None:
+                auto_switch = domain_config.get('auto_switch', True)
+
+        for domain in self.domain_health.rank(domains, auto_switch):
+            if self.domain_health.allow(domain):
+                yield domain
+            else:
+                logging.warning(f"域名 {domain} 熔断中，跳过")
+
+    def find_element(self, page, selectors, timeout=10, enabled=False):
+        """
+        等待候选选择器中的任一元素出现，候选顺序按历史命中率调整
+
+        只用于同一元素的多个候选选择器；表示页面不同状态的选择器应使用waiter.match按固定顺序检查。
+
+        Args:
+            page: 页面标识（如login.email），用于区分统计
+            selectors: 候选选择器列表（默认顺序）
+            timeout: 超时时间（秒）
+            enabled: 是否跳过disabled元素
+
+        Returns:
+            tuple: (命中的选择器, 元素)，超时返回(None, None)
+        """
+        if self.selector_stats:
+            selectors = self.selector_stats.rank(self.current_domain, page, selectors)
+
+        start = time.monotonic()
+        selector, element = self.waiter.match(selectors, timeout=timeout, enabled=enabled)
+
+        if self.selector_stats:
+            elapsed_ms = (time.monotonic() - start) * 1000
+            self.selector_stats.record(self.current_domain, page, selectors, selector, elapsed_ms)
+        return selector, element
+
     def wait_for_page_load(self, timeout=10):
         """
         等待页面加载完成
@@ -227,6 +638,6 @@ class BrowserService:
         Args:
             timeout: 超时时间（秒）
         """
-        if self.driver:
-            time.sleep(2)  # 简单等待，可以改进为更智能的检测
+        if self.waiter:
+            self.waiter.document_ready(timeout=timeout)
             logging.debug("页面加载等待完成")
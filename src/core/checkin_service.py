@@ -3,12 +3,16 @@
 统一管理签到业务逻辑，包括登录、Cloudflare绕过、签到操作
 """
 import logging
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from src.core.browser_service import BrowserService
+from src.infrastructure.api.api_client import ApiAuthError, ApiClientError
 from src.data.repositories.checkin_repository import CheckinLoggerDB
 from src.data.repositories.config_repository import ConfigManager
 from src.infrastructure.notification.email_service import EmailService
+from src.utils.attempt_race import AttemptRace, collect_attempts
+from src.utils.rate_limiter import DomainRateLimiter
 
 
 class CheckinService(BrowserService):
@@ -17,14 +21,15 @@ class CheckinService(BrowserService):
     继承BrowserService，实现签到业务逻辑
     """
 
-    def __init__(self, headless=False):
+    def __init__(self, headless=False, use_pool=None):
         """
         初始化签到服务
 
         Args:
             headless: 是否使用无头模式
+            use_pool: 是否使用浏览器池（None表示使用配置值）
         """
-        super().__init__(headless=headless)
+        super().__init__(headless=headless, use_pool=use_pool)
         self.logger_db = CheckinLoggerDB()
         self.config_manager = ConfigManager()
 
@@ -32,6 +37,28 @@ class CheckinService(BrowserService):
         self.smtp_config = self.config_manager.get_smtp_config()
         self.email_service = EmailService(self.smtp_config)
 
+        # 对冲签到：当前尝试所属的并行尝试，以及尚未结束的落后尝试
+        self.checkin_config = self.config_manager.get_checkin_config()
+        self.race = None
+        self.hedge_pending = []
+
+    # 今天已签到时的按钮
+    ALREADY_CHECKED_SELECTOR = 'xpath://button[contains(., "今天已签到")]'
+    # 可点击的签到按钮
+    CHECKIN_BUTTON_SELECTOR = 'xpath://button[contains(., "签到") and not(contains(., "今天已签到"))]'
+
+    @staticmethod
+    def new_result(domain, email):
+        """创建单个账号的签到结果"""
+        return {
+            'success': False,
+            'email': email,
+            'message': '',
+            'points_earned': 0,
+            'current_points': 0,
+            'domain': domain
+        }
+
     def perform_checkin(self, domain, email, password, session_id=None):
         """
         执行单个账号的签到
@@ -53,14 +80,18 @@ class CheckinService(BrowserService):
                     'domain': str
                 }
         """
-        result = {
-            'success': False,
-            'email': email,
-            'message': '',
-            'points_earned': 0,
-            'current_points': 0,
-            'domain': domain
-        }
+        result = self.new_result(domain, email)
+        if self._race_lost(domain):
+            return self._abandon(result)
+
+        # 先通过API确认今天是否已签到，已签到则无需启动浏览器
+        if self._probe_already_checked(domain, email, result):
+            self.domain_health.record_success(domain)
+            if session_id:
+                self.logger_db.log_account_result(
+                    session_id, email, 'already_checked', '今天已签到', 0, domain
+                )
+            return result
 
         try:
             with self.get_browser() as driver:
@@ -73,134 +104,216 @@ class CheckinService(BrowserService):
                         )
                     return result
 
-                # 导航到签到页面
-                checkin_url = f'https://{domain}/#/token'
-                logging.info(f"导航到签到页面: {checkin_url}")
-                driver.get(checkin_url)
-                logging.info("等待签到页面完全加载...")
-                time.sleep(10)
-
-                # 检查是否已签到
-                already_checked_btn = driver.ele('xpath://button[contains(., "今天已签到")]')
-                if already_checked_btn:
-                    logging.info(f"[已签到] 账号 {email} 今天已经签到过了")
-                    result['success'] = True
-                    result['message'] = '今天已签到'
-                    result['current_points'] = self._get_current_points(driver, email)
+                if self.race:
+                    self.race.mark_progress()
+                return self._checkin_on_page(driver, domain, email, session_id, result)
 
-                    if session_id:
-                        self.logger_db.log_account_result(
-                            session_id, email, 'already_checked', '今天已签到',
-                            0, domain
-                        )
-
-                    return result
+        except Exception as e:
+            logging.error(f"签到过程出错: {e}", exc_info=True)
+            result['message'] = f'签到异常: {str(e)}'
 
-                # 查找签到按钮
-                checkin_button = None
+            if session_id:
+                self.logger_db.log_account_result(
+                    session_id, email, 'error', str(e), 0, domain
+                )
 
-                # 方法1: 通过文本内容查找
-                try:
-                    checkin_button = driver.ele('xpath://button[contains(., "签到")]', timeout=5)
-                except:
-                    pass
-
-                # 方法2: 如果未找到，遍历所有按钮
-                if not checkin_button:
-                    logging.info("尝试遍历所有按钮查找签到按钮")
-                    buttons = driver.eles('tag:button')
-                    for button in buttons:
-                        button_text = button.text
-                        if "签到" in button_text and "今天已签到" not in button_text:
-                            checkin_button = button
-                            break
-
-                if not checkin_button:
-                    logging.warning(f"未找到签到按钮: {email}")
-                    result['message'] = '未找到签到按钮'
+            return result
 
-                    if session_id:
-                        self.logger_db.log_account_result(
-                            session_id, email, 'button_not_found', '未找到签到按钮',
-                            0, domain
-                        )
+    def _checkin_on_page(self, driver, domain, email, session_id, result):
+        """
+        在已登录的浏览器中完成签到
 
-                    return result
+        Args:
+            driver: 已登录的浏览器实例
+            domain: 域名
+            email: 邮箱
+            session_id: 签到会话ID（可选）
+            result: 签到结果字典，会被更新
 
-                # 点击签到按钮（点击后会触发CF验证）
-                logging.info(f"点击签到按钮: {email}")
-                checkin_button.click()
-                time.sleep(5)  # 增加等待时间
-
-                # 点击签到后检查并绕过Cloudflare验证
-                if not self.bypasser.is_bypassed():
-                    logging.info("点击签到后检测到Cloudflare验证，尝试绕过...")
-                    if not self.bypass_cloudflare():
-                        result['message'] = 'Cloudflare验证失败'
-                        if session_id:
-                            self.logger_db.log_account_result(
-                                session_id, email, 'cf_failed', 'Cloudflare验证失败', 0, domain
-                            )
-                        return result
-                    logging.info("✅ Cloudflare验证已通过")
-
-                time.sleep(3)
-
-                # 签到成功
-                logging.info(f"✅ 签到成功: {email}")
-                result['success'] = True
-                result['message'] = '签到成功'
-                result['points_earned'] = 5  # 假设每次签到获得5积分
-                result['current_points'] = self._get_current_points(driver, email)
+        Returns:
+            dict: 签到结果
+        """
+        # 导航到签到页面
+        checkin_url = f'https://{domain}/#/token'
+        logging.info(f"导航到签到页面: {checkin_url}")
+        driver.get(checkin_url)
+        logging.info("等待签到页面完全加载...")
+        # 已签到按钮和签到按钮在一次页面脚本中同时检查，命中已签到说明今天已签到
+        # 两者是页面的两种状态而不是同一元素的候选选择器，按固定顺序检查，不参与命中率排序
+        checkin_selector, checkin_button = self.waiter.match([
+            self.ALREADY_CHECKED_SELECTOR, self.CHECKIN_BUTTON_SELECTOR
+        ], timeout=20)
+
+        # 其他域名上的并行尝试已完成签到时放弃，避免重复记录
+        if self._race_lost(domain):
+            return self._abandon(result)
+
+        # 检查是否已签到
+        if checkin_selector == self.ALREADY_CHECKED_SELECTOR:
+            logging.info(f"[已签到] 账号 {email} 今天已经签到过了")
+            result['success'] = True
+            result['message'] = '今天已签到'
+            # 签到页面加载时已请求过用户信息，直接使用捕获的响应
+            result['current_points'] = self._get_current_points(driver, email)
 
-                if session_id:
-                    self.logger_db.log_account_result(
-                        session_id, email, 'success', '签到成功',
-                        result['points_earned'], domain
-                    )
+            if session_id:
+                self.logger_db.log_account_result(
+                    session_id, email, 'already_checked', '今天已签到',
+                    0, domain
+                )
 
-                return result
+            return result
 
-        except Exception as e:
-            logging.error(f"签到过程出错: {e}", exc_info=True)
-            result['message'] = f'签到异常: {str(e)}'
+        if not checkin_button:
+            logging.warning(f"未找到签到按钮: {email}")
+            result['message'] = '未找到签到按钮'
 
             if session_id:
                 self.logger_db.log_account_result(
-                    session_id, email, 'error', str(e), 0, domain
+                    session_id, email, 'button_not_found', '未找到签到按钮',
+                    0, domain
                 )
 
             return result
 
-    def _get_current_points(self, driver, email):
+        # 并行尝试中只有第一个到达这里的尝试可以点击签到，避免重复签到
+        if self.race and not self.race.claim(domain):
+            return self._abandon(result)
+
+        # 点击签到按钮（点击后会触发CF验证）
+        logging.info(f"点击签到按钮: {email}")
+        capture_marker = self.network_capture.marker() if self.network_capture else 0
+        checkin_button.click()
+
+        # 等待签到完成（出现"今天已签到"）或Cloudflare验证出现
+        self.waiter.element([
+            self.ALREADY_CHECKED_SELECTOR,
+            'xpath://input[@type="hidden" and contains(@name, "turnstile")]',
+            'xpath://iframe[contains(@src, "challenges.cloudflare.com")]'
+        ], timeout=10)
+
+        # 点击签到后检查并绕过Cloudflare验证
+        if not self.bypasser.is_bypassed():
+            logging.info("点击签到后检测到Cloudflare验证，尝试绕过...")
+            if not self.bypass_cloudflare():
+                result['message'] = 'Cloudflare验证失败'
+                if session_id:
+                    self.logger_db.log_account_result(
+                        session_id, email, 'cf_failed', 'Cloudflare验证失败', 0, domain
+                    )
+                return result
+            logging.info("✅ Cloudflare验证已通过")
+
+        # 签到成功
+        logging.info(f"✅ 签到成功: {email}")
+        result['success'] = True
+        result['message'] = '签到成功'
+        result['points_earned'] = 5  # 假设每次签到获得5积分
+        result['current_points'] = self._get_current_points(driver, email, after=capture_marker)
+
+        if session_id:
+            self.logger_db.log_account_result(
+                session_id, email, 'success', '签到成功',
+                result['points_earned'], domain
+            )
+
+        return result
+
+    def _race_lost(self, domain):
+        """并行尝试中是否已有其他域名取得签到权或完成签到"""
+        return self.race is not None and self.race.lost(domain)
+
+    @staticmethod
+    def _abandon(result):
+        """放弃落后的并行尝试（不写入签到日志）"""
+        logging.info(f"其他域名已完成签到，放弃 {result['domain']} 上的尝试: {result['email']}")
+        result['message'] = '已由其他域名完成'
+        result['abandoned'] = True
+        return result
+
+    def _probe_already_checked(self, domain, email, result):
         """
-        获取当前积分（从页面或API）
+        使用缓存的登录会话通过API检查今天是否已签到
+
+        Args:
+            domain: 域名
+            email: 邮箱
+            result: 签到结果字典，已签到时会更新
+
+        Returns:
+            bool: 是否已确认今天已签到（API不可用或未签到时返回False）
+        """
+        client = self.get_api_client(domain, email)
+        if not client:
+            return False
+
+        try:
+            if not client.has_checked_in_today():
+                return False
+            current_points = client.get_balance()
+
+            logging.info(f"[已签到] 账号 {email} 今天已经签到过了（API检查）")
+            result['success'] = True
+            result['message'] = '今天已签到'
+            result['current_points'] = current_points
+            return True
+
+        except ApiClientError as e:
+            logging.info(f"API签到状态检查不可用，使用浏览器: {e}")
+            if isinstance(e, ApiAuthError):
+                self.session_cache.invalidate(domain, email)
+            return False
+
+        finally:
+            client.close()
+
+    # 签到后等待页面自行请求用户信息的最长时间（秒）
+    POINTS_CAPTURE_TIMEOUT = 3
+
+    def _get_current_points(self, driver, email, after=None):
+        """
+        获取当前积分
+
+        优先使用网络捕获中页面已收到的用户信息；after不为None时只接受该捕获序号
+        之后的响应（签到后的余额）。没有捕获到时才刷新页面重新请求。
 
         Args:
             driver: 浏览器实例
             email: 邮箱
+            after: 捕获序号
 
         Returns:
             int: 当前积分
         """
+        user_info = self.captured_user_info(
+            after=after, timeout=self.POINTS_CAPTURE_TIMEOUT if after is not None else 0
+        )
+        if user_info is None and after is not None and self.network_capture:
+            # 本次签到接口的响应中带有余额时直接使用
+            body = self.network_capture.wait_for('checkin', after=after, timeout=0) or {}
+            if isinstance(body.get('data'), dict) and 'tokens' in body['data']:
+                user_info = body['data']
+
+        if user_info is not None:
+            current_points = user_info.get('tokens', 0)
+            logging.info(f"账号 {email} 当前积分: {current_points}")
+            return current_points
+
+        return self._refresh_current_points(driver, email)
+
+    def _refresh_current_points(self, driver, email):
+        """刷新页面并监听用户信息接口获取当前积分"""
         try:
-            # 尝试监听API获取用户信息
+            # 尝试监听API获取用户信息（收到响应即返回）
             driver.listen.start('api/user/info', method='GET')
             driver.refresh()
-            time.sleep(3)
 
-            resp = driver.listen.wait(timeout=5)
-            if resp and resp.response.status == 200:
-                body = resp.response.body
-                if isinstance(body, str):
-                    import json
-                    body = json.loads(body)
-
-                if body.get('code') == 0 and 'data' in body:
-                    user_info = body['data']
-                    current_points = user_info.get('tokens', 0)
-                    logging.info(f"账号 {email} 当前积分: {current_points}")
-                    return current_points
+            body = self.waiter.json_response(timeout=8)
+            if body and body.get('code') == 0 and 'data' in body:
+                user_info = body['data']
+                current_points = user_info.get('tokens', 0)
+                logging.info(f"账号 {email} 当前积分: {current_points}")
+                return current_points
 
         except Exception as e:
             logging.debug(f"获取积分失败: {e}")
@@ -213,73 +326,139 @@ class CheckinService(BrowserService):
 
         return 0
 
-    def batch_checkin(self, domains=None, trigger_type='manual', trigger_by=None):
+    def _checkin_account(self, account, domains, session_id, rate_limiter):
         """
-        批量签到所有账号
+        签到单个账号（依次尝试每个域名，成功即停止）
 
         Args:
-            domains: 域名列表（可选，默认从配置读取）
-            trigger_type: 触发类型（manual/scheduled/api）
-            trigger_by: 触发者
+            account: 账号配置
+            domains: 域名列表（None表示使用配置的主域名和备用域名）
+            session_id: 签到会话ID
+            rate_limiter: 按域名限流器
 
         Returns:
-            dict: 批量签到结果统计
+            tuple: (该账号所有尝试的结果列表, 是否签到成功)
         """
-        # 获取域名配置
-        if not domains:
-            domain_config = self.config_manager.get_domain_config()
-            primary_domain = domain_config.get('primary', 'gptgod.online')
-            backup_domain = domain_config.get('backup', 'gptgod.work')
-            domains = [primary_domain, backup_domain]
-
-        # 获取所有账号
-        accounts = self.config_manager.get_accounts()
-
-        if not accounts:
-            logging.warning("没有配置任何账号")
-            return {
-                'total': 0,
-                'success': 0,
-                'failed': 0,
-                'results': []
-            }
-
-        # 创建签到会话
-        session_id = self.logger_db.log_checkin_start(trigger_type=trigger_type, trigger_by=trigger_by)
+        email = account['mail']
+        password = account['password']
+        send_email = account.get('send_email_notification', False)  # 获取账号级别的邮件通知配置
 
         results = []
-        success_count = 0
-        failed_count = 0
+        # 按健康状态排列域名，熔断中的域名不再分配账号
+        candidates = self.iter_domains(domains)
+        for domain in candidates:
+            # 同一域名的请求保持最小间隔，避免被限流
+            rate_limiter.acquire(domain)
+
+            logging.info(f"\n{'='*60}")
+            logging.info(f"签到账号: {email} @ {domain}")
+            logging.info(f"{'='*60}")
+
+            if self.checkin_config['hedge_enabled']:
+                attempts = self._hedged_checkin(domain, candidates, email, password, session_id, rate_limiter)
+            else:
+                attempts = [self.perform_checkin(domain, email, password, session_id)]
 
-        # 逐个签到
-        for account in accounts:
-            email = account['mail']
-            password = account['password']
-            send_email = account.get('send_email_notification', False)  # 获取账号级别的邮件通知配置
-
-            # 尝试每个域名
-            account_success = False
-            for domain in domains:
-                logging.info(f"\n{'='*60}")
-                logging.info(f"签到账号: {email} @ {domain}")
-                logging.info(f"{'='*60}")
-
-                result = self.perform_checkin(domain, email, password, session_id)
+            for result in attempts:
                 result['send_email_notification'] = send_email  # 添加邮件通知标记
                 results.append(result)
 
+            if any(result['success'] for result in attempts):
+                return results, True  # 成功后跳过其他域名
+
+        if not results:
+            logging.warning(f"所有域名均在熔断中，跳过账号: {email}")
+            result = self.new_result(None, email)
+            result['message'] = '所有域名均不可用（熔断中）'
+            result['send_email_notification'] = send_email
+            results.append(result)
+            if session_id:
+                self.logger_db.log_account_result(
+                    session_id, email, 'domain_unavailable', result['message'], 0, None
+                )
+
+        return results, False
+
+    def hedge_delay(self, domain):
+        """主域名登录多久仍未成功时发起对冲尝试（秒），按该域名的历史登录耗时估计"""
+        expected = self.domain_health.expected_login_time(domain)
+        if expected is None:
+            return self.checkin_config['hedge_delay']
+        return max(self.checkin_config['hedge_min_delay'], expected)
+
+    def _hedged_checkin(self, domain, candidates, email, password, session_id, rate_limiter):
+        """
+        在域名上签到，登录超过预计耗时仍未成功时，在下一个候选域名上用独立的浏览器上下文同时签到
+
+        先成功的尝试胜出，另一个尝试在下一个检查点放弃；只有第一个到达点击步骤的尝试可以点击签到。
+        取得签到权的尝试失败时释放签到权；已经放弃的尝试在没有赢家时按顺序在原域名上重新签到。
+
+        Args:
+            domain: 首选域名
+            candidates: 剩余候选域名的迭代器（发起对冲时从中取下一个域名）
+            email: 邮箱
+            password: 密码
+            session_id: 签到会话ID
+            rate_limiter: 按域名限流器
+
+        Returns:
+            list: 各尝试的签到结果（不包含被放弃的尝试）
+        """
+        race = AttemptRace()
+        executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='checkin-hedge')
+        futures = [executor.submit(self._race_attempt, race, domain, email, password, session_id)]
+
+        delay = self.hedge_delay(domain)
+        if not race.progressed.wait(delay):
+            backup = next(candidates, None)
+            if backup:
+                rate_limiter.acquire(backup)
+                logging.info(f"{domain} 登录超过 {delay:.1f} 秒未完成，在 {backup} 上同时签到: {email}")
+                futures.append(executor.submit(self._race_attempt, race, backup, email, password, session_id))
+        executor.shutdown(wait=False)
+
+        # 等到收集到成功的结果（赢家的结果必须收集到）或所有尝试结束
+        results, abandoned, pending = collect_attempts(futures)
+
+        # 落后的尝试在后台放弃并关闭浏览器上下文，批量签到结束前统一等待
+        self.hedge_pending.extend(pending)
+
+        # 取得签到权的尝试最终失败时，被放弃的域名已从候选中取出，在这里按顺序重试
+        if not any(result['success'] for result in results):
+            for backup in [result['domain'] for result in abandoned]:
+                rate_limiter.acquire(backup)
+                logging.info(f"并行尝试均未成功，在 {backup} 上重新签到: {email}")
+                result = self.perform_checkin(backup, email, password, session_id)
+                results.append(result)
                 if result['success']:
-                    account_success = True
-                    success_count += 1
-                    break  # 成功后跳过其他域名
+                    break
+        return results
+
+    def _race_attempt(self, race, domain, email, password, session_id):
+        """在独立的服务实例（独立浏览器上下文）中执行一次并行签到尝试"""
+        service = CheckinService(headless=self.headless, use_pool=self.use_pool)
+        service.race = race
+        result = self.new_result(domain, email)
+        try:
+            result = service.perform_checkin(domain, email, password, session_id)
+        except Exception as e:
+            logging.error(f"并行签到尝试出错: {e}", exc_info=True)
+            result['message'] = f'签到异常: {str(e)}'
+        finally:
+            race.finish(domain, result['success'])
+            race.mark_progress()
+        return result
 
-            if not account_success:
-                failed_count += 1
+    def send_notifications(self, results):
+        """
+        发送签到结果邮件通知（个人邮件和全局邮件）
 
-            # 账号间等待，避免被限流
-            time.sleep(2)
+        Args:
+            results: 账号签到结果列表
 
-        # 发送邮件通知（区分个人邮件和全局邮件）
+        Returns:
+            bool: 是否有邮件发送成功
+        """
         email_sent = False
         logging.info("=== 开始检查邮件发送逻辑 ===")
         logging.info(f"总共有 {len(results)} 个账号签到结果")
@@ -346,12 +525,135 @@ class CheckinService(BrowserService):
 
         logging.info("=== 邮件发送逻辑结束 ===")
 
+        return email_sent
+
+    def split_checked_accounts(self, accounts):
+        """
+        按签到记录拆分账号：当前签到日已成功或已签到的账号无需再打开浏览器
+
+        Returns:
+            tuple: (需要签到的账号列表, 已完成签到的账号列表)
+        """
+        if not self.checkin_config['skip_checked']:
+            return accounts, []
+
+        try:
+            day_start = self.logger_db.checkin_day_start(self.checkin_config['day_reset_hour'])
+            checked = self.logger_db.get_daily_status(day_start)
+        except Exception as e:
+            logging.warning(f"查询今日签到记录失败，所有账号正常签到: {e}")
+            return accounts, []
+
+        pending, skipped = [], []
+        for account in accounts:
+            (skipped if account['mail'] in checked else pending).append(account)
+        return pending, skipped
+
+    def batch_checkin(self, domains=None, trigger_type='manual', trigger_by=None,
+                      max_workers=None, domain_interval=None, force=False):
+        """
+        批量签到所有账号
+
+        Args:
+            domains: 域名列表（可选，默认从配置读取）
+            trigger_type: 触发类型（manual/scheduled/api）
+            trigger_by: 触发者
+            max_workers: 并发浏览器数量（可选，默认从配置读取，1表示逐个签到）
+            domain_interval: 同一域名两次签到的最小间隔秒数（可选，默认从配置读取）
+            force: 是否强制签到（不跳过当前签到日已签到的账号）
+
+        Returns:
+            dict: 批量签到结果统计
+        """
+        # 未指定域名时使用配置的主域名和备用域名，每个账号签到前按域名健康状态重新排序
+
+        # 获取所有账号
+        accounts = self.config_manager.get_accounts()
+
+        if not accounts:
+            logging.warning("没有配置任何账号")
+            return {
+                'total': 0,
+                'success': 0,
+                'failed': 0,
+                'skipped': 0,
+                'results': []
+            }
+
+        # 先查询签到记录，当前签到日已完成签到的账号不再登录
+        all_count = len(accounts)
+        skipped = []
+        if not force:
+            accounts, skipped = self.split_checked_accounts(accounts)
+            if skipped:
+                logging.info(f"跳过今天已签到的 {len(skipped)} 个账号: {', '.join(a['mail'] for a in skipped)}")
+
+        # 获取并发配置
+        checkin_config = self.checkin_config
+        if max_workers is None:
+            max_workers = checkin_config['max_workers']
+        if domain_interval is None:
+            domain_interval = checkin_config['domain_interval']
+        max_workers = max(1, min(int(max_workers), len(accounts)))
+        rate_limiter = DomainRateLimiter(domain_interval)
+
+        # 创建签到会话
+        session_id = self.logger_db.log_checkin_start(trigger_type=trigger_type, trigger_by=trigger_by)
+        self.logger_db.log_skipped(session_id, len(skipped))
+
+        # 账号结果先缓冲，按批写入数据库；无论签到是否异常都会写入剩余结果
+        result_writer = self.logger_db.open_result_writer(session_id)
+        try:
+            if max_workers == 1:
+                # 逐个签到
+                account_outcomes = [
+                    self._checkin_account(account, domains, session_id, rate_limiter)
+                    for account in accounts
+                ]
+            else:
+                # 并发签到：每个工作线程持有独立的CheckinService（独立的浏览器上下文）
+                logging.info(f"并发签到模式: {max_workers} 个浏览器工作线程, 同域名间隔 {domain_interval} 秒")
+                worker_local = threading.local()
+                if self.use_pool:
+                    # 对冲签到时每个工作线程最多同时使用两个浏览器上下文
+                    self.get_pool().ensure_capacity(max_workers * (2 if self.checkin_config['hedge_enabled'] else 1))
+
+                def run_worker(account):
+                    worker = getattr(worker_local, 'service', None)
+                    if worker is None:
+                        worker = CheckinService(headless=self.headless, use_pool=self.use_pool)
+                        worker.hedge_pending = self.hedge_pending
+                        worker_local.service = worker
+                    return worker._checkin_account(account, domains, session_id, rate_limiter)
+
+                with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='checkin-worker') as executor:
+                    account_outcomes = list(executor.map(run_worker, accounts))
+        finally:
+            # 等待落后的对冲尝试结束，它们的结果仍会写入本次会话
+            wait(self.hedge_pending)
+            self.hedge_pending.clear()
+            result_writer.close()
+
+        results = []
+        success_count = 0
+        failed_count = 0
+        for account_results, account_success in account_outcomes:
+            results.extend(account_results)
+            if account_success:
+                success_count += 1
+            else:
+                failed_count += 1
+
+        # 发送邮件通知（区分个人邮件和全局邮件），所有账号都已跳过时不发送
+        email_sent = self.send_notifications(results) if results else False
+
         # 结束会话
         self.logger_db.log_checkin_end(session_id, email_sent=email_sent)
 
         return {
-            'total': len(accounts),
+            'total': all_count,
             'success': success_count,
             'failed': failed_count,
+            'skipped': len(skipped),
             'results': results
         }
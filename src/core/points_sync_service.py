@@ -4,8 +4,9 @@
 """
 import logging
 import time
-import json
+from datetime import datetime, timedelta
 from src.core.browser_service import BrowserService
+from src.infrastructure.api.api_client import ApiAuthError, ApiClientError
 from src.data.repositories.points_repository import PointsHistoryManager
 from src.data.repositories.config_repository import ConfigManager
 
@@ -27,15 +28,67 @@ class PointsSyncService(BrowserService):
         self.points_manager = PointsHistoryManager()
         self.config_manager = ConfigManager()
 
-    def fetch_account_history(self, domain, email, password, max_pages=None):
+    def get_sync_watermark(self, email):
+        """
+        获取账号已同步的最大记录ID（高水位），优先按UID查询
+
+        Args:
+            email: 邮箱
+
+        Returns:
+            int: 最大记录ID，没有记录时为0
+        """
+        uid = self.points_manager.get_uid_by_email(email)
+        if uid:
+            return self.points_manager.get_latest_record_id(uid=uid)
+        return self.points_manager.get_latest_record_id(email=email)
+
+    def is_full_sync_due(self):
+        """根据配置的全量对账间隔判断本次是否需要全量同步（上次增量同步中途停止时立即需要）"""
+        if self.config_manager.get_system_config('points_full_sync_pending', False):
+            return True
+
+        interval_days = self.config_manager.get_system_config('points_full_sync_interval_days', 7)
+        if not interval_days or interval_days <= 0:
+            return False
+
+        last_full_sync = self.config_manager.get_system_config('points_last_full_sync')
+        if not last_full_sync:
+            return True
+
+        try:
+            elapsed = datetime.now() - datetime.fromisoformat(last_full_sync)
+        except ValueError:
+            return True
+        return elapsed >= timedelta(days=interval_days)
+
+    def request_full_sync(self):
+        """要求下次同步执行全量对账（部分记录已入库但没有翻到上次同步位置时调用）"""
+        self.config_manager.update_system_config(
+            'points_full_sync_pending', True, '增量同步中途停止，下次需要全量同步'
+        )
+
+    def mark_full_sync_done(self):
+        """记录全量对账完成时间"""
+        self.config_manager.update_system_config(
+            'points_last_full_sync', datetime.now().isoformat(), '上次积分历史全量同步时间'
+        )
+        self.config_manager.update_system_config(
+            'points_full_sync_pending', False, '增量同步中途停止，下次需要全量同步'
+        )
+
+    def fetch_account_history(self, domain, email, password, max_pages=None, full_sync=False):
         """
         获取单个账号的积分历史
 
+        默认增量同步：读取本地已存储的最大记录ID，翻页遇到已存储的记录即停止。
+
         Args:
             domain: 域名
             email: 邮箱
             password: 密码
             max_pages: 最大页数（None表示获取全部）
+            full_sync: 是否全量同步（忽略高水位，翻完所有页用于对账）
 
         Returns:
             dict: 同步结果
@@ -44,131 +97,248 @@ class PointsSyncService(BrowserService):
                     'email': str,
                     'total_records': int,
                     'new_records': int,
+                    'pages': int,
+                    'mode': str,  # incremental/full
+                    'backend': str,  # api/browser
                     'message': str
                 }
         """
+        result, watermark = self._start_history_result(email, full_sync)
+
+        # 优先使用缓存的登录会话直接调用API，无需启动浏览器
+        if self._sync_history_via_api(domain, email, watermark, max_pages, result):
+            return result
+
+        try:
+            with self.get_browser() as driver:
+                # 登录账号
+                if not self.login_account(domain, email, password):
+                    result['message'] = '登录失败'
+                    return result
+
+                return self._sync_history_on_page(driver, domain, email, watermark, max_pages, result)
+
+        except Exception as e:
+            logging.error(f"获取积分历史失败: {e}", exc_info=True)
+            result['message'] = f'同步异常: {str(e)}'
+            return result
+
+    def _start_history_result(self, email, full_sync=False):
+        """
+        创建同步结果并读取高水位
+
+        Returns:
+            tuple: (同步结果字典, 高水位记录ID)
+        """
         result = {
             'success': False,
             'email': email,
             'total_records': 0,
             'new_records': 0,
+            'pages': 0,
+            'mode': 'full' if full_sync else 'incremental',
+            'backend': None,
+            # 是否翻到了上次同步位置或最后一页（中途停止时为False）
+            'complete': False,
             'message': ''
         }
 
+        watermark = 0 if full_sync else self.get_sync_watermark(email)
+        if watermark:
+            logging.info(f"增量同步: {email} 已存储的最大记录ID为 {watermark}")
+        return result, watermark
+
+    def _sync_history_via_api(self, domain, email, watermark, max_pages, result):
+        """
+        通过HTTP API同步积分历史
+
+        Returns:
+            bool: 是否已通过API完成同步（API不可用时返回False，由调用方使用浏览器）
+        """
+        client = self.get_api_client(domain, email)
+        if not client:
+            return False
+
         try:
-            with self.get_browser() as driver:
-                # 登录账号
-                if not self.login_account(domain, email, password):
-                    result['message'] = '登录失败'
-                    return result
+            records = self._iter_history_records(client.get_history_page, watermark, max_pages, result)
+            new_count = self.points_manager.batch_add_records(records, email)
+            result['backend'] = 'api'
+            self._finish_history_result(result, email, watermark, new_count)
+            return True
+        except ApiClientError as e:
+            logging.info(f"API同步不可用，回退到浏览器: {e}")
+            if isinstance(e, ApiAuthError):
+                self.session_cache.invalidate(domain, email)
+            result['total_records'] = 0
+            result['pages'] = 0
+            return False
+        finally:
+            client.close()
+
+    def _sync_history_on_page(self, driver, domain, email, watermark, max_pages, result):
+        """
+        在已登录的浏览器中翻页读取积分历史并入库
 
-                # 导航到积分历史页面
-                history_url = f'https://{domain}/#/account/tokens'
-                logging.info(f"访问积分历史页面: {history_url}")
-                driver.get(history_url)
-                time.sleep(5)
-
-                # 开始监听API
-                driver.listen.start('api/balance/list', method='POST')
-
-                all_records = []
-                page = 1
-
-                while True:
-                    if max_pages and page > max_pages:
-                        logging.info(f"已达到最大页数限制: {max_pages}")
-                        break
-
-                    logging.info(f"获取第 {page} 页积分历史...")
-
-                    # 触发页面加载（滚动或点击）
-                    try:
-                        # 执行JavaScript来加载更多数据
-                        driver.run_js('window.scrollTo(0, document.body.scrollHeight);')
-                        time.sleep(2)
-                    except:
-                        pass
-
-                    # 等待API响应
-                    try:
-                        resp = driver.listen.wait(timeout=10)
-
-                        if resp and resp.response.status == 200:
-                            body = resp.response.body
-
-                            if isinstance(body, str):
-                                body = json.loads(body)
-
-                            if body.get('code') == 0:
-                                data = body.get('data', {})
-                                records = data.get('records', [])
-
-                                if not records:
-                                    logging.info("没有更多记录")
-                                    break
-
-                                all_records.extend(records)
-                                logging.info(f"第 {page} 页获取到 {len(records)} 条记录")
-
-                                # 检查是否还有更多页
-                                has_more = data.get('hasMore', False)
-                                if not has_more:
-                                    logging.info("已获取所有记录")
-                                    break
-
-                                page += 1
-                                time.sleep(1)  # 避免请求过快
-                            else:
-                                logging.warning(f"API返回错误: {body.get('message', 'Unknown')}")
-                                break
-                        else:
-                            logging.warning(f"API响应异常: status={resp.response.status if resp else 'None'}")
-                            break
-
-                    except Exception as e:
-                        logging.error(f"监听API失败: {e}")
-                        break
-
-                # 停止监听
+        Returns:
+            dict: 同步结果
+        """
+        # 先开始监听API，再导航到积分历史页面，确保第一页数据不会漏掉
+        driver.listen.start('api/balance/list', method='POST')
+
+        history_url = f'https://{domain}/#/account/tokens'
+        logging.info(f"访问积分历史页面: {history_url}")
+        driver.get(history_url)
+
+        def fetch_page(page):
+            # 第一页由页面加载触发，后续页通过滚动触发加载
+            if page > 1:
                 try:
-                    driver.listen.stop()
+                    driver.run_js('window.scrollTo(0, document.body.scrollHeight);')
                 except:
                     pass
 
-                # 保存记录到数据库
-                if all_records:
-                    logging.info(f"开始保存 {len(all_records)} 条记录到数据库...")
-                    new_count = self.points_manager.batch_add_records(all_records, email)
+            # 等待API响应（收到即返回）
+            try:
+                return self.waiter.json_response(timeout=10)
+            except Exception as e:
+                logging.error(f"监听API失败: {e}")
+                return None
 
-                    result['success'] = True
-                    result['total_records'] = len(all_records)
-                    result['new_records'] = new_count
-                    result['message'] = f'成功同步 {new_count} 条新记录'
+        try:
+            # 边翻页边分批入库，不在内存中保留完整的记录列表
+            records = self._iter_history_records(fetch_page, watermark, max_pages, result)
+            new_count = self.points_manager.batch_add_records(records, email)
+        finally:
+            # 停止监听
+            try:
+                driver.listen.stop()
+            except:
+                pass
+
+        result['backend'] = 'browser'
+        return self._finish_history_result(result, email, watermark, new_count)
+
+    def _finish_history_result(self, result, email, watermark, new_count):
+        """
+        汇总单个账号的同步结果
 
-                    logging.info(f"✅ 账号 {email}: 总共 {len(all_records)} 条，新增 {new_count} 条")
-                else:
-                    result['success'] = True
-                    result['message'] = '没有找到积分记录'
-                    logging.warning(f"账号 {email} 没有积分历史记录")
+        只有翻到上次同步位置或最后一页才算完整同步；超时或API出错中途停止记为失败，
+        达到max_pages限制记为部分同步。
+        """
+        total_count = result['total_records']
+        if not result['complete']:
+            # 已入库的新记录抬高了高水位，之前未翻到的记录只能通过全量同步补齐
+            if total_count:
+                self.request_full_sync()
+            result['new_records'] = new_count
+            result['success'] = bool(result.get('limited'))
+            result['message'] = f"同步未完成（{result['stop_reason']}），已保存 {new_count} 条新记录"
+            logging.warning(f"账号 {email} 积分历史{result['message']}")
+            return result
 
-                return result
+        if total_count:
+            result['success'] = True
+            result['new_records'] = new_count
+            result['message'] = f'成功同步 {new_count} 条新记录'
 
-        except Exception as e:
-            logging.error(f"获取积分历史失败: {e}", exc_info=True)
-            result['message'] = f'同步异常: {str(e)}'
-            return result
+            logging.info(f"✅ 账号 {email}: 总共 {total_count} 条，新增 {new_count} 条")
+        elif watermark:
+            result['success'] = True
+            result['message'] = '没有新的积分记录'
+            logging.info(f"账号 {email} 没有新的积分记录")
+        else:
+            result['success'] = True
+            result['message'] = '没有找到积分记录'
+            logging.warning(f"账号 {email} 没有积分历史记录")
+
+        return result
 
-    def sync_all_accounts(self, domain=None, max_pages=None):
+    def _iter_history_records(self, fetch_page, watermark, max_pages, result):
+        """
+        逐页读取积分历史并逐条产出记录
+
+        Args:
+            fetch_page: 获取指定页的函数，返回api/balance/list的响应体（失败返回None）
+            watermark: 已存储的最大记录ID，0表示全量
+            max_pages: 最大页数（None表示获取全部）
+            result: 同步结果字典，会更新其中的pages和total_records
+
+        Yields:
+            dict: 积分记录
+        """
+        page = 1
+
+        while True:
+            if max_pages and page > max_pages:
+                logging.info(f"已达到最大页数限制: {max_pages}")
+                result['stop_reason'] = f'已达到最大页数限制 {max_pages}'
+                result['limited'] = True
+                break
+
+            logging.info(f"获取第 {page} 页积分历史...")
+            body = fetch_page(page)
+
+            if body is None:
+                logging.warning("等待积分历史API响应超时或响应异常")
+                result['stop_reason'] = f'第 {page} 页响应超时或异常'
+                break
+
+            if body.get('code') != 0:
+                logging.warning(f"API返回错误: {body.get('message', 'Unknown')}")
+                result['stop_reason'] = f"第 {page} 页返回错误: {body.get('message', 'Unknown')}"
+                break
+
+            data = body.get('data', {})
+            records = data.get('records', [])
+
+            if not records:
+                logging.info("没有更多记录")
+                result['complete'] = True
+                break
+
+            result['pages'] = page
+
+            # 增量模式：只保留高水位之后的新记录，遇到已存储的记录即停止翻页
+            if watermark:
+                unseen = [r for r in records if r.get('id', 0) > watermark]
+                logging.info(f"第 {page} 页获取到 {len(records)} 条记录，其中新记录 {len(unseen)} 条")
+                result['total_records'] += len(unseen)
+                yield from unseen
+
+                if len(unseen) < len(records):
+                    logging.info("已到达上次同步位置，停止翻页")
+                    result['complete'] = True
+                    break
+            else:
+                logging.info(f"第 {page} 页获取到 {len(records)} 条记录")
+                result['total_records'] += len(records)
+                yield from records
+
+            # 检查是否还有更多页
+            if not data.get('hasMore', False):
+                logging.info("已获取所有记录")
+                result['complete'] = True
+                break
+
+            page += 1
+
+    def sync_all_accounts(self, domain=None, max_pages=None, full_sync=None):
         """
         同步所有账号的积分历史
 
         Args:
             domain: 域名（可选，默认从配置读取）
             max_pages: 每个账号的最大页数（None表示获取全部）
+            full_sync: 是否全量对账（None表示按points_full_sync_interval_days配置周期性执行）
 
         Returns:
             dict: 批量同步结果统计
         """
+        if full_sync is None:
+            full_sync = self.is_full_sync_due()
+        if full_sync:
+            logging.info("本次执行全量同步（对账）")
+
         # 获取域名配置
         if not domain:
             domain_config = self.config_manager.get_domain_config()
@@ -203,7 +373,7 @@ class PointsSyncService(BrowserService):
             logging.info(f"同步账号: {email}")
             logging.info(f"{'='*60}")
 
-            result = self.fetch_account_history(domain, email, password, max_pages)
+            result = self.fetch_account_history(domain, email, password, max_pages, full_sync=full_sync)
             results.append(result)
 
             if result['success']:
@@ -213,8 +383,13 @@ class PointsSyncService(BrowserService):
             else:
                 failed_count += 1
 
-            # 账号间等待
-            time.sleep(2)
+            # 账号间等待（API同步不启动浏览器，无需等待）
+            if result.get('backend') != 'api':
+                time.sleep(2)
+
+        # 记录全量对账时间（仅在全部账号成功且未限制页数时）
+        if full_sync and failed_count == 0 and not max_pages:
+            self.mark_full_sync_done()
 
         logging.info(f"\n{'='*60}")
         logging.info(f"同步完成统计:")
@@ -231,5 +406,6 @@ class PointsSyncService(BrowserService):
             'failed': failed_count,
             'total_records': total_records,
             'new_records': new_records,
+            'mode': 'full' if full_sync else 'incremental',
             'results': results
         }
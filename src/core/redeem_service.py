@@ -5,14 +5,61 @@
 import logging
 import time
 from src.core.browser_service import BrowserService
+from src.data.repositories.config_repository import ConfigManager
+from src.data.repositories.redeem_repository import RedeemCodeCache
 
 
 class RedeemService(BrowserService):
     """
     兑换码服务类
     继承BrowserService，实现兑换码兑换逻辑
+
+    每个账号只登录一次，在同一个兑换页面上依次提交所有兑换码，
+    兑换结果优先从兑换接口的响应判断。兑换接口明确返回无效或已被使用的
+    兑换码写入共享缓存（有过期时间），其他账号不再提交；页面提示只用于
+    展示结果，不写入缓存。
     """
 
+    # 兑换码输入框候选选择器
+    CODE_INPUT_SELECTORS = [
+        '@placeholder=请输入兑换码',
+        '@placeholder:兑换'
+    ]
+
+    # 兑换结果提示候选选择器（只匹配兑换相关的提示，避免把其他提示当作兑换结果）
+    SUCCESS_MESSAGE_SELECTORS = [
+        'xpath://div[contains(., "兑换成功")]'
+    ]
+    ERROR_MESSAGE_SELECTORS = [
+        'xpath://div[contains(., "兑换码") and (contains(., "无效") or contains(., "不存在")'
+        ' or contains(., "已被使用") or contains(., "已领完") or contains(., "已过期"))]',
+        'xpath://div[contains(., "已兑换过") or contains(., "您已使用过")]'
+    ]
+
+    # 兑换按钮候选选择器
+    REDEEM_BUTTON_SELECTORS = [
+        'xpath://button[contains(., "兑换")]',
+        '@type=submit'
+    ]
+
+    # 等待兑换接口响应的最长时间（秒）
+    RESPONSE_TIMEOUT = 10
+
+    # 两个兑换码之间的最小间隔（秒），避免被限流
+    CODE_INTERVAL = 1
+
+    # 上一个兑换码的提示最长等待消失时间（秒）
+    MESSAGE_CLEAR_TIMEOUT = 5
+
+    # 提示文字 -> 兑换状态（按顺序匹配，账号级提示需排在全局提示之前）
+    # 只匹配明确描述兑换码本身的短语，服务器错误、验证码错误等提示判断为failed
+    MESSAGE_STATUSES = [
+        (('您已使用过', '您已兑换', '已兑换过', '已经兑换过', 'already redeemed'), 'redeemed'),
+        (('兑换码已被使用', '已被使用', '已被兑换', '已领完', '已被领完', '兑换码已过期', '兑换码已失效',
+          'code has been used', 'code has expired'), 'exhausted'),
+        (('兑换码无效', '无效的兑换码', '兑换码不存在', '兑换码错误', 'invalid code', 'code not found'), 'invalid'),
+    ]
+
     def __init__(self, headless=False):
         """
         初始化兑换码服务
@@ -21,6 +68,72 @@ class RedeemService(BrowserService):
             headless: 是否使用无头模式
         """
         super().__init__(headless=headless)
+        self.code_cache = RedeemCodeCache(ttl=ConfigManager().get_system_config('redeem_cache_ttl', 604800))
+
+    @staticmethod
+    def new_result(email, code):
+        """创建单个兑换码的兑换结果"""
+        return {
+            'success': False,
+            'email': email,
+            'code': code,
+            'status': None,
+            'message': '',
+            'reward': ''
+        }
+
+    @classmethod
+    def classify_message(cls, message):
+        """根据网站提示判断兑换状态（无法判断时返回failed）"""
+        text = (message or '').lower()
+        for keywords, status in cls.MESSAGE_STATUSES:
+            if any(keyword.lower() in text for keyword in keywords):
+                return status
+        return 'failed'
+
+    @classmethod
+    def classify_response(cls, body):
+        """
+        根据兑换接口的响应体判断兑换结果
+
+        Returns:
+            tuple: (状态 success/redeemed/exhausted/invalid/failed, 提示文字)
+        """
+        message = str(body.get('message') or body.get('msg') or '')
+        if body.get('code') == 0:
+            return 'success', message or '兑换成功'
+        return cls.classify_message(message), message or '兑换失败'
+
+    def skip_cached(self, email, codes, results):
+        """
+        跳过已有确定结果的兑换码
+
+        Args:
+            email: 邮箱
+            codes: 兑换码列表
+            results: {兑换码: 兑换结果}，被跳过的兑换码会写入其中
+
+        Returns:
+            list: 仍需提交的兑换码（去重后保持顺序）
+        """
+        codes = list(dict.fromkeys(codes))
+        cached = self.code_cache.lookup(codes, email)
+
+        pending = []
+        for code in codes:
+            entry = cached.get(code)
+            if not entry:
+                pending.append(code)
+                continue
+
+            result = self.new_result(email, code)
+            result['status'] = entry['status']
+            result['message'] = f"已跳过: {entry['message'] or entry['status']}"
+            result['skipped'] = True
+            results[code] = result
+            logging.info(f"兑换码 {code} 已缓存为 {entry['status']}，跳过: {email}")
+
+        return pending
 
     def redeem_code(self, domain, email, password, code):
         """
@@ -38,136 +151,145 @@ class RedeemService(BrowserService):
                     'success': bool,
                     'email': str,
                     'code': str,
+                    'status': str,  # success/redeemed/exhausted/invalid/failed
                     'message': str,
                     'reward': str  # 兑换获得的奖励描述
                 }
         """
-        result = {
-            'success': False,
-            'email': email,
-            'code': code,
-            'message': '',
-            'reward': ''
-        }
+        return self.batch_redeem(domain, email, password, [code])['results'][0]
+
+    def _redeem_codes_on_page(self, driver, domain, email, codes, results=None):
+        """
+        在已登录的浏览器中打开一次兑换页面，依次提交所有兑换码
 
-        try:
-            with self.get_browser() as driver:
-                # 登录账号
-                if not self.login_account(domain, email, password):
-                    result['message'] = '登录失败'
-                    return result
-
-                # 导航到兑换页面
-                redeem_url = f'https://{domain}/#/redeem'
-                logging.info(f"访问兑换页面: {redeem_url}")
-                driver.get(redeem_url)
-                time.sleep(5)
-
-                # 查找兑换码输入框
-                code_input = None
-                try:
-                    # 尝试多种选择器
-                    code_input = driver.ele('@placeholder=请输入兑换码', timeout=5)
-                    if not code_input:
-                        code_input = driver.ele('@placeholder*=兑换', timeout=5)
-                    if not code_input:
-                        code_input = driver.ele('tag:input', timeout=5)
-                except:
-                    pass
-
-                if not code_input:
-                    logging.error("未找到兑换码输入框")
-                    result['message'] = '未找到兑换码输入框'
-                    return result
-
-                # 输入兑换码
-                logging.info(f"输入兑换码: {code}")
-                code_input.input(code)
-                time.sleep(1)
-
-                # 查找兑换按钮
-                redeem_button = None
-                try:
-                    redeem_button = driver.ele('xpath://button[contains(., "兑换")]', timeout=5)
-                    if not redeem_button:
-                        # 尝试查找submit按钮
-                        redeem_button = driver.ele('@type=submit', timeout=5)
-                except:
-                    pass
-
-                if not redeem_button:
-                    logging.error("未找到兑换按钮")
-                    result['message'] = '未找到兑换按钮'
-                    return result
-
-                # 点击兑换按钮
-                logging.info("点击兑换按钮")
-                redeem_button.click()
-                time.sleep(3)
-
-                # 检查兑换结果
-                # 方法1: 查找成功提示
-                success_messages = [
-                    'xpath://div[contains(., "兑换成功")]',
-                    'xpath://div[contains(., "成功")]',
-                    'xpath://div[contains(@class, "success")]'
-                ]
-
-                is_success = False
-                reward_text = ''
-
-                for selector in success_messages:
-                    try:
-                        success_ele = driver.ele(selector, timeout=2)
-                        if success_ele:
-                            is_success = True
-                            reward_text = success_ele.text
-                            break
-                    except:
-                        continue
-
-                # 方法2: 查找错误提示
-                if not is_success:
-                    error_messages = [
-                        'xpath://div[contains(., "已使用")]',
-                        'xpath://div[contains(., "无效")]',
-                        'xpath://div[contains(., "错误")]',
-                        'xpath://div[contains(@class, "error")]'
-                    ]
-
-                    for selector in error_messages:
-                        try:
-                            error_ele = driver.ele(selector, timeout=2)
-                            if error_ele:
-                                result['message'] = error_ele.text
-                                logging.warning(f"兑换失败: {error_ele.text}")
-                                return result
-                        except:
-                            continue
-
-                # 如果找到成功消息
-                if is_success:
-                    result['success'] = True
-                    result['message'] = '兑换成功'
-                    result['reward'] = reward_text
-                    logging.info(f"✅ 兑换成功: {email} - {code}")
-                    logging.info(f"   奖励: {reward_text}")
-                else:
-                    # 未找到明确的成功或失败消息，可能需要等待
-                    time.sleep(2)
-                    result['message'] = '兑换结果未知（未找到明确提示）'
-                    logging.warning(f"兑换结果未知: {email} - {code}")
-
-                return result
-
-        except Exception as e:
-            logging.error(f"兑换过程出错: {e}", exc_info=True)
-            result['message'] = f'兑换异常: {str(e)}'
+        Args:
+            driver: 已登录的浏览器实例
+            domain: 域名
+            email: 邮箱
+            codes: 兑换码列表
+            results: 可选的{兑换码: 兑换结果}，用于更新已有的结果字典
+
+        Returns:
+            list: 与codes顺序一致的兑换结果
+        """
+        results = results if results is not None else {}
+
+        # 导航到兑换页面
+        redeem_url = f'https://{domain}/#/redeem'
+        logging.info(f"访问兑换页面: {redeem_url}")
+        driver.get(redeem_url)
+        # 等待页面渲染，任一选择器命中即返回
+        self.waiter.element(self.CODE_INPUT_SELECTORS, timeout=15)
+
+        for index, code in enumerate(codes):
+            if index:
+                time.sleep(self.CODE_INTERVAL)
+                # 等待上一个兑换码的提示消失，避免旧提示被当作本次结果
+                self.waiter.until(
+                    lambda: not self.waiter.probe(self.SUCCESS_MESSAGE_SELECTORS + self.ERROR_MESSAGE_SELECTORS),
+                    timeout=self.MESSAGE_CLEAR_TIMEOUT
+                )
+
+            result = results.setdefault(code, self.new_result(email, code))
+            try:
+                self._submit_code(driver, email, code, result)
+            except Exception as e:
+                logging.error(f"兑换过程出错: {e}", exc_info=True)
+                result['status'] = 'failed'
+                result['message'] = f'兑换异常: {str(e)}'
+
+        return [results[code] for code in codes]
+
+    def _submit_code(self, driver, email, code, result):
+        """在当前兑换页面提交一个兑换码并判断结果"""
+        _, code_input = self.find_element('redeem.input', self.CODE_INPUT_SELECTORS, timeout=5)
+        if not code_input:
+            # 兜底取页面上的第一个输入框（不参与排序，避免通用选择器排到前面）
+            code_input = self.waiter.element('tag:input', timeout=0)
+
+        if not code_input:
+            logging.error("未找到兑换码输入框")
+            result['status'] = 'failed'
+            result['message'] = '未找到兑换码输入框'
+            return result
+
+        # 输入兑换码
+        logging.info(f"输入兑换码: {code}")
+        code_input.clear()
+        code_input.input(code)
+
+        # 查找兑换按钮（或submit按钮）
+        _, redeem_button = self.find_element('redeem.button', self.REDEEM_BUTTON_SELECTORS, timeout=5)
+        if not redeem_button:
+            logging.error("未找到兑换按钮")
+            result['status'] = 'failed'
+            result['message'] = '未找到兑换按钮'
             return result
 
+        # 点击兑换按钮，从兑换接口的响应判断结果
+        logging.info("点击兑换按钮")
+        marker = self.network_capture.marker() if self.network_capture else None
+        redeem_button.click()
+
+        status, message = self._wait_redeem_response(marker)
+        # 只有兑换接口返回的结果写入缓存，页面提示可能来自其他操作
+        from_api = status is not None
+        if not from_api:
+            status, message = self._read_redeem_message(driver)
+
+        result['status'] = status
+        result['message'] = message
+        if status == 'success':
+            result['success'] = True
+            result['reward'] = message
+            logging.info(f"✅ 兑换成功: {email} - {code}")
+        elif status == 'unknown':
+            logging.warning(f"兑换结果未知: {email} - {code}")
+        else:
+            logging.warning(f"兑换失败: {email} - {code}: {message}")
+
+        # 兑换接口返回的确定结果写入共享缓存（成功或已兑换只对本账号生效）
+        if from_api:
+            cache_status = 'redeemed' if status == 'success' else status
+            self.code_cache.record(code, cache_status, message, email)
+        return result
+
+    def _wait_redeem_response(self, marker):
+        """
+        等待兑换接口的响应，出现Cloudflare验证时先完成验证
+
+        Returns:
+            tuple: (状态, 提示文字)，没有捕获到响应时返回(None, None)
+        """
+        if marker is None:
+            return None, None
+
+        body = self.network_capture.wait_for('redeem', after=marker, timeout=self.RESPONSE_TIMEOUT)
+        if body is None and self.bypasser and self.bypasser.locate_turnstile():
+            logging.info("兑换时检测到Cloudflare验证，尝试绕过...")
+            if self.bypass_cloudflare():
+                body = self.network_capture.wait_for('redeem', after=marker, timeout=self.RESPONSE_TIMEOUT)
+
+        if body is None:
+            return None, None
+        return self.classify_response(body)
+
+    def _read_redeem_message(self, driver):
+        """没有捕获到接口响应时，从页面提示判断兑换结果"""
+        # 成功和错误提示在一次页面脚本中检查，按顺序取第一个命中的提示
+        selector, message_ele = self.waiter.match(
+            self.SUCCESS_MESSAGE_SELECTORS + self.ERROR_MESSAGE_SELECTORS, timeout=self.RESPONSE_TIMEOUT
+        )
+        if not message_ele:
+            return 'unknown', '兑换结果未知（未找到明确提示）'
+
+        if selector in self.SUCCESS_MESSAGE_SELECTORS:
+            return 'success', message_ele.text
+        return self.classify_message(message_ele.text), message_ele.text
+
     def batch_redeem(self, domain, email, password, codes):
         """
-        批量兑换多个兑换码
+        批量兑换多个兑换码（只登录一次，在同一页面依次提交）
 
         Args:
             domain: 域名
@@ -183,39 +305,47 @@ class RedeemService(BrowserService):
                 'total': 0,
                 'success': 0,
                 'failed': 0,
+                'skipped': 0,
                 'results': []
             }
 
-        results = []
-        success_count = 0
-        failed_count = 0
-
-        for code in codes:
-            logging.info(f"\n{'='*60}")
-            logging.info(f"兑换码: {code}")
-            logging.info(f"{'='*60}")
-
-            result = self.redeem_code(domain, email, password, code)
-            results.append(result)
-
-            if result['success']:
-                success_count += 1
-            else:
-                failed_count += 1
-
-            # 兑换码之间等待，避免被限流
-            time.sleep(2)
+        codes = list(dict.fromkeys(codes))
+        results = {}
+        pending = self.skip_cached(email, codes, results)
+
+        if pending:
+            try:
+                with self.get_browser() as driver:
+                    # 登录账号
+                    if self.login_account(domain, email, password):
+                        self._redeem_codes_on_page(driver, domain, email, pending, results)
+                    else:
+                        for code in pending:
+                            results[code] = {**self.new_result(email, code), 'status': 'failed', 'message': '登录失败'}
+            except Exception as e:
+                logging.error(f"兑换过程出错: {e}", exc_info=True)
+                for code in pending:
+                    if code not in results or results[code]['status'] is None:
+                        results[code] = {
+                            **self.new_result(email, code), 'status': 'failed', 'message': f'兑换异常: {str(e)}'
+                        }
+
+        ordered = [results[code] for code in codes]
+        success_count = sum(1 for r in ordered if r['success'])
+        skipped_count = sum(1 for r in ordered if r.get('skipped'))
+        failed_count = len(ordered) - success_count
 
         logging.info(f"\n{'='*60}")
-        logging.info(f"兑换完成统计:")
+        logging.info(f"兑换完成统计: {email}")
         logging.info(f"  总数: {len(codes)}")
         logging.info(f"  成功: {success_count}")
-        logging.info(f"  失败: {failed_count}")
+        logging.info(f"  失败: {failed_count}（其中缓存跳过 {skipped_count}）")
         logging.info(f"{'='*60}")
 
         return {
             'total': len(codes),
             'success': success_count,
             'failed': failed_count,
-            'results': results
+            'skipped': skipped_count,
+            'results': ordered
         }
@@ -1,15 +1,36 @@
+import atexit
+import queue
 import sqlite3
+import threading
 from contextlib import contextmanager
 from pathlib import Path
 import logging
 from typing import Optional, Any, List, Tuple
 
 
+# 每个连接创建时执行一次的PRAGMA设置
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',          # 读写并发：读不阻塞写，写不阻塞读
+    'PRAGMA synchronous=NORMAL',        # WAL模式下安全且大幅减少fsync
+    'PRAGMA busy_timeout=10000',        # 遇到锁时最多等待10秒，而不是立即报database is locked
+    'PRAGMA cache_size=-16000',         # 页缓存约16MB
+    'PRAGMA mmap_size=134217728',       # 128MB内存映射读
+    'PRAGMA temp_store=MEMORY',
+)
+
+
 class UnifiedDatabaseManager:
-    """统一的数据库管理器 - 所有表都在一个数据库中"""
+    """统一的数据库管理器 - 所有表都在一个数据库中
+
+    连接通过连接池复用：同一线程内嵌套的get_connection()共享同一个连接和事务，
+    最外层退出时提交并把连接归还连接池，供其他线程（Flask请求线程、定时任务线程、签到工作线程）复用。
+    """
 
     _instance = None
 
+    # 连接池中最多保留的空闲连接数
+    MAX_IDLE_CONNECTIONS = 8
+
     def __new__(cls, db_file='accounts_data/gptgod_checkin.db'):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
@@ -20,14 +41,53 @@ class UnifiedDatabaseManager:
         if not self.initialized:
             self.db_file = Path(db_file)
             self.db_file.parent.mkdir(exist_ok=True, parents=True)
+            self._local = threading.local()
+            self._pool = queue.LifoQueue()
             self._init_all_tables()
             self.initialized = True
+            atexit.register(self.close_all)
+
+    def _create_connection(self):
+        """创建新连接并应用PRAGMA设置"""
+        # 连接会在线程间复用（同一时刻只被一个线程持有），因此关闭同线程检查
+        conn = sqlite3.connect(self.db_file, timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # 允许通过列名访问结果
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _acquire_connection(self):
+        """从连接池取出连接，没有空闲连接时新建"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._create_connection()
+
+    def _release_connection(self, conn):
+        """归还连接到连接池，空闲连接过多时直接关闭"""
+        if self._pool.qsize() < self.MAX_IDLE_CONNECTIONS:
+            self._pool.put(conn)
+        else:
+            conn.close()
 
     @contextmanager
     def get_connection(self):
-        """获取数据库连接的上下文管理器"""
-        conn = sqlite3.connect(self.db_file)
-        conn.row_factory = sqlite3.Row  # 允许通过列名访问结果
+        """获取数据库连接的上下文管理器
+
+        同一线程内嵌套调用时复用外层连接，只在最外层提交或回滚。
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire_connection()
+        self._local.conn = conn
+        self._local.depth = 1
         try:
             yield conn
             conn.commit()
@@ -36,7 +96,21 @@ class UnifiedDatabaseManager:
             logging.error(f"数据库操作失败: {e}")
             raise
         finally:
-            conn.close()
+            self._local.conn = None
+            self._local.depth = 0
+            self._release_connection(conn)
+
+    def close_all(self):
+        """关闭连接池中的所有空闲连接"""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                conn.close()
+            except Exception as e:
+                logging.debug(f"关闭数据库连接失败: {e}")
 
     def execute(self, query: str, params: Tuple = ()) -> Optional[Any]:
         """执行单个查询"""
@@ -78,6 +152,7 @@ class UnifiedDatabaseManager:
                     success_count INTEGER DEFAULT 0,
                     failed_count INTEGER DEFAULT 0,
                     already_checked_count INTEGER DEFAULT 0,
+                    skipped_count INTEGER DEFAULT 0,
                     duration_seconds REAL,
                     status TEXT NOT NULL DEFAULT 'running',
                     email_sent BOOLEAN DEFAULT 0,
@@ -116,6 +191,11 @@ class UnifiedDatabaseManager:
                 )
             ''')
 
+            # 旧数据库补充跳过账号数列
+            session_columns = {row[1] for row in cursor.execute('PRAGMA table_info(checkin_sessions)')}
+            if 'skipped_count' not in session_columns:
+                cursor.execute('ALTER TABLE checkin_sessions ADD COLUMN skipped_count INTEGER DEFAULT 0')
+
             # 创建签到相关索引
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_session_start_time ON checkin_sessions(start_time)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_account_logs_email ON account_checkin_logs(account_email)')
@@ -225,12 +305,97 @@ class UnifiedDatabaseManager:
                 )
             ''')
 
-            # 创建积分相关索引
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_points_uid ON points_history (uid)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_points_email ON points_history (email)')
+            # 创建积分汇总表（按账号，导入时增量维护，可随时从points_history重建）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS points_rollup (
+                    uid INTEGER PRIMARY KEY,
+                    total_count INTEGER NOT NULL DEFAULT 0,
+                    total_earned INTEGER NOT NULL DEFAULT 0,
+                    total_spent INTEGER NOT NULL DEFAULT 0,
+                    net_points INTEGER NOT NULL DEFAULT 0,
+                    first_record TEXT,
+                    last_record TEXT,
+                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+
+            # 创建积分来源汇总表（按账号+来源）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS points_source_rollup (
+                    uid INTEGER NOT NULL,
+                    source TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    earned INTEGER NOT NULL DEFAULT 0,
+                    spent INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (uid, source)
+                )
+            ''')
+
+            # 创建每日积分汇总表（按账号+日期，维护方式同积分汇总表）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS points_daily (
+                    uid INTEGER NOT NULL,
+                    day TEXT NOT NULL,
+                    earned INTEGER NOT NULL DEFAULT 0,
+                    spent INTEGER NOT NULL DEFAULT 0,
+                    net INTEGER NOT NULL DEFAULT 0,
+                    transactions INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (uid, day)
+                )
+            ''')
+
+            # 创建积分相关索引（按账号的时间范围查询使用复合索引）
+            cursor.execute('DROP INDEX IF EXISTS idx_points_uid')
+            cursor.execute('DROP INDEX IF EXISTS idx_points_email')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_points_uid_time ON points_history (uid, create_time)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_points_email_time ON points_history (email, create_time)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_points_create_time ON points_history (create_time)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_points_daily_day ON points_daily (day)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_points_source ON points_history (source)')
 
+            # ========== 兑换码相关表 ==========
+            # 创建兑换码状态表（account_email为空表示对所有账号生效的状态）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS redeem_code_status (
+                    code TEXT NOT NULL,
+                    account_email TEXT NOT NULL DEFAULT '',
+                    status TEXT NOT NULL,
+                    message TEXT,
+                    updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+                    PRIMARY KEY (code, account_email)
+                )
+            ''')
+
+            # ========== 页面选择器统计表 ==========
+            # 记录每个候选选择器的命中情况，score为命中率的指数滑动平均，用于候选排序
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS selector_stats (
+                    domain TEXT NOT NULL,
+                    page TEXT NOT NULL,
+                    selector TEXT NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0,
+                    misses INTEGER NOT NULL DEFAULT 0,
+                    score REAL NOT NULL DEFAULT 0.5,
+                    hit_ms_total REAL NOT NULL DEFAULT 0,
+                    miss_ms_total REAL NOT NULL DEFAULT 0,
+                    last_hit_at TEXT,
+                    updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+                    PRIMARY KEY (domain, page, selector)
+                )
+            ''')
+
+            # ========== 域名登录耗时统计表 ==========
+            # 保存每个域名登录耗时的指数滑动平均和平均偏差，进程重启后用于域名排序和对冲等待时间
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS domain_health_stats (
+                    domain TEXT PRIMARY KEY,
+                    latency REAL NOT NULL,
+                    latency_dev REAL NOT NULL DEFAULT 0,
+                    samples INTEGER NOT NULL DEFAULT 0,
+                    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+                )
+            ''')
+
         logging.info("统一数据库所有表初始化完成")
 
 
@@ -1,13 +1,96 @@
+import atexit
+import copy
 import json
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import date, datetime, timedelta
 from pathlib import Path
 import logging
 from ..database import get_db
 
 
+class CheckinResultWriter:
+    """按签到会话缓冲账号结果，批量写入数据库
+
+    缓冲满flush_size条，或最早一条已缓冲超过flush_interval秒时，
+    在一个事务中写入全部结果。close()时写入剩余结果；进程退出时
+    未关闭的写入器由atexit统一写入。线程安全，可被多个签到工作线程共享。
+    """
+
+    def __init__(self, logger, session_id, flush_size=20, flush_interval=30):
+        """
+        Args:
+            logger: CheckinLoggerDB实例
+            session_id: 签到会话ID
+            flush_size: 缓冲多少条结果后写入
+            flush_interval: 结果最长缓冲时间（秒）
+        """
+        self.logger = logger
+        self.session_id = session_id
+        self.flush_size = max(1, int(flush_size))
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._oldest = None
+        self._lock = threading.Lock()
+
+    def add(self, account_email, status, message='', points=0, domain=None):
+        """缓冲一条账号签到结果"""
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append((account_email, datetime.now().isoformat(), status, message, points, domain))
+            due = (len(self._buffer) >= self.flush_size
+                   or time.monotonic() - self._oldest >= self.flush_interval)
+
+        if due:
+            self.flush()
+
+    def flush(self):
+        """将缓冲的结果写入数据库"""
+        with self._lock:
+            if not self._buffer:
+                return
+            rows, self._buffer = self._buffer, []
+
+            try:
+                self.logger._write_results(self.session_id, rows)
+            except Exception:
+                # 写入失败时放回缓冲区，等待下次写入
+                self._buffer = rows + self._buffer
+                raise
+
+    def close(self):
+        """写入剩余结果并注销写入器"""
+        try:
+            self.flush()
+        finally:
+            CheckinLoggerDB._unregister_writer(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 class CheckinLoggerDB:
     """基于数据库的签到日志记录器"""
 
+    # 统计缓存的最长有效期（秒）
+    STATS_CACHE_TTL = 60
+
+    # 表示当天已完成签到的状态
+    CHECKED_STATUSES = ('success', 'already_checked')
+
+    # 正在使用的结果写入器 {session_id: CheckinResultWriter}
+    _writers = {}
+    _writers_lock = threading.Lock()
+
+    # 进程内统计缓存（所有实例共享）
+    _stats_cache = None
+    _stats_version = 0
+    _stats_lock = threading.Lock()
+
     def __init__(self, data_dir='accounts_data'):
         """初始化数据库日志记录器
 
@@ -18,75 +101,179 @@ class CheckinLoggerDB:
         self.data_dir.mkdir(exist_ok=True)
         self.db = get_db()
 
-    def _update_account_statistics(self, cursor, email, status, points, checkin_time):
-        """更新账号统计信息"""
-        # 获取或创建账号统计记录
-        cursor.execute('SELECT * FROM account_statistics WHERE email = ?', (email,))
-        result = cursor.fetchone()
-
-        if result:
-            # 更新现有记录
-            total_checkins = result[1] + 1
-            successful_checkins = result[2] + (1 if status == 'success' else 0)
-            failed_checkins = result[3] + (1 if status == 'failed' else 0)
-            total_points = result[4] + points
-
-            cursor.execute('''
-                UPDATE account_statistics
-                SET total_checkins = ?, successful_checkins = ?, failed_checkins = ?,
-                    total_points = ?, last_checkin = ?, updated_at = datetime('now')
-                WHERE email = ?
-            ''', (total_checkins, successful_checkins, failed_checkins,
-                  total_points, checkin_time, email))
-        else:
-            # 创建新记录
-            cursor.execute('''
-                INSERT INTO account_statistics (
-                    email, total_checkins, successful_checkins, failed_checkins,
-                    total_points, last_checkin, first_checkin
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (email, 1,
-                  1 if status == 'success' else 0,
-                  1 if status == 'failed' else 0,
-                  points, checkin_time, checkin_time))
-
     def log_checkin_start(self, trigger_type='manual', trigger_by=None):
         """记录签到开始"""
         session_id = self.db.execute('''
             INSERT INTO checkin_sessions (start_time, trigger_type, trigger_by)
             VALUES (?, ?, ?)
         ''', (datetime.now().isoformat(), trigger_type, trigger_by))
+        self.invalidate_statistics()
         return session_id
 
+    def open_result_writer(self, session_id, flush_size=20, flush_interval=30):
+        """
+        为签到会话开启缓冲写入器
+
+        开启后该会话的log_account_result调用都会进入缓冲区批量写入，
+        直到写入器close()或log_checkin_end()。
+
+        Returns:
+            CheckinResultWriter实例
+        """
+        writer = CheckinResultWriter(self, session_id, flush_size=flush_size, flush_interval=flush_interval)
+        with CheckinLoggerDB._writers_lock:
+            CheckinLoggerDB._writers[session_id] = writer
+        return writer
+
+    @classmethod
+    def _unregister_writer(cls, writer):
+        with cls._writers_lock:
+            if cls._writers.get(writer.session_id) is writer:
+                del cls._writers[writer.session_id]
+
+    @classmethod
+    def close_result_writers(cls):
+        """写入并关闭所有未关闭的结果写入器（进程退出时调用）"""
+        with cls._writers_lock:
+            writers = list(cls._writers.values())
+
+        for writer in writers:
+            try:
+                writer.close()
+            except Exception as e:
+                logging.error(f"写入会话 {writer.session_id} 的签到结果失败: {e}")
+
     def log_account_result(self, session_id, account_email, status, message='', points=0, domain=None):
-        """记录单个账号签到结果"""
-        checkin_time = datetime.now().isoformat()
+        """记录单个账号签到结果（会话开启了缓冲写入器时先缓冲）"""
+        writer = CheckinLoggerDB._writers.get(session_id)
+        if writer is not None:
+            writer.add(account_email, status, message, points, domain)
+            return
+
+        self._write_results(session_id, [
+            (account_email, datetime.now().isoformat(), status, message, points, domain)
+        ])
+
+    def _write_results(self, session_id, rows):
+        """
+        在一个事务中写入一批账号结果
+
+        Args:
+            session_id: 签到会话ID
+            rows: [(account_email, checkin_time, status, message, points, domain)]
+        """
+        # 按账号合并统计增量
+        account_deltas = {}
+        for email, checkin_time, status, _, points, _ in rows:
+            delta = account_deltas.setdefault(email, {
+                'total': 0, 'success': 0, 'failed': 0, 'points': 0,
+                'first': checkin_time, 'last': checkin_time
+            })
+            delta['total'] += 1
+            delta['success'] += 1 if status == 'success' else 0
+            delta['failed'] += 1 if status == 'failed' else 0
+            delta['points'] += points or 0
+            delta['first'] = min(delta['first'], checkin_time)
+            delta['last'] = max(delta['last'], checkin_time)
+
+        statuses = [row[2] for row in rows]
 
         with self.db.get_connection() as conn:
             cursor = conn.cursor()
 
             # 插入账号日志
-            cursor.execute('''
+            cursor.executemany('''
                 INSERT INTO account_checkin_logs (
                     session_id, account_email, checkin_time, status, message, points, domain
                 ) VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (session_id, account_email, checkin_time, status, message, points, domain))
+            ''', [(session_id,) + row for row in rows])
 
             # 更新账号统计
-            self._update_account_statistics(cursor, account_email, status, points, checkin_time)
+            cursor.executemany('''
+                INSERT INTO account_statistics (
+                    email, total_checkins, successful_checkins, failed_checkins,
+                    total_points, last_checkin, first_checkin
+                ) VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(email) DO UPDATE SET
+                    total_checkins = total_checkins + excluded.total_checkins,
+                    successful_checkins = successful_checkins + excluded.successful_checkins,
+                    failed_checkins = failed_checkins + excluded.failed_checkins,
+                    total_points = total_points + excluded.total_points,
+                    last_checkin = excluded.last_checkin,
+                    updated_at = datetime('now')
+            ''', [
+                (email, d['total'], d['success'], d['failed'], d['points'], d['last'], d['first'])
+                for email, d in account_deltas.items()
+            ])
 
             # 更新会话统计
-            if status == 'success':
-                cursor.execute('UPDATE checkin_sessions SET success_count = success_count + 1 WHERE id = ?', (session_id,))
-            elif status == 'failed':
-                cursor.execute('UPDATE checkin_sessions SET failed_count = failed_count + 1 WHERE id = ?', (session_id,))
-            elif status == 'already_checked':
-                cursor.execute('UPDATE checkin_sessions SET already_checked_count = already_checked_count + 1 WHERE id = ?', (session_id,))
+            cursor.execute('''
+                UPDATE checkin_sessions
+                SET success_count = success_count + ?,
+                    failed_count = failed_count + ?,
+                    already_checked_count = already_checked_count + ?,
+                    total_accounts = total_accounts + ?
+                WHERE id = ?
+            ''', (statuses.count('success'), statuses.count('failed'),
+                  statuses.count('already_checked'), len(rows), session_id))
+
+        self.invalidate_statistics()
+
+    def log_skipped(self, session_id, count):
+        """记录会话中因当天已签到而跳过的账号数"""
+        if count:
+            self.db.execute(
+                'UPDATE checkin_sessions SET skipped_count = skipped_count + ? WHERE id = ?',
+                (count, session_id)
+            )
+
+    @staticmethod
+    def checkin_day_start(reset_hour=0, now=None):
+        """
+        当前签到日的开始时间（每天reset_hour点开始新的签到日）
+
+        Returns:
+            datetime: 签到日开始时间
+        """
+        now = now or datetime.now()
+        start = now.replace(hour=int(reset_hour), minute=0, second=0, microsecond=0)
+        if start > now:
+            start -= timedelta(days=1)
+        return start
+
+    def get_daily_status(self, day_start):
+        """
+        当前签到日已完成签到的账号索引（成功或已签到的最近一条记录）
+
+        Args:
+            day_start: 签到日开始时间（datetime）
 
-            cursor.execute('UPDATE checkin_sessions SET total_accounts = total_accounts + 1 WHERE id = ?', (session_id,))
+        Returns:
+            dict: {email: {'status', 'time', 'points', 'domain'}}
+        """
+        results = self.db.execute(f'''
+            SELECT account_email, status, MAX(checkin_time), points, domain
+            FROM account_checkin_logs
+            WHERE checkin_time >= ? AND status IN ({', '.join('?' * len(self.CHECKED_STATUSES))})
+            GROUP BY account_email
+        ''', (day_start.isoformat(), *self.CHECKED_STATUSES))
+
+        return {
+            result[0]: {
+                'status': result[1],
+                'time': result[2],
+                'points': result[3],
+                'domain': result[4]
+            }
+            for result in results or []
+        }
 
     def log_checkin_end(self, session_id, email_sent=False):
-        """记录签到结束"""
+        """记录签到结束（先写入该会话缓冲中的结果）"""
+        writer = CheckinLoggerDB._writers.get(session_id)
+        if writer is not None:
+            writer.close()
+
         end_time = datetime.now().isoformat()
 
         # 获取开始时间计算耗时
@@ -104,91 +291,111 @@ class CheckinLoggerDB:
                 SET end_time = ?, status = 'completed', email_sent = ?, duration_seconds = ?
                 WHERE id = ?
             ''', (end_time, email_sent, duration, session_id))
+            self.invalidate_statistics()
 
     def get_statistics(self):
-        """获取统计信息"""
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
-
-            # 全部时间统计
-            cursor.execute('''
-                SELECT
-                    COUNT(*) as total_sessions,
-                    SUM(total_accounts) as total_checkins,
-                    SUM(success_count) as successful_checkins,
-                    SUM(failed_count) as failed_checkins,
-                    SUM(already_checked_count) as already_checked_count
-                FROM checkin_sessions WHERE status = 'completed'
-            ''')
-            all_time = cursor.fetchone()
-
-            # 总积分
-            cursor.execute('SELECT SUM(total_points) FROM account_statistics')
-            total_points = cursor.fetchone()[0] or 0
-
-            # 最近7天统计
-            seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
-            cursor.execute('''
-                SELECT
-                    SUM(total_accounts) as total,
-                    SUM(success_count) as success,
-                    SUM(failed_count) as failed
-                FROM checkin_sessions
-                WHERE status = 'completed' AND start_time >= ?
-            ''', (seven_days_ago,))
-            recent_7_days = cursor.fetchone()
+        """获取统计信息
 
-            # 最近30天统计
-            thirty_days_ago = (datetime.now() - timedelta(days=30)).isoformat()
-            cursor.execute('''
-                SELECT
-                    SUM(total_accounts) as total,
-                    SUM(success_count) as success,
-                    SUM(failed_count) as failed
-                FROM checkin_sessions
-                WHERE status = 'completed' AND start_time >= ?
-            ''', (thirty_days_ago,))
-            recent_30_days = cursor.fetchone()
+        结果缓存在进程内，签到写入时失效；另设STATS_CACHE_TTL秒过期，
+        以覆盖其他进程写入和跨日的情况。
+        """
+        now = time.monotonic()
+        with CheckinLoggerDB._stats_lock:
+            cached = CheckinLoggerDB._stats_cache
+            if cached and cached['date'] == date.today() and now - cached['time'] < self.STATS_CACHE_TTL:
+                return copy.deepcopy(cached['stats'])
+            version = CheckinLoggerDB._stats_version
+
+        stats = self._compute_statistics()
+
+        with CheckinLoggerDB._stats_lock:
+            # 计算期间有写入则不缓存，避免缓存过期数据
+            if version == CheckinLoggerDB._stats_version:
+                CheckinLoggerDB._stats_cache = {
+                    'stats': copy.deepcopy(stats),
+                    'time': now,
+                    'date': date.today()
+                }
 
-            # 今日统计
-            today = datetime.now().strftime('%Y-%m-%d')
-            cursor.execute('''
-                SELECT
-                    COUNT(*) as sessions,
-                    SUM(total_accounts) as accounts,
-                    SUM(success_count) as success,
-                    SUM(failed_count) as failed
+        return stats
+
+    @classmethod
+    def invalidate_statistics(cls):
+        """使统计缓存失效"""
+        with cls._stats_lock:
+            cls._stats_version += 1
+            cls._stats_cache = None
+
+    def _compute_statistics(self):
+        """一次扫描checkin_sessions，用条件聚合同时计算全部时间、近7天、近30天和今日统计"""
+        now = datetime.now()
+        today = now.strftime('%Y-%m-%d')
+        tomorrow = (now + timedelta(days=1)).strftime('%Y-%m-%d')
+        seven_days_ago = (now - timedelta(days=7)).isoformat()
+        thirty_days_ago = (now - timedelta(days=30)).isoformat()
+
+        row = self.db.execute_one('''
+            SELECT
+                SUM(completed) as total_sessions,
+                SUM(completed * total_accounts) as total_checkins,
+                SUM(completed * success_count) as successful_checkins,
+                SUM(completed * failed_count) as failed_checkins,
+                SUM(completed * already_checked_count) as already_checked_count,
+
+                SUM(CASE WHEN completed AND start_time >= :seven_days_ago THEN total_accounts END),
+                SUM(CASE WHEN completed AND start_time >= :seven_days_ago THEN success_count END),
+                SUM(CASE WHEN completed AND start_time >= :seven_days_ago THEN failed_count END),
+
+                SUM(CASE WHEN completed AND start_time >= :thirty_days_ago THEN total_accounts END),
+                SUM(CASE WHEN completed AND start_time >= :thirty_days_ago THEN success_count END),
+                SUM(CASE WHEN completed AND start_time >= :thirty_days_ago THEN failed_count END),
+
+                SUM(is_today) as today_sessions,
+                SUM(CASE WHEN is_today THEN total_accounts END),
+                SUM(CASE WHEN is_today THEN success_count END),
+                SUM(CASE WHEN is_today THEN failed_count END),
+
+                (SELECT SUM(total_points) FROM account_statistics) as total_points
+            FROM (
+                SELECT total_accounts, success_count, failed_count, already_checked_count, start_time,
+                       status = 'completed' as completed,
+                       start_time >= :today AND start_time < :tomorrow as is_today
                 FROM checkin_sessions
-                WHERE date(start_time) = ?
-            ''', (today,))
-            today_stats = cursor.fetchone()
-
-            return {
-                'all_time': {
-                    'total_sessions': all_time[0] or 0,
-                    'total_checkins': all_time[1] or 0,
-                    'successful_checkins': all_time[2] or 0,
-                    'failed_checkins': all_time[3] or 0,
-                    'already_checked_count': all_time[4] or 0,
-                    'total_points_earned': total_points
-                },
-                'recent_7_days': {
-                    'total': recent_7_days[0] or 0,
-                    'success': recent_7_days[1] or 0,
-                    'failed': recent_7_days[2] or 0
-                },
-                'recent_30_days': {
-                    'total': recent_30_days[0] or 0,
-                    'success': recent_30_days[1] or 0,
-                    'failed': recent_30_days[2] or 0
-                },
-                'today': {
-                    'sessions': today_stats[0] or 0,
-                    'accounts': today_stats[1] or 0,
-                    'success': today_stats[2] or 0,
-                    'failed': today_stats[3] or 0
-                }
+            )
+        ''', {
+            'seven_days_ago': seven_days_ago,
+            'thirty_days_ago': thirty_days_ago,
+            'today': today,
+            'tomorrow': tomorrow
+        })
+        values = [value or 0 for value in row]
+
+        return {
+            'all_time': {
+                'total_sessions': values[0],
+                'total_checkins': values[1],
+                'successful_checkins': values[2],
+                'failed_checkins': values[3],
+                'already_checked_count': values[4],
+                'total_points_earned': values[15]
+            },
+            'recent_7_days': {
+                'total': values[5],
+                'success': values[6],
+                'failed': values[7]
+            },
+            'recent_30_days': {
+                'total': values[8],
+                'success': values[9],
+                'failed': values[10]
+            },
+            'today': {
+                'sessions': values[11],
+                'accounts': values[12],
+                'success': values[13],
+                'failed': values[14]
             }
+        }
 
     def get_account_history(self, email, days=30):
         """获取账号历史记录"""
@@ -216,7 +423,7 @@ class CheckinLoggerDB:
         """获取最近的签到会话"""
         results = self.db.execute('''
             SELECT id, start_time, end_time, trigger_type, total_accounts,
-                   success_count, failed_count, duration_seconds, status
+                   success_count, failed_count, duration_seconds, status, skipped_count
             FROM checkin_sessions
             ORDER BY start_time DESC
             LIMIT ?
@@ -232,7 +439,8 @@ class CheckinLoggerDB:
                 'success_count': result[5],
                 'failed_count': result[6],
                 'duration_seconds': result[7],
-                'status': result[8]
+                'status': result[8],
+                'skipped_count': result[9] or 0
             }
             for result in results
         ]
@@ -260,4 +468,7 @@ class CheckinLoggerDB:
         ]
 
 
+atexit.register(CheckinLoggerDB.close_result_writers)
+
+
 # 使用示例
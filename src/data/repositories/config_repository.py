@@ -123,6 +123,115 @@ class ConfigManager:
 
         return accounts
 
+    def get_system_config(self, key, default=None):
+        """获取系统配置项
+
+        Args:
+            key: 配置键
+            default: 配置不存在或无法解析时的默认值
+        """
+        result = self.db.execute_one(
+            'SELECT value, data_type FROM system_config WHERE key = ?', (key,)
+        )
+
+        if not result:
+            return default
+
+        value, data_type = result[0], result[1]
+        try:
+            if data_type == 'int':
+                return int(value)
+            if data_type == 'float':
+                return float(value)
+            if data_type == 'bool':
+                return value.lower() in ('1', 'true', 'yes')
+            if data_type == 'json':
+                return json.loads(value)
+        except (ValueError, TypeError) as e:
+            logging.warning(f"系统配置 {key} 解析失败，使用默认值: {e}")
+            return default
+
+        return value
+
+    def get_checkin_config(self):
+        """获取批量签到配置"""
+        return {
+            'max_workers': self.get_system_config('checkin_max_workers', 1),
+            'domain_interval': self.get_system_config('checkin_domain_interval', 2.0),
+            # 对冲：主域名登录超过预计耗时仍未成功时，在下一个域名上同时发起签到
+            'hedge_enabled': self.get_system_config('checkin_hedge_enabled', False),
+            'hedge_delay': self.get_system_config('checkin_hedge_delay', 30),
+            'hedge_min_delay': self.get_system_config('checkin_hedge_min_delay', 5),
+            # 签到前查询签到记录，跳过当前签到日已成功或已签到的账号（每天day_reset_hour点开始新的签到日）
+            'skip_checked': self.get_system_config('checkin_skip_checked', True),
+            'day_reset_hour': self.get_system_config('checkin_day_reset_hour', 0)
+        }
+
+    def get_browser_pool_config(self):
+        """获取浏览器池配置"""
+        return {
+            'enabled': self.get_system_config('browser_pool_enabled', True),
+            'max_size': self.get_system_config('browser_pool_max_size', 2),
+            'max_uses': self.get_system_config('browser_pool_max_uses', 20),
+            'idle_timeout': self.get_system_config('browser_pool_idle_timeout', 300),
+            'max_contexts': self.get_system_config('browser_pool_max_contexts', 4)
+        }
+
+    def get_session_cache_config(self):
+        """获取登录会话缓存配置"""
+        return {
+            'enabled': self.get_system_config('session_cache_enabled', True),
+            'max_age': self.get_system_config('session_cache_max_age', 259200)
+        }
+
+    def get_pipeline_config(self):
+        """获取账号流水线配置（schedule_enabled为True时定时任务执行流水线而不是单独签到）"""
+        return {
+            'schedule_enabled': self.get_system_config('schedule_use_pipeline', False),
+            'tasks': self.get_system_config('pipeline_tasks', ['checkin', 'balance', 'sync'])
+        }
+
+    def get_browser_cache_config(self):
+        """
+        获取共享浏览器缓存配置
+
+        启用共享缓存时池内每个进程同时只能承载一个账号，因此browser_cache_enabled未设置时，
+        浏览器池只在browser_pool_max_contexts不大于1时使用共享缓存（pool_enabled），
+        优先保证一个进程并行承载多个账号；不使用浏览器池时始终启用。
+        """
+        enabled = self.get_system_config('browser_cache_enabled', None)
+        if enabled is None:
+            pool_enabled = self.get_browser_pool_config()['max_contexts'] <= 1
+            enabled = True
+        else:
+            pool_enabled = enabled
+        return {
+            'enabled': enabled,
+            'pool_enabled': pool_enabled,
+            'dir': self.get_system_config('browser_cache_dir', 'accounts_data/browser_cache'),
+            'size_mb': self.get_system_config('browser_cache_size_mb', 200)
+        }
+
+    def get_resource_blocking_config(self):
+        """获取资源拦截配置（类型/URL规则为None时使用默认规则）"""
+        return {
+            'enabled': self.get_system_config('resource_blocking_enabled', True),
+            'block_types': self.get_system_config('resource_blocking_types', None),
+            'block_patterns': self.get_system_config('resource_blocking_patterns', None),
+            'allow_patterns': self.get_system_config('resource_blocking_allowlist', None)
+        }
+
+    def get_domain_health_config(self):
+        """获取域名熔断配置"""
+        return {
+            'failure_threshold': self.get_system_config('domain_failure_threshold', 3),
+            'cooldown': self.get_system_config('domain_circuit_cooldown', 300)
+        }
+
+    def get_selector_ranking_enabled(self):
+        """是否按历史命中率调整页面候选选择器的顺序"""
+        return self.get_system_config('selector_ranking_enabled', True)
+
     def get_all_config(self):
         """获取所有配置，兼容原YAML格式"""
         return {
@@ -163,6 +272,29 @@ class ConfigManager:
             VALUES (1, ?, ?, ?, ?, datetime('now'))
         ''', (enabled, username, password, api_token))
 
+    def update_system_config(self, key, value, description=None):
+        """更新系统配置项（根据值类型自动记录data_type）"""
+        if isinstance(value, bool):
+            data_type, stored = 'bool', 'true' if value else 'false'
+        elif isinstance(value, int):
+            data_type, stored = 'int', str(value)
+        elif isinstance(value, float):
+            data_type, stored = 'float', str(value)
+        elif isinstance(value, (dict, list)):
+            data_type, stored = 'json', json.dumps(value)
+        else:
+            data_type, stored = 'str', str(value)
+
+        self.db.execute('''
+            INSERT INTO system_config (key, value, data_type, description, updated_at)
+            VALUES (?, ?, ?, ?, datetime('now'))
+            ON CONFLICT(key) DO UPDATE SET
+                value = excluded.value,
+                data_type = excluded.data_type,
+                description = COALESCE(excluded.description, system_config.description),
+                updated_at = excluded.updated_at
+        ''', (key, stored, data_type, description))
+
     def add_account(self, email, password):
         """添加账号"""
         self.db.execute('''
@@ -0,0 +1,56 @@
+import logging
+from ..database import get_db
+
+
+class DomainHealthRepository:
+    """域名登录耗时统计
+
+    保存DomainHealthTracker中每个域名登录耗时的滑动平均和平均偏差。命令行每次运行
+    都是新进程，启动时加载这些估计值，第一个账号就能按历史耗时选择最快的域名和
+    估计对冲等待时间。熔断状态只在进程内有效，不保存。
+    """
+
+    def __init__(self):
+        self.db = get_db()
+
+    def load(self):
+        """
+        加载所有域名的登录耗时估计
+
+        Returns:
+            dict: {域名: {'latency', 'latency_dev', 'samples'}}
+        """
+        rows = self.db.execute('SELECT domain, latency, latency_dev, samples FROM domain_health_stats')
+        return {
+            domain: {'latency': latency, 'latency_dev': latency_dev, 'samples': samples}
+            for domain, latency, latency_dev, samples in rows or []
+        }
+
+    def save(self, domain, latency, latency_dev):
+        """
+        保存一个域名最新的登录耗时估计
+
+        Args:
+            domain: 域名
+            latency: 登录耗时的滑动平均（秒）
+            latency_dev: 登录耗时的平均偏差（秒）
+        """
+        try:
+            self.db.execute('''
+                INSERT INTO domain_health_stats (domain, latency, latency_dev, samples, updated_at)
+                VALUES (?, ?, ?, 1, datetime('now'))
+                ON CONFLICT(domain) DO UPDATE SET
+                    latency = excluded.latency,
+                    latency_dev = excluded.latency_dev,
+                    samples = samples + 1,
+                    updated_at = excluded.updated_at
+            ''', (domain, latency, latency_dev))
+        except Exception as e:
+            logging.debug(f"保存域名登录耗时失败: {e}")
+
+    def reset(self, domain=None):
+        """清除登录耗时统计（domain为None时清除全部）"""
+        if domain is None:
+            self.db.execute('DELETE FROM domain_health_stats')
+        else:
+            self.db.execute('DELETE FROM domain_health_stats WHERE domain = ?', (domain,))
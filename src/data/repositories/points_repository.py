@@ -1,4 +1,4 @@
-import json
+import itertools
 import logging
 import time
 from datetime import datetime, timedelta
@@ -9,12 +9,16 @@ from ..database import get_db
 class PointsHistoryManager:
     """积分历史记录管理器"""
 
+    # 本进程是否已检查过积分汇总表
+    _rollups_checked = False
+
     def __init__(self):
         """初始化数据库管理器
 
         使用统一数据库管理器(gptgod_checkin.db)
         """
         self.db = get_db()  # 使用统一数据库
+        self._ensure_rollups()
 
 
     def record_exists(self, record_id):
@@ -32,115 +36,234 @@ class PointsHistoryManager:
         )
         return result is not None
 
+    # 批量导入时每个事务处理的记录数
+    IMPORT_CHUNK_SIZE = 500
+
     def add_record(self, record_data, email=None):
         """添加一条积分记录
 
         Args:
             record_data: API返回的记录数据
             email: 账号邮箱
+
+        Returns:
+            bool: 是否为新插入的记录
+        """
+        return self.batch_add_records([record_data], email) > 0
+
+    def _import_chunk(self, cursor, rows, email):
+        """将一批记录合并到points_history
+
+        先写入临时表（按id去重），剔除已存在的记录后一次性插入，
+        IP在SQL中从remark JSON统一提取。
+
+        Returns:
+            int: 实际插入的记录数
+        """
+        cursor.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS points_import (
+                id INTEGER PRIMARY KEY,
+                uid INTEGER,
+                tokens INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                remark TEXT,
+                create_time TEXT NOT NULL,
+                api_id INTEGER DEFAULT 0
+            )
+        ''')
+        cursor.execute('DELETE FROM points_import')
+
+        cursor.executemany('''
+            INSERT OR IGNORE INTO points_import (id, uid, tokens, source, remark, create_time, api_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+        # 剔除已存储的记录，临时表中只保留本次新增的记录
+        cursor.execute('DELETE FROM points_import WHERE id IN (SELECT id FROM points_history)')
+
+        cursor.execute('''
+            INSERT INTO points_history (id, uid, email, tokens, source, remark, ip, create_time, api_id)
+            SELECT id, uid, ?, tokens, source, remark,
+                   CASE WHEN json_valid(remark) THEN json_extract(remark, '$.ip') END,
+                   create_time, api_id
+            FROM points_import
+            WHERE true
+            ON CONFLICT(id) DO NOTHING
+        ''', (email,))
+        inserted = max(cursor.rowcount, 0)
+
+        if inserted:
+            self._apply_rollup_delta(cursor)
+
+        return inserted
+
+    def _apply_rollup_delta(self, cursor):
+        """将临时表中的新增记录累加到汇总表和每日汇总表（与导入在同一事务中）"""
+        cursor.execute('''
+            INSERT INTO points_rollup (uid, total_count, total_earned, total_spent,
+                                       net_points, first_record, last_record, updated_at)
+            SELECT uid, COUNT(*),
+                   SUM(CASE WHEN tokens > 0 THEN tokens ELSE 0 END),
+                   SUM(CASE WHEN tokens < 0 THEN -tokens ELSE 0 END),
+                   SUM(tokens), MIN(create_time), MAX(create_time), CURRENT_TIMESTAMP
+            FROM points_import
+            WHERE uid IS NOT NULL
+            GROUP BY uid
+            ON CONFLICT(uid) DO UPDATE SET
+                total_count = total_count + excluded.total_count,
+                total_earned = total_earned + excluded.total_earned,
+                total_spent = total_spent + excluded.total_spent,
+                net_points = net_points + excluded.net_points,
+                first_record = MIN(COALESCE(first_record, excluded.first_record), excluded.first_record),
+                last_record = MAX(COALESCE(last_record, excluded.last_record), excluded.last_record),
+                updated_at = excluded.updated_at
+        ''')
+
+        cursor.execute('''
+            INSERT INTO points_source_rollup (uid, source, count, earned, spent)
+            SELECT uid, source, COUNT(*),
+                   SUM(CASE WHEN tokens > 0 THEN tokens ELSE 0 END),
+                   SUM(CASE WHEN tokens < 0 THEN -tokens ELSE 0 END)
+            FROM points_import
+            WHERE uid IS NOT NULL
+            GROUP BY uid, source
+            ON CONFLICT(uid, source) DO UPDATE SET
+                count = count + excluded.count,
+                earned = earned + excluded.earned,
+                spent = spent + excluded.spent
+        ''')
+
+        cursor.execute('''
+            INSERT INTO points_daily (uid, day, earned, spent, net, transactions)
+            SELECT uid, DATE(create_time),
+                   SUM(CASE WHEN tokens > 0 THEN tokens ELSE 0 END),
+                   SUM(CASE WHEN tokens < 0 THEN -tokens ELSE 0 END),
+                   SUM(tokens), COUNT(*)
+            FROM points_import
+            WHERE uid IS NOT NULL AND DATE(create_time) IS NOT NULL
+            GROUP BY uid, DATE(create_time)
+            ON CONFLICT(uid, day) DO UPDATE SET
+                earned = earned + excluded.earned,
+                spent = spent + excluded.spent,
+                net = net + excluded.net,
+                transactions = transactions + excluded.transactions
+        ''')
+
+    def rebuild_rollups(self):
+        """从points_history全量重建积分汇总表和每日汇总表
+
+        Returns:
+            int: 重建后的账号数
         """
         with self.db.get_connection() as conn:
             cursor = conn.cursor()
+            cursor.execute('DELETE FROM points_rollup')
+            cursor.execute('DELETE FROM points_source_rollup')
+            cursor.execute('DELETE FROM points_daily')
+
+            cursor.execute('''
+                INSERT INTO points_rollup (uid, total_count, total_earned, total_spent,
+                                           net_points, first_record, last_record, updated_at)
+                SELECT uid, COUNT(*),
+                       SUM(CASE WHEN tokens > 0 THEN tokens ELSE 0 END),
+                       SUM(CASE WHEN tokens < 0 THEN -tokens ELSE 0 END),
+                       SUM(tokens), MIN(create_time), MAX(create_time), CURRENT_TIMESTAMP
+                FROM points_history
+                WHERE uid IS NOT NULL
+                GROUP BY uid
+            ''')
+            accounts = max(cursor.rowcount, 0)
+
+            cursor.execute('''
+                INSERT INTO points_source_rollup (uid, source, count, earned, spent)
+                SELECT uid, source, COUNT(*),
+                       SUM(CASE WHEN tokens > 0 THEN tokens ELSE 0 END),
+                       SUM(CASE WHEN tokens < 0 THEN -tokens ELSE 0 END)
+                FROM points_history
+                WHERE uid IS NOT NULL
+                GROUP BY uid, source
+            ''')
+
+            cursor.execute('''
+                INSERT INTO points_daily (uid, day, earned, spent, net, transactions)
+                SELECT uid, DATE(create_time),
+                       SUM(CASE WHEN tokens > 0 THEN tokens ELSE 0 END),
+                       SUM(CASE WHEN tokens < 0 THEN -tokens ELSE 0 END),
+                       SUM(tokens), COUNT(*)
+                FROM points_history
+                WHERE uid IS NOT NULL AND DATE(create_time) IS NOT NULL
+                GROUP BY uid, DATE(create_time)
+            ''')
 
-            try:
-                # 检查记录是否已存在
-                cursor.execute('SELECT id FROM points_history WHERE id = ?', (record_data['id'],))
-                if cursor.fetchone():
-                    return False  # 记录已存在
-
-                # 解析IP地址
-                ip = None
-                try:
-                    remark = record_data.get('remark', '')
-                    if remark:
-                        remark_data = json.loads(remark)
-                        ip = remark_data.get('ip')
-                except:
-                    pass
-
-                # 插入新记录
-                cursor.execute('''
-                    INSERT INTO points_history (id, uid, email, tokens, source, remark, ip, create_time, api_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    record_data['id'],
-                    record_data['uid'],
-                    email,
-                    record_data['tokens'],
-                    record_data['source'],
-                    record_data.get('remark', ''),
-                    ip,
-                    record_data['create_time'],
-                    record_data.get('api_id', 0)
-                ))
-
-                # 更新账号映射
-                if email:
-                    cursor.execute('''
-                        INSERT OR REPLACE INTO account_mapping (uid, email, last_update)
-                        VALUES (?, ?, CURRENT_TIMESTAMP)
-                    ''', (record_data['uid'], email))
-
-                return True
-
-            except Exception as e:
-                logging.error(f"添加记录失败: {e}")
-                raise  # 让上下文管理器处理回滚
+        logging.info(f"积分汇总表已重建，共 {accounts} 个账号")
+        return accounts
+
+    def _ensure_rollups(self):
+        """汇总表为空但已有历史记录时（旧数据库升级）自动重建，每个进程只检查一次"""
+        if PointsHistoryManager._rollups_checked:
+            return
+        PointsHistoryManager._rollups_checked = True
+
+        try:
+            result = self.db.execute_one('''
+                SELECT (NOT EXISTS (SELECT 1 FROM points_rollup)
+                        OR NOT EXISTS (SELECT 1 FROM points_daily))
+                   AND EXISTS (SELECT 1 FROM points_history WHERE uid IS NOT NULL)
+            ''')
+            if result and result[0]:
+                logging.info("检测到积分汇总表为空，开始从历史记录重建")
+                self.rebuild_rollups()
+        except Exception as e:
+            logging.error(f"检查积分汇总表失败: {e}")
 
     def batch_add_records(self, records, email=None):
         """批量添加积分记录
 
+        支持传入生成器，按IMPORT_CHUNK_SIZE分批导入，每批一个事务，
+        不需要在内存中构建完整的记录列表。
+
         Args:
-            records: 记录列表
+            records: 记录列表或可迭代对象
             email: 账号邮箱
+
+        Returns:
+            int: 实际新增的记录数
         """
-        with self.db.get_connection() as conn:
-            cursor = conn.cursor()
+        added_count = 0
+        uid = None
+        iterator = iter(records)
 
-            added_count = 0
-            for record in records:
-                # 检查记录是否已存在
-                cursor.execute('SELECT id FROM points_history WHERE id = ?', (record['id'],))
-                if cursor.fetchone():
-                    continue  # 跳过已存在的记录
-
-                # 解析IP地址
-                ip = None
-                try:
-                    remark = record.get('remark', '')
-                    if remark:
-                        remark_data = json.loads(remark)
-                        ip = remark_data.get('ip')
-                except:
-                    pass
-
-                # 插入新记录
-                cursor.execute('''
-                    INSERT INTO points_history (id, uid, email, tokens, source, remark, ip, create_time, api_id)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+        while True:
+            rows = [
+                (
                     record['id'],
                     record['uid'],
-                    email,
                     record['tokens'],
                     record['source'],
                     record.get('remark', ''),
-                    ip,
                     record['create_time'],
                     record.get('api_id', 0)
-                ))
-                added_count += 1
+                )
+                for record in itertools.islice(iterator, self.IMPORT_CHUNK_SIZE)
+            ]
+            if not rows:
+                break
 
-            # 更新账号映射
-            if email and records:
-                uid = records[0]['uid']
-                cursor.execute('''
-                    INSERT OR REPLACE INTO account_mapping (uid, email, last_update)
-                    VALUES (?, ?, CURRENT_TIMESTAMP)
-                ''', (uid, email))
+            if uid is None:
+                uid = rows[0][1]
+
+            with self.db.get_connection() as conn:
+                added_count += self._import_chunk(conn.cursor(), rows, email)
+
+        # 更新账号映射
+        if email and uid is not None:
+            self.db.execute('''
+                INSERT OR REPLACE INTO account_mapping (uid, email, last_update)
+                VALUES (?, ?, CURRENT_TIMESTAMP)
+            ''', (uid, email))
 
-            logging.info(f"成功添加 {added_count} 条新记录")
-            return added_count
+        logging.info(f"成功添加 {added_count} 条新记录")
+        return added_count
 
     def get_latest_record_id(self, uid=None, email=None):
         """获取最新记录的ID
@@ -270,24 +393,124 @@ class PointsHistoryManager:
             else:
                 total_accounts = 1
 
-            return {
-                'total_count': result[0] or 0,
-                'total_earned': result[1] or 0,
-                'total_spent': result[2] or 0,
-                'net_points': result[3] or 0,
-                'first_record': result[4],
-                'last_record': result[5],
-                'total_accounts': total_accounts,
-                'by_source': source_stats,
-                # 兼容旧字段名
-                'total_records': result[0] or 0,
-                'total_points': result[3] or 0,
-                'earned_sources': source_stats  # 兼容前端期待的字段名
+            return self._format_statistics(result, source_stats, total_accounts)
+
+    @staticmethod
+    def _format_statistics(totals, source_stats, total_accounts):
+        """组装统计结果
+
+        Args:
+            totals: (总记录数, 总获得, 总消耗, 净积分, 最早记录时间, 最新记录时间)
+            source_stats: 各来源统计 {source: {'count', 'earned', 'spent'}}
+            total_accounts: 账号数
+        """
+        return {
+            'total_count': totals[0] or 0,
+            'total_earned': totals[1] or 0,
+            'total_spent': totals[2] or 0,
+            'net_points': totals[3] or 0,
+            'first_record': totals[4],
+            'last_record': totals[5],
+            'total_accounts': total_accounts,
+            'by_source': source_stats,
+            # 兼容旧字段名
+            'total_records': totals[0] or 0,
+            'total_points': totals[3] or 0,
+            'earned_sources': source_stats  # 兼容前端期待的字段名
+        }
+
+    def get_account_rollups(self):
+        """从汇总表一次查询获取所有账号的统计
+
+        包含account_mapping中的账号以及汇总表中有记录的账号，
+        按账号映射的最后更新时间倒序排列。
+
+        Returns:
+            list: [{'uid', 'email', 'stats'}]，stats格式与get_statistics相同
+        """
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                WITH ids AS (
+                    SELECT uid FROM account_mapping
+                    UNION
+                    SELECT uid FROM points_rollup
+                )
+                SELECT ids.uid, m.email,
+                       r.total_count, r.total_earned, r.total_spent, r.net_points,
+                       r.first_record, r.last_record,
+                       s.source, s.count, s.earned, s.spent
+                FROM ids
+                LEFT JOIN account_mapping m ON m.uid = ids.uid
+                LEFT JOIN points_rollup r ON r.uid = ids.uid
+                LEFT JOIN points_source_rollup s ON s.uid = ids.uid
+                ORDER BY m.last_update IS NULL, m.last_update DESC, ids.uid
+                ''')
+            rows = cursor.fetchall()
+
+        accounts = {}
+        for row in rows:
+            account = accounts.get(row[0])
+            if account is None:
+                account = {
+                    'uid': row[0],
+                    'email': row[1],
+                    'totals': row[2:8],
+                    'by_source': {}
+                }
+                accounts[row[0]] = account
+            if row[8] is not None:
+                account['by_source'][row[8]] = {
+                    'count': row[9],
+                    'earned': row[10] or 0,
+                    'spent': row[11] or 0
+                }
+
+        return [
+            {
+                'uid': account['uid'],
+                'email': account['email'],
+                'stats': self._format_statistics(account['totals'], account['by_source'], 1)
             }
+            for account in accounts.values()
+        ]
+
+    @classmethod
+    def summarize_rollups(cls, account_rollups):
+        """将get_account_rollups的结果合计为全局统计（格式与get_statistics()相同）"""
+        totals = [0, 0, 0, 0, None, None]
+        source_stats = {}
+        total_accounts = 0
+
+        for account in account_rollups:
+            stats = account['stats']
+            if not stats['total_count']:
+                continue
+
+            total_accounts += 1
+            totals[0] += stats['total_count']
+            totals[1] += stats['total_earned']
+            totals[2] += stats['total_spent']
+            totals[3] += stats['net_points']
+            if stats['first_record'] and (totals[4] is None or stats['first_record'] < totals[4]):
+                totals[4] = stats['first_record']
+            if stats['last_record'] and (totals[5] is None or stats['last_record'] > totals[5]):
+                totals[5] = stats['last_record']
+
+            for source, item in stats['by_source'].items():
+                merged = source_stats.setdefault(source, {'count': 0, 'earned': 0, 'spent': 0})
+                merged['count'] += item['count']
+                merged['earned'] += item['earned']
+                merged['spent'] += item['spent']
+
+        return cls._format_statistics(totals, source_stats, total_accounts)
 
     def get_daily_summary(self, days=30, email=None, uid=None):
         """获取每日积分汇总
 
+        优先从每日汇总表读取，查询量与天数成正比而与记录数无关；
+        邮箱没有对应UID时回退到按(email, create_time)索引的范围查询。
+
         Args:
             days: 统计天数
             email: 如果指定，则获取该邮箱的汇总
@@ -295,53 +518,22 @@ class PointsHistoryManager:
         """
         cutoff_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
 
+        if email and not uid:
+            uid = self.get_uid_by_email(email)
+            if uid is None:
+                return self._get_daily_summary_from_history(cutoff_date, email)
+
         with self.db.get_connection() as conn:
             cursor = conn.cursor()
 
-            # 构建查询条件
-            where_conditions = ["DATE(create_time) >= ?"]
-            params = [cutoff_date]
-
-            if email:
-                where_conditions.append("email = ?")
-                params.append(email)
-            elif uid:
-                where_conditions.append("uid = ?")
-                params.append(uid)
+            if uid:
+                cursor.execute('''
+                    SELECT day, earned, spent, net, transactions
+                    FROM points_daily
+                    WHERE uid = ? AND day >= ?
+                    ORDER BY day DESC
+                ''', (uid, cutoff_date))
 
-            where_clause = " WHERE " + " AND ".join(where_conditions)
-
-            if email or uid:
-                cursor.execute(f'''
-                    SELECT
-                        DATE(create_time) as date,
-                        SUM(CASE WHEN tokens > 0 THEN tokens ELSE 0 END) as earned,
-                        SUM(CASE WHEN tokens < 0 THEN -tokens ELSE 0 END) as spent,
-                        SUM(tokens) as net,
-                        COUNT(*) as transactions
-                    FROM points_history
-                    {where_clause}
-                    GROUP BY DATE(create_time)
-                    ORDER BY date DESC
-                ''', params)
-            else:
-                cursor.execute(f'''
-                    SELECT
-                        DATE(create_time) as date,
-                        SUM(CASE WHEN tokens > 0 THEN tokens ELSE 0 END) as earned,
-                        SUM(CASE WHEN tokens < 0 THEN -tokens ELSE 0 END) as spent,
-                        SUM(tokens) as net,
-                        COUNT(*) as transactions,
-                        COUNT(DISTINCT email) as accounts_count
-                    FROM points_history
-                    {where_clause}
-                    GROUP BY DATE(create_time)
-                    ORDER BY date DESC
-                ''', params)
-
-            results = cursor.fetchall()
-
-            if email or uid:
                 return [
                     {
                         'date': row[0],
@@ -350,21 +542,61 @@ class PointsHistoryManager:
                         'net': row[3] or 0,
                         'transactions': row[4]
                     }
-                    for row in results
-                ]
-            else:
-                return [
-                    {
-                        'date': row[0],
-                        'earned': row[1] or 0,
-                        'spent': row[2] or 0,
-                        'net': row[3] or 0,
-                        'transactions': row[4],
-                        'accounts': row[5]
-                    }
-                    for row in results
+                    for row in cursor.fetchall()
                 ]
 
+            cursor.execute('''
+                SELECT
+                    day,
+                    SUM(earned) as earned,
+                    SUM(spent) as spent,
+                    SUM(net) as net,
+                    SUM(transactions) as transactions,
+                    COUNT(*) as accounts_count
+                FROM points_daily
+                WHERE day >= ?
+                GROUP BY day
+                ORDER BY day DESC
+            ''', (cutoff_date,))
+
+            return [
+                {
+                    'date': row[0],
+                    'earned': row[1] or 0,
+                    'spent': row[2] or 0,
+                    'net': row[3] or 0,
+                    'transactions': row[4],
+                    'accounts': row[5]
+                }
+                for row in cursor.fetchall()
+            ]
+
+    def _get_daily_summary_from_history(self, cutoff_date, email):
+        """直接从points_history按邮箱汇总每日积分（create_time范围条件可走复合索引）"""
+        results = self.db.execute('''
+            SELECT
+                DATE(create_time) as date,
+                SUM(CASE WHEN tokens > 0 THEN tokens ELSE 0 END) as earned,
+                SUM(CASE WHEN tokens < 0 THEN -tokens ELSE 0 END) as spent,
+                SUM(tokens) as net,
+                COUNT(*) as transactions
+            FROM points_history
+            WHERE email = ? AND create_time >= ?
+            GROUP BY DATE(create_time)
+            ORDER BY date DESC
+        ''', (email, cutoff_date))
+
+        return [
+            {
+                'date': row[0],
+                'earned': row[1] or 0,
+                'spent': row[2] or 0,
+                'net': row[3] or 0,
+                'transactions': row[4]
+            }
+            for row in results
+        ]
+
     def cleanup_old_records(self, days_to_keep=365):
         """清理旧记录
 
@@ -373,10 +605,18 @@ class PointsHistoryManager:
         """
         cutoff_date = (datetime.now() - timedelta(days=days_to_keep)).strftime('%Y-%m-%d')
 
-        deleted = self.db.execute('''
-            DELETE FROM points_history
-            WHERE DATE(create_time) < ?
-        ''', (cutoff_date,))
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            # create_time为'YYYY-MM-DD HH:MM:SS'格式，与日期字符串直接比较即可使用索引
+            cursor.execute('''
+                DELETE FROM points_history
+                WHERE create_time < ?
+            ''', (cutoff_date,))
+            deleted = cursor.rowcount
+
+            # 汇总表需与历史记录保持一致
+            if deleted:
+                self.rebuild_rollups()
 
         logging.info(f"已清理 {deleted} 条旧记录")
         return deleted
@@ -0,0 +1,131 @@
+import logging
+from ..database import get_db
+
+
+class RedeemCodeCache:
+    """兑换码状态缓存
+
+    - 全局状态（invalid无效、exhausted已被使用/已过期）：对所有账号生效，
+      任一账号遇到后其他账号不再提交该兑换码
+    - 账号状态（redeemed该账号已兑换过）：只对该账号生效
+    - 记录超过ttl秒后失效，兑换码会重新提交一次
+    """
+
+    # 对所有账号生效的状态
+    GLOBAL_STATUSES = ('invalid', 'exhausted')
+
+    # 只对单个账号生效的状态
+    ACCOUNT_STATUSES = ('redeemed',)
+
+    def __init__(self, ttl=604800):
+        """
+        Args:
+            ttl: 缓存有效期（秒），默认7天
+        """
+        self.ttl = int(ttl)
+        self.db = get_db()
+
+    def lookup(self, codes, email):
+        """
+        查询兑换码对指定账号是否已有确定结果
+
+        Args:
+            codes: 兑换码列表
+            email: 账号邮箱
+
+        Returns:
+            dict: {兑换码: {'status', 'message', 'scope'}}，只包含有缓存的兑换码
+        """
+        codes = list(dict.fromkeys(codes))
+        if not codes:
+            return {}
+
+        placeholders = ','.join('?' * len(codes))
+        rows = self.db.execute(f'''
+            SELECT code, account_email, status, message FROM redeem_code_status
+            WHERE code IN ({placeholders}) AND account_email IN ('', ?)
+                AND updated_at >= datetime('now', ?)
+        ''', (*codes, email, f'-{self.ttl} seconds'))
+
+        cached = {}
+        for code, account_email, status, message in rows or []:
+            # 全局状态优先于账号状态
+            if code in cached and cached[code]['scope'] == 'global':
+                continue
+            cached[code] = {
+                'status': status,
+                'message': message or '',
+                'scope': 'account' if account_email else 'global'
+            }
+        return cached
+
+    def record(self, code, status, message='', email=None):
+        """
+        记录兑换码的确定结果
+
+        Args:
+            code: 兑换码
+            status: GLOBAL_STATUSES或ACCOUNT_STATUSES中的状态，其他状态不记录
+            message: 网站返回的提示
+            email: 账号邮箱（账号状态必填）
+
+        Returns:
+            bool: 是否已记录
+        """
+        if status in self.GLOBAL_STATUSES:
+            account_email = ''
+        elif status in self.ACCOUNT_STATUSES and email:
+            account_email = email
+        else:
+            return False
+
+        self.db.execute('''
+            INSERT INTO redeem_code_status (code, account_email, status, message, updated_at)
+            VALUES (?, ?, ?, ?, datetime('now'))
+            ON CONFLICT(code, account_email) DO UPDATE SET
+                status = excluded.status,
+                message = excluded.message,
+                updated_at = excluded.updated_at
+        ''', (code, account_email, status, message))
+        logging.debug(f"已缓存兑换码状态: {code} -> {status} ({account_email or '所有账号'})")
+        return True
+
+    def get_entries(self):
+        """
+        获取未过期的兑换码状态
+
+        Returns:
+            list: 按更新时间倒序排列的缓存记录
+        """
+        rows = self.db.execute('''
+            SELECT code, account_email, status, message, updated_at FROM redeem_code_status
+            WHERE updated_at >= datetime('now', ?)
+            ORDER BY updated_at DESC
+        ''', (f'-{self.ttl} seconds',))
+
+        return [
+            {
+                'code': code,
+                'account_email': account_email or None,
+                'status': status,
+                'message': message or '',
+                'updated_at': updated_at
+            }
+            for code, account_email, status, message, updated_at in rows or []
+        ]
+
+    def clear(self, code=None):
+        """
+        清除兑换码状态缓存（code为None时清除全部），同时删除已过期的记录
+
+        Returns:
+            int: 删除的记录数
+        """
+        with self.db.get_connection() as conn:
+            if code is None:
+                cursor = conn.execute('DELETE FROM redeem_code_status')
+            else:
+                cursor = conn.execute('''
+                    DELETE FROM redeem_code_status WHERE code = ? OR updated_at < datetime('now', ?)
+                ''', (code, f'-{self.ttl} seconds'))
+            return cursor.rowcount
@@ -0,0 +1,134 @@
+import logging
+from ..database import get_db
+
+
+class SelectorStatsRepository:
+    """页面选择器统计
+
+    按(域名, 页面, 选择器)记录命中/未命中次数和耗时。排序使用命中率的指数滑动
+    平均（score），最近的结果权重更高：网站前端改版后原来的首选选择器连续未命中，
+    几次之后就会被新的命中选择器超过，无需人工调整候选顺序。
+    """
+
+    # 滑动平均中本次结果的权重
+    SCORE_ALPHA = 0.3
+
+    # 没有统计数据的选择器的初始分数
+    PRIOR_SCORE = 0.5
+
+    def __init__(self):
+        self.db = get_db()
+
+    def rank(self, domain, page, selectors):
+        """
+        按分数从高到低排列候选选择器（分数相同时保持原顺序）
+
+        Args:
+            domain: 域名
+            page: 页面标识（如login.email）
+            selectors: 候选选择器列表
+
+        Returns:
+            list: 排序后的候选选择器
+        """
+        rows = self.db.execute('''
+            SELECT selector, score FROM selector_stats WHERE domain = ? AND page = ?
+        ''', (domain or '', page))
+        scores = {selector: score for selector, score in rows or []}
+        return sorted(selectors, key=lambda selector: -scores.get(selector, self.PRIOR_SCORE))
+
+    def record(self, domain, page, selectors, matched, elapsed_ms):
+        """
+        记录一次查找结果
+
+        命中的选择器记一次命中；排在它之前的候选在整个等待期间都未命中，各记一次未命中；
+        排在它之后的候选没有参与比较，不记录。全部未命中时每个候选都记一次未命中。
+
+        Args:
+            domain: 域名
+            page: 页面标识
+            selectors: 本次查找使用的候选顺序
+            matched: 命中的选择器，未命中为None
+            elapsed_ms: 本次查找耗时（毫秒）
+        """
+        params = []
+        for selector in selectors:
+            hit = selector == matched
+            params.append((
+                domain or '', page, selector, int(hit), int(not hit),
+                self._next_score(self.PRIOR_SCORE, hit),
+                elapsed_ms if hit else 0, 0 if hit else elapsed_ms, hit,
+                1 - self.SCORE_ALPHA, self.SCORE_ALPHA * hit
+            ))
+            if hit:
+                break
+
+        try:
+            self.db.execute_many('''
+                INSERT INTO selector_stats
+                    (domain, page, selector, hits, misses, score, hit_ms_total, miss_ms_total, last_hit_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, CASE WHEN ? THEN datetime('now') END, datetime('now'))
+                ON CONFLICT(domain, page, selector) DO UPDATE SET
+                    hits = hits + excluded.hits,
+                    misses = misses + excluded.misses,
+                    score = score * ? + ?,
+                    hit_ms_total = hit_ms_total + excluded.hit_ms_total,
+                    miss_ms_total = miss_ms_total + excluded.miss_ms_total,
+                    last_hit_at = COALESCE(excluded.last_hit_at, last_hit_at),
+                    updated_at = excluded.updated_at
+            ''', params)
+        except Exception as e:
+            logging.debug(f"记录选择器统计失败: {e}")
+
+    @classmethod
+    def _next_score(cls, score, hit):
+        """滑动平均更新分数"""
+        return score * (1 - cls.SCORE_ALPHA) + cls.SCORE_ALPHA * hit
+
+    def get_stats(self, domain=None, page=None):
+        """
+        获取选择器统计
+
+        Returns:
+            list: 按域名、页面、分数排序的统计列表
+        """
+        conditions = []
+        params = []
+        if domain:
+            conditions.append('domain = ?')
+            params.append(domain)
+        if page:
+            conditions.append('page = ?')
+            params.append(page)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        rows = self.db.execute(f'''
+            SELECT domain, page, selector, hits, misses, score, hit_ms_total, miss_ms_total, last_hit_at, updated_at
+            FROM selector_stats {where}
+            ORDER BY domain, page, score DESC
+        ''', tuple(params))
+
+        stats = []
+        for (domain, page, selector, hits, misses, score,
+             hit_ms_total, miss_ms_total, last_hit_at, updated_at) in rows or []:
+            stats.append({
+                'domain': domain,
+                'page': page,
+                'selector': selector,
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+                'score': round(score, 3),
+                'avg_hit_ms': round(hit_ms_total / hits, 1) if hits else None,
+                'avg_miss_ms': round(miss_ms_total / misses, 1) if misses else None,
+                'last_hit_at': last_hit_at,
+                'updated_at': updated_at
+            })
+        return stats
+
+    def reset(self, domain=None):
+        """清除选择器统计（domain为None时清除全部）"""
+        if domain is None:
+            self.db.execute('DELETE FROM selector_stats')
+        else:
+            self.db.execute('DELETE FROM selector_stats WHERE domain = ?', (domain,))
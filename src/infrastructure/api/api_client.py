@@ -0,0 +1,202 @@
+"""
+GPT-GOD HTTP API客户端 - 不启动浏览器，直接调用网站的JSON接口
+
+使用缓存的登录会话（登录令牌、cookies和浏览器User-Agent）查询用户信息、
+余额和积分历史。所有客户端共享同一个keep-alive连接池。
+遇到Cloudflare验证或会话失效时抛出异常，由调用方回退到浏览器流程。
+"""
+import threading
+from datetime import datetime
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    requests = None
+    HTTPAdapter = None
+
+from src.infrastructure.browser.session_cache import find_auth_token
+
+
+class ApiClientError(Exception):
+    """API客户端错误基类"""
+
+
+class ApiChallengeError(ApiClientError):
+    """请求被Cloudflare验证拦截，需要回退到浏览器"""
+
+
+class ApiAuthError(ApiClientError):
+    """登录会话被拒绝，需要重新登录"""
+
+
+# 所有客户端共享的连接池（各客户端使用独立的Session保存自己的cookies）
+_adapter = None
+_adapter_lock = threading.Lock()
+
+
+def _get_adapter():
+    """获取共享的HTTP连接池适配器"""
+    global _adapter
+    with _adapter_lock:
+        if _adapter is None:
+            _adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        return _adapter
+
+
+class GptGodApiClient:
+    """GPT-GOD网站API客户端"""
+
+    # 积分历史每页记录数
+    HISTORY_PAGE_SIZE = 20
+
+    # 签到记录的来源关键字
+    CHECKIN_SOURCE_KEYWORD = '签到'
+
+    def __init__(self, domain, token, cookies=None, user_agent=None, timeout=10):
+        """
+        Args:
+            domain: 域名
+            token: 登录令牌
+            cookies: cookies列表（需包含cf_clearance时才能通过Cloudflare）
+            user_agent: 获取cookies时浏览器的User-Agent
+            timeout: 请求超时（秒）
+        """
+        if requests is None:
+            raise ApiClientError("未安装requests库")
+
+        self.domain = domain
+        self.base_url = f'https://{domain}'
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = _get_adapter()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.session.headers.update({
+            'Accept': 'application/json, text/plain, */*',
+            'Authorization': f'Bearer {token}',
+            'Origin': self.base_url,
+            'Referer': f'{self.base_url}/'
+        })
+        if user_agent:
+            self.session.headers['User-Agent'] = user_agent
+
+        for cookie in cookies or []:
+            self.session.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain', domain), path=cookie.get('path', '/')
+            )
+
+    @classmethod
+    def from_session_state(cls, domain, state, timeout=10):
+        """
+        根据缓存的登录会话创建客户端
+
+        Args:
+            domain: 域名
+            state: SessionCache.load()返回的会话数据
+
+        Returns:
+            GptGodApiClient实例，会话中没有登录令牌或未安装requests时返回None
+        """
+        if requests is None or not state:
+            return None
+
+        token = find_auth_token(state.get('local_storage', {}))
+        if not token:
+            return None
+
+        return cls(domain, token, state.get('cookies'), state.get('user_agent'), timeout=timeout)
+
+    def close(self):
+        """关闭客户端（保留共享连接池中的keep-alive连接供其他客户端复用）"""
+        # Session.close()会关闭所有挂载的适配器，先卸载共享适配器
+        self.session.adapters.clear()
+        self.session.close()
+
+    def _request(self, method, path, **kwargs):
+        """
+        发送请求并解析JSON响应
+
+        Returns:
+            dict: 响应体
+
+        Raises:
+            ApiChallengeError: 被Cloudflare拦截或响应不是JSON
+            ApiAuthError: 登录会话失效
+        """
+        try:
+            response = self.session.request(method, f'{self.base_url}/{path}', timeout=self.timeout, **kwargs)
+        except requests.RequestException as e:
+            raise ApiChallengeError(f"请求失败: {e}")
+
+        content_type = response.headers.get('Content-Type', '')
+        if response.headers.get('cf-mitigated') or 'json' not in content_type:
+            raise ApiChallengeError(f"{path} 返回非JSON响应 (HTTP {response.status_code})，可能需要Cloudflare验证")
+
+        if response.status_code in (401, 403):
+            raise ApiAuthError(f"{path} 拒绝了登录会话 (HTTP {response.status_code})")
+
+        try:
+            body = response.json()
+        except ValueError:
+            raise ApiChallengeError(f"{path} 响应无法解析为JSON")
+
+        if not isinstance(body, dict):
+            raise ApiChallengeError(f"{path} 响应格式异常")
+        return body
+
+    def get_user_info(self):
+        """
+        获取用户信息（包含当前积分余额tokens）
+
+        Returns:
+            dict: 用户信息
+
+        Raises:
+            ApiAuthError: 登录会话失效
+        """
+        body = self._request('GET', 'api/user/info')
+        if body.get('code') != 0 or 'data' not in body:
+            raise ApiAuthError(f"获取用户信息失败: {body.get('message', 'Unknown')}")
+        return body['data']
+
+    def get_balance(self):
+        """获取当前积分余额"""
+        return self.get_user_info().get('tokens', 0)
+
+    def get_history_page(self, page, size=None):
+        """
+        获取一页积分历史
+
+        Returns:
+            dict: 与浏览器监听到的api/balance/list响应体相同
+
+        Raises:
+            ApiAuthError: 网站拒绝了登录会话（code不为0）
+        """
+        body = self._request('POST', 'api/balance/list', json={
+            'page': page,
+            'size': size or self.HISTORY_PAGE_SIZE
+        })
+        if body.get('code') != 0:
+            raise ApiAuthError(f"获取积分历史失败: {body.get('message', 'Unknown')}")
+        return body
+
+    def has_checked_in_today(self):
+        """
+        通过积分历史第一页判断今天是否已签到
+
+        Returns:
+            bool: 是否已签到
+        """
+        body = self.get_history_page(1)
+
+        today = datetime.now().strftime('%Y-%m-%d')
+        for record in body.get('data', {}).get('records', []):
+            if (self.CHECKIN_SOURCE_KEYWORD in str(record.get('source', ''))
+                    and str(record.get('create_time', '')).startswith(today)):
+                return True
+        return False
@@ -5,8 +5,10 @@ import os
 import shutil
 import tempfile
 import random
+import socket
 import logging
 import platform
+import threading
 from pathlib import Path
 from DrissionPage import ChromiumPage, ChromiumOptions
 
@@ -65,17 +67,31 @@ def find_browser_path():
 class BrowserManager:
     """浏览器管理器 - 负责创建和管理浏览器实例"""
 
-    def __init__(self, headless=False):
+    # 进程内已分配的调试端口，避免并发创建浏览器时端口冲突
+    _ports_in_use = set()
+    _ports_lock = threading.Lock()
+
+    # 进程内正在使用的共享缓存槽位（Chromium磁盘缓存不支持多个进程同时写入）
+    _cache_slots_in_use = set()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, headless=False, shared_cache_dir=None, cache_size_mb=200):
         """初始化浏览器管理器
 
         Args:
             headless: 是否使用无头模式
+            shared_cache_dir: 共享HTTP磁盘缓存的根目录，None表示不共享
+            cache_size_mb: 每个缓存槽位的大小上限（MB）
         """
         self.headless = headless
         self.temp_dir = None
         self.random_port = None
         self.driver = None
         self.browser_path = find_browser_path()
+        self.shared_cache_dir = shared_cache_dir
+        self.cache_size_mb = cache_size_mb
+        self.cache_slot = None
+        self.cache_dir = None
 
     def _create_temp_dir(self):
         """创建临时数据目录"""
@@ -83,12 +99,64 @@ class BrowserManager:
         logging.info(f"创建临时目录: {self.temp_dir}")
         return self.temp_dir
 
+    @staticmethod
+    def _port_available(port):
+        """检查本地端口是否空闲"""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            try:
+                sock.bind(('127.0.0.1', port))
+                return True
+            except OSError:
+                return False
+
     def _get_random_port(self):
-        """生成随机端口"""
-        self.random_port = random.randint(9222, 9999)
+        """生成随机端口（跳过已被占用或已分配给其他浏览器的端口）"""
+        with BrowserManager._ports_lock:
+            for _ in range(100):
+                port = random.randint(9222, 9999)
+                if port not in BrowserManager._ports_in_use and self._port_available(port):
+                    break
+            else:
+                raise RuntimeError("无法分配空闲的浏览器调试端口")
+            BrowserManager._ports_in_use.add(port)
+
+        self.random_port = port
         logging.info(f"使用随机端口: {self.random_port}")
         return self.random_port
 
+    def _release_port(self):
+        """释放已分配的调试端口"""
+        if self.random_port is not None:
+            with BrowserManager._ports_lock:
+                BrowserManager._ports_in_use.discard(self.random_port)
+            self.random_port = None
+
+    def _acquire_cache_slot(self):
+        """分配一个空闲的共享缓存槽位
+
+        临时用户目录用完即删，静态资源（JS/CSS）的HTTP缓存和代码缓存放在
+        槽位目录中跨账号、跨运行复用。同一时刻每个槽位只给一个浏览器进程使用。
+        """
+        with BrowserManager._cache_lock:
+            slot = 0
+            while slot in BrowserManager._cache_slots_in_use:
+                slot += 1
+            BrowserManager._cache_slots_in_use.add(slot)
+
+        self.cache_slot = slot
+        self.cache_dir = (Path(self.shared_cache_dir) / f'slot-{slot}').resolve()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        logging.info(f"使用共享缓存目录: {self.cache_dir}")
+        return self.cache_dir
+
+    def _release_cache_slot(self):
+        """释放共享缓存槽位"""
+        if self.cache_slot is not None:
+            with BrowserManager._cache_lock:
+                BrowserManager._cache_slots_in_use.discard(self.cache_slot)
+            self.cache_slot = None
+            self.cache_dir = None
+
     def _get_browser_arguments(self, incognito=True):
         """获取浏览器启动参数
 
@@ -113,6 +181,10 @@ class BrowserManager:
 
         if incognito:
             args.append("--incognito")
+        elif self.cache_dir is not None:
+            # 无痕模式只使用内存缓存，共享磁盘缓存仅在普通模式下生效
+            args.append(f"--disk-cache-dir={self.cache_dir}")
+            args.append(f"--disk-cache-size={int(self.cache_size_mb) * 1024 * 1024}")
 
         if self.headless:
             args.append("--headless=new")  # 使用新的无头模式
@@ -131,10 +203,15 @@ class BrowserManager:
         # 创建临时目录和随机端口
         self._create_temp_dir()
         self._get_random_port()
+        if self.shared_cache_dir and not incognito:
+            self._acquire_cache_slot()
 
         # 配置浏览器选项
         options = ChromiumOptions()
         options.set_browser_path(self.browser_path)
+        # DrissionPage会忽略--remote-debugging-port参数，必须显式设置连接端口，
+        # 否则所有实例都会连接到默认的9222端口（并发时会互相接管）
+        options.set_local_port(self.random_port)
 
         # 添加启动参数
         for arg in self._get_browser_arguments(incognito):
@@ -168,6 +245,9 @@ class BrowserManager:
             finally:
                 self.temp_dir = None
 
+        self._release_port()
+        self._release_cache_slot()
+
     def __enter__(self):
         """上下文管理器入口"""
         return self.create_browser()
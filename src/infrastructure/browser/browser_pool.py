@@ -0,0 +1,399 @@
+"""
+浏览器池 - 复用已启动的Chromium进程，避免每个账号冷启动浏览器
+
+每次租用都会在池中的浏览器里创建一个全新的浏览器上下文（相当于独立的无痕窗口），
+归还时销毁该上下文，cookies、localStorage等数据随之清除，账号之间互不影响。
+一个进程可以同时承载多个上下文，同样的内存可以并行处理更多账号。
+
+启用共享磁盘缓存时，独立上下文只有内存缓存，因此改为在进程的默认上下文中租用
+标签页：每个进程使用一个共享缓存槽位、同一时刻只承载一个账号，归还时清除
+cookies和站点存储，保留HTTP缓存供下一个账号复用。
+"""
+import atexit
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from src.infrastructure.browser.browser_manager import BrowserManager
+
+
+class PooledBrowser:
+    """池中的单个浏览器进程，可同时承载多个浏览器上下文"""
+
+    # 归还默认上下文中的标签页时清除的站点存储（不包含HTTP缓存）
+    CLEARED_STORAGE_TYPES = 'cookies,local_storage,indexeddb,websql,service_workers,cache_storage,file_systems'
+
+    def __init__(self, headless=False, shared_cache_dir=None, cache_size_mb=200):
+        """启动浏览器进程
+
+        Args:
+            headless: 是否使用无头模式
+            shared_cache_dir: 共享HTTP磁盘缓存的根目录，None表示每次租用独立上下文（只有内存缓存）
+            cache_size_mb: 缓存槽位的大小上限（MB）
+        """
+        self.shared_cache = shared_cache_dir is not None
+        self.manager = BrowserManager(
+            headless=headless, shared_cache_dir=shared_cache_dir, cache_size_mb=cache_size_mb
+        )
+        self.page = self.manager.create_browser(incognito=not self.shared_cache)
+        self.uses = 0
+        self.active = 0
+        self.retired = False
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        # 浏览器级CDP连接由多个上下文共用，DrissionPage的消息ID自增不是线程安全的
+        self._cdp_lock = threading.Lock()
+
+    def is_healthy(self):
+        """健康检查：浏览器进程仍可通过CDP响应"""
+        try:
+            with self._cdp_lock:
+                self.page.browser.run_cdp('Browser.getVersion')
+            return True
+        except Exception as e:
+            logging.warning(f"池中浏览器健康检查失败: {e}")
+            return False
+
+    def open_context(self):
+        """创建一个独立的浏览器上下文及其标签页
+
+        Returns:
+            tuple: (标签页对象, 浏览器上下文ID)，使用共享缓存时在默认上下文中打开，上下文ID为None
+        """
+        with self._cdp_lock:
+            if self.shared_cache:
+                return self.page.new_tab(), None
+            tab = self.page.new_tab(new_context=True)
+            target_info = self.page.browser.run_cdp('Target.getTargetInfo', targetId=tab.tab_id)
+        context_id = target_info['targetInfo'].get('browserContextId')
+        return tab, context_id
+
+    def _clear_default_context(self, tab):
+        """清除默认上下文中该标签页访问过的站点存储和所有cookies，保留HTTP缓存（需持有锁）"""
+        origins = set()
+        try:
+            history = tab.run_cdp('Page.getNavigationHistory')
+            for entry in history.get('entries', []):
+                parts = urlsplit(entry.get('url', ''))
+                if parts.scheme in ('http', 'https') and parts.netloc:
+                    origins.add(f'{parts.scheme}://{parts.netloc}')
+        except Exception as e:
+            logging.debug(f"读取标签页访问记录时出错: {e}")
+
+        for origin in origins:
+            try:
+                self.page.browser.run_cdp(
+                    'Storage.clearDataForOrigin', origin=origin, storageTypes=self.CLEARED_STORAGE_TYPES
+                )
+            except Exception as e:
+                logging.debug(f"清除站点存储时出错 {origin}: {e}")
+
+        self.page.browser.run_cdp('Storage.clearCookies')
+
+    def close_context(self, tab, context_id):
+        """关闭标签页并销毁浏览器上下文（清除该上下文的所有cookies和存储，不影响其他上下文）
+
+        Raises:
+            Exception: 默认上下文中的cookies清除失败（调用方应回收该进程）
+        """
+        with self._cdp_lock:
+            if self.shared_cache:
+                try:
+                    self._clear_default_context(tab)
+                finally:
+                    try:
+                        tab.close()
+                    except Exception as e:
+                        logging.debug(f"关闭标签页时出错: {e}")
+                self.last_used = time.monotonic()
+                return
+
+            try:
+                tab.close()
+            except Exception as e:
+                logging.debug(f"关闭标签页时出错: {e}")
+
+            if context_id:
+                try:
+                    self.page.browser.run_cdp('Target.disposeBrowserContext', browserContextId=context_id)
+                except Exception as e:
+                    logging.debug(f"销毁浏览器上下文时出错: {e}")
+
+        self.last_used = time.monotonic()
+
+    def close(self):
+        """关闭浏览器进程并清理临时目录"""
+        self.manager.close()
+
+
+class BrowserPool:
+    """浏览器池
+
+    - 最多同时保持max_size个浏览器进程，每个进程最多同时承载max_contexts个上下文
+    - 优先把上下文分配给已有租用的进程，使空闲进程能被及时回收
+    - 进程从空闲状态重新租用前做健康检查，不健康的进程直接丢弃
+    - 每个进程累计创建max_uses个上下文后不再分配，最后一个上下文归还时回收
+    - 没有上下文且空闲超过idle_timeout秒的进程会被自动关闭
+    - 启用共享磁盘缓存时每个进程同时只承载一个账号
+    """
+
+    def __init__(self, headless=False, max_size=2, max_uses=20, idle_timeout=300, max_contexts=4,
+                 shared_cache_dir=None, cache_size_mb=200):
+        """
+        初始化浏览器池
+
+        Args:
+            headless: 是否使用无头模式
+            max_size: 最大浏览器进程数
+            max_uses: 单个进程累计创建上下文的上限
+            idle_timeout: 空闲进程的最长保留时间（秒）
+            max_contexts: 单个进程同时承载的上下文上限
+            shared_cache_dir: 共享HTTP磁盘缓存的根目录（None表示不共享）
+            cache_size_mb: 每个缓存槽位的大小上限（MB）
+        """
+        self.headless = headless
+        self.max_size = max(1, int(max_size))
+        self.max_uses = max(1, int(max_uses))
+        self.idle_timeout = idle_timeout
+        self.shared_cache_dir = shared_cache_dir
+        self.cache_size_mb = cache_size_mb
+        # 默认上下文中的cookies由所有标签页共用，共享缓存时每个进程只能同时承载一个账号
+        self.max_contexts = 1 if shared_cache_dir else max(1, int(max_contexts))
+
+        self._browsers = []
+        self._launching = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._reaper = None
+
+    def _launch(self):
+        """启动一个新的池内浏览器（调用前已预留名额），并占用其第一个上下文"""
+        try:
+            browser = PooledBrowser(
+                headless=self.headless, shared_cache_dir=self.shared_cache_dir, cache_size_mb=self.cache_size_mb
+            )
+        except Exception:
+            with self._cond:
+                self._launching -= 1
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._launching -= 1
+            browser.active = 1
+            browser.uses = 1
+            self._browsers.append(browser)
+            logging.info(f"浏览器池启动新进程 (当前 {len(self._browsers)}/{self.max_size})")
+        return browser
+
+    def _discard(self, browser):
+        """关闭已移出池的浏览器"""
+        try:
+            browser.close()
+        finally:
+            with self._cond:
+                self._cond.notify_all()
+
+    def _remove(self, browser):
+        """将浏览器移出池（需持有锁）"""
+        if browser in self._browsers:
+            self._browsers.remove(browser)
+
+    def _evict_idle(self):
+        """取出所有没有上下文且空闲超时的浏览器（需持有锁）"""
+        now = time.monotonic()
+        expired = [b for b in self._browsers if b.active == 0 and now - b.last_used > self.idle_timeout]
+        for browser in expired:
+            self._remove(browser)
+        return expired
+
+    def _start_reaper(self):
+        """启动空闲回收线程"""
+        if self._reaper and self._reaper.is_alive():
+            return
+
+        def reap():
+            while not self._closed:
+                time.sleep(min(30, max(1, self.idle_timeout / 2)))
+                with self._cond:
+                    expired = self._evict_idle()
+                for browser in expired:
+                    logging.info("关闭空闲超时的池内浏览器")
+                    self._discard(browser)
+
+        self._reaper = threading.Thread(target=reap, daemon=True, name="BrowserPoolReaper")
+        self._reaper.start()
+
+    def _pick(self):
+        """选择还能承载上下文的进程，优先选择已有租用最多的（需持有锁）"""
+        candidates = [
+            b for b in self._browsers
+            if not b.retired and b.active < self.max_contexts and b.uses < self.max_uses
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda b: b.active)
+
+    def _acquire(self):
+        """为一个新上下文分配浏览器进程（必要时启动新进程或等待归还）"""
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("浏览器池已关闭")
+
+                expired = self._evict_idle()
+                browser = self._pick()
+                launch = False
+                was_idle = False
+                if browser is not None:
+                    was_idle = browser.active == 0
+                    browser.active += 1
+                    browser.uses += 1
+                elif len(self._browsers) + self._launching < self.max_size:
+                    self._launching += 1
+                    launch = True
+                elif not expired:
+                    self._cond.wait(timeout=5)
+                    continue
+
+            for stale in expired:
+                self._discard(stale)
+
+            if launch:
+                self._start_reaper()
+                return self._launch()
+
+            if browser is not None:
+                # 进程上已有其他上下文在运行时无需再做健康检查
+                if not was_idle or browser.is_healthy():
+                    return browser
+                with self._cond:
+                    browser.active -= 1
+                    self._remove(browser)
+                self._discard(browser)
+
+    def _release(self, browser, healthy=True):
+        """归还一个上下文，进程需要回收时等最后一个上下文归还后再关闭"""
+        with self._cond:
+            browser.active -= 1
+            if not healthy or browser.uses >= self.max_uses or self._closed:
+                browser.retired = True
+
+            close = browser.retired and browser.active == 0
+            if close:
+                self._remove(browser)
+            self._cond.notify_all()
+
+        if close:
+            logging.info(f"回收池内浏览器 (已创建 {browser.uses} 个上下文)")
+            self._discard(browser)
+
+    def ensure_capacity(self, size):
+        """确保池能同时提供size个上下文（用于并发任务）"""
+        needed = -(-size // self.max_contexts)
+        with self._cond:
+            if needed > self.max_size:
+                logging.info(f"浏览器池容量扩展: {self.max_size} -> {needed} 个进程")
+                self.max_size = needed
+                self._cond.notify_all()
+
+    @contextmanager
+    def lease(self):
+        """
+        租用一个干净的浏览器上下文
+
+        Usage:
+            with pool.lease() as tab:
+                tab.get('https://example.com')
+
+        Yields:
+            ChromiumTab: 位于独立浏览器上下文中的标签页
+        """
+        browser = self._acquire()
+        healthy = True
+        try:
+            try:
+                tab, context_id = browser.open_context()
+            except Exception:
+                healthy = False
+                raise
+
+            try:
+                yield tab
+            finally:
+                try:
+                    browser.close_context(tab, context_id)
+                except Exception as e:
+                    # 默认上下文没能清理干净时回收该进程，避免下一个账号读到上一个账号的数据
+                    logging.warning(f"清理浏览器数据失败，回收该进程: {e}")
+                    healthy = False
+        finally:
+            self._release(browser, healthy=healthy)
+
+    def stats(self):
+        """获取池状态"""
+        with self._cond:
+            contexts = sum(b.active for b in self._browsers)
+            busy = sum(1 for b in self._browsers if b.active)
+            return {
+                'max_size': self.max_size,
+                'max_contexts': self.max_contexts,
+                'shared_cache': self.shared_cache_dir is not None,
+                'total': len(self._browsers),
+                'idle': len(self._browsers) - busy,
+                'in_use': busy,
+                'contexts': contexts
+            }
+
+    def shutdown(self):
+        """关闭池中所有空闲浏览器，仍有上下文的浏览器在最后一个上下文归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle = [b for b in self._browsers if b.active == 0]
+            for browser in self._browsers:
+                browser.retired = True
+            for browser in idle:
+                self._remove(browser)
+            self._cond.notify_all()
+
+        for browser in idle:
+            self._discard(browser)
+
+
+# 全局浏览器池（按是否无头模式区分）
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_browser_pool(headless=False, **settings):
+    """
+    获取全局浏览器池实例
+
+    Args:
+        headless: 是否使用无头模式
+        **settings: 首次创建时传给BrowserPool的参数
+            （max_size/max_uses/idle_timeout/max_contexts/shared_cache_dir/cache_size_mb）
+
+    Returns:
+        BrowserPool实例
+    """
+    with _pools_lock:
+        pool = _pools.get(headless)
+        if pool is None:
+            pool = BrowserPool(headless=headless, **settings)
+            _pools[headless] = pool
+        return pool
+
+
+def shutdown_browser_pools():
+    """关闭所有全局浏览器池"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+
+    for pool in pools:
+        pool.shutdown()
+
+
+atexit.register(shutdown_browser_pools)
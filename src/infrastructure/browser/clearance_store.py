@@ -0,0 +1,123 @@
+"""
+Cloudflare验证凭证缓存 - 在浏览器上下文之间共享cf_clearance cookie
+
+cf_clearance与获取它的浏览器User-Agent绑定，因此按(域名, 浏览器指纹)存储。
+新的浏览器上下文在访问域名前注入已缓存的凭证，同一域名在凭证有效期内
+只需要通过一次Cloudflare验证。
+"""
+import hashlib
+import logging
+import threading
+import time
+
+
+# cf_clearance的cookie名
+CLEARANCE_COOKIE = 'cf_clearance'
+
+
+def browser_fingerprint(user_agent):
+    """根据User-Agent生成浏览器指纹"""
+    return hashlib.sha256((user_agent or '').encode()).hexdigest()[:16]
+
+
+class ClearanceStore:
+    """cf_clearance缓存（线程安全）
+
+    - 按(域名, 浏览器指纹)保存cookie及其过期时间
+    - cookie没有过期时间（会话cookie）时使用default_ttl
+    - 注入后仍出现验证的凭证会被作废
+    """
+
+    def __init__(self, default_ttl=1800, expiry_margin=60):
+        """
+        Args:
+            default_ttl: 没有过期时间的cookie的缓存时间（秒）
+            expiry_margin: 提前多少秒视为过期，避免注入即将过期的凭证
+        """
+        self.default_ttl = default_ttl
+        self.expiry_margin = expiry_margin
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'stores': 0, 'rejections': 0}
+
+    def get(self, domain, user_agent):
+        """
+        获取有效的验证凭证
+
+        Returns:
+            dict: cookie（name/value/domain/path/expires等），没有有效凭证时返回None
+        """
+        key = (domain, browser_fingerprint(user_agent))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['expires_at'] - self.expiry_margin > time.time():
+                self._counters['hits'] += 1
+                return dict(entry['cookie'])
+
+            if entry:
+                del self._entries[key]
+            self._counters['misses'] += 1
+            return None
+
+    def put(self, domain, user_agent, cookie):
+        """
+        保存验证凭证
+
+        Args:
+            domain: 域名
+            user_agent: 获取凭证的浏览器User-Agent
+            cookie: cf_clearance cookie
+
+        Returns:
+            bool: 是否保存
+        """
+        if not cookie or cookie.get('name') != CLEARANCE_COOKIE or not cookie.get('value'):
+            return False
+
+        expires = cookie.get('expires') or 0
+        expires_at = expires if expires > 0 else time.time() + self.default_ttl
+        if expires_at - self.expiry_margin <= time.time():
+            return False
+
+        key = (domain, browser_fingerprint(user_agent))
+        with self._lock:
+            current = self._entries.get(key)
+            if current and current['cookie']['value'] == cookie['value']:
+                return False
+
+            self._entries[key] = {
+                'cookie': dict(cookie),
+                'user_agent': user_agent,
+                'expires_at': expires_at
+            }
+            self._counters['stores'] += 1
+
+        logging.info(f"已缓存 {domain} 的Cloudflare验证凭证，剩余有效期 {int(expires_at - time.time())} 秒")
+        return True
+
+    def reject(self, domain, user_agent):
+        """作废注入后仍未通过验证的凭证"""
+        key = (domain, browser_fingerprint(user_agent))
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._counters['rejections'] += 1
+                logging.info(f"{domain} 的Cloudflare验证凭证已失效")
+
+    def stats(self):
+        """获取缓存统计"""
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses']
+            return {
+                **self._counters,
+                'entries': len(self._entries),
+                'hit_rate': round(self._counters['hits'] / lookups, 3) if lookups else 0.0
+            }
+
+
+# 全局凭证缓存实例
+_clearance_store = ClearanceStore()
+
+
+def get_clearance_store():
+    """获取全局Cloudflare验证凭证缓存"""
+    return _clearance_store
@@ -0,0 +1,153 @@
+"""
+被动网络捕获 - 在整个访问过程中记录关键接口的最新响应
+
+在首次访问页面前通过CDP Network事件开始记录，页面自身发出的用户信息、签到等
+接口响应会被保存下来，业务代码直接读取已收到的数据，不需要为了拿到接口响应
+再刷新页面。与driver.listen互不影响，两者可以同时使用。
+"""
+import base64
+import json
+import logging
+import threading
+import time
+
+
+# 默认捕获的接口（名称 -> URL关键字，任一关键字命中即归入该名称）
+DEFAULT_TARGETS = {
+    'user_info': ('api/user/info',),
+    # 签到接口路径未固定，按关键字匹配
+    'checkin': ('checkin', 'check-in', 'api/user/sign'),
+    # 兑换接口同样按关键字匹配
+    'redeem': ('redeem', 'cdkey', 'exchange')
+}
+
+
+class NetworkCapture:
+    """单个标签页的接口响应捕获器（线程安全）"""
+
+    def __init__(self, targets=None):
+        """
+        Args:
+            targets: {名称: URL关键字元组}，默认DEFAULT_TARGETS
+        """
+        self.targets = dict(DEFAULT_TARGETS if targets is None else targets)
+        self._driver = None
+        self._pending = {}
+        self._latest = {}
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    def _match(self, url):
+        """返回URL对应的捕获名称，不需要捕获时返回None"""
+        if '/api/' not in url:
+            return None
+        for name, keywords in self.targets.items():
+            if any(keyword in url for keyword in keywords):
+                return name
+        return None
+
+    def attach(self, page):
+        """
+        在标签页上开始捕获（需在首次访问页面前调用）
+
+        Returns:
+            bool: 是否启用成功
+        """
+        self._driver = page._driver
+        self._driver.set_callback('Network.responseReceived', self._on_response_received)
+        self._driver.set_callback('Network.loadingFinished', self._on_loading_finished)
+        result = self._driver.run('Network.enable')
+        if isinstance(result, dict) and 'error' in result:
+            logging.warning(f"启用网络捕获失败: {result['error']}")
+            self.detach()
+            return False
+        return True
+
+    def detach(self):
+        """停止捕获"""
+        driver, self._driver = self._driver, None
+        if driver is None:
+            return
+
+        driver.set_callback('Network.responseReceived', None)
+        driver.set_callback('Network.loadingFinished', None)
+        try:
+            driver.run('Network.disable')
+        except Exception as e:
+            logging.debug(f"停用网络捕获时出错: {e}")
+
+    def _on_response_received(self, requestId, response, type=None, **kwargs):
+        """记录需要捕获的响应，等待响应体加载完成"""
+        if type not in ('XHR', 'Fetch'):
+            return
+
+        name = self._match(response.get('url', ''))
+        if name:
+            self._pending[requestId] = (name, response.get('url'), response.get('status'))
+
+    def _on_loading_finished(self, requestId, **kwargs):
+        """响应体加载完成后读取并保存"""
+        pending = self._pending.pop(requestId, None)
+        driver = self._driver
+        if not pending or driver is None:
+            return
+
+        name, url, status = pending
+        result = driver.run('Network.getResponseBody', requestId=requestId)
+        if 'error' in result:
+            logging.debug(f"读取接口响应失败 {url}: {result['error']}")
+            return
+
+        body = result.get('body', '')
+        try:
+            if result.get('base64Encoded'):
+                body = base64.b64decode(body).decode('utf-8')
+            body = json.loads(body)
+        except (ValueError, UnicodeDecodeError):
+            return
+
+        with self._cond:
+            self._seq += 1
+            self._latest[name] = {
+                'seq': self._seq,
+                'url': url,
+                'status': status,
+                'body': body,
+                'received_at': time.time()
+            }
+            self._cond.notify_all()
+
+    def marker(self):
+        """当前捕获序号，配合wait_for(after=...)只等待之后收到的响应"""
+        with self._cond:
+            return self._seq
+
+    def latest(self, name):
+        """
+        获取最近一次捕获的响应体
+
+        Returns:
+            dict: 响应体，尚未捕获时返回None
+        """
+        with self._cond:
+            entry = self._latest.get(name)
+            return entry['body'] if entry else None
+
+    def wait_for(self, name, after=0, timeout=5):
+        """
+        等待捕获到序号大于after的响应
+
+        Returns:
+            dict: 响应体，超时返回None
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                entry = self._latest.get(name)
+                if entry and entry['seq'] > after:
+                    return entry['body']
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
@@ -0,0 +1,211 @@
+"""
+页面就绪等待 - 用事件/条件驱动的等待替代固定时长的time.sleep
+
+所有等待都在条件满足时立即返回，超时则返回None/False，由调用方决定后续处理。
+"""
+import json
+import logging
+import time
+from src.infrastructure.browser.selector_probe import SelectorProbe
+
+
+class PollingStrategy:
+    """轮询策略：固定间隔，或按倍数递增到上限（指数退避）"""
+
+    def __init__(self, interval=0.2, factor=1.0, max_interval=None):
+        """
+        Args:
+            interval: 初始轮询间隔（秒）
+            factor: 每次轮询后间隔的增长倍数，1表示固定间隔
+            max_interval: 间隔上限（秒），None表示不设上限
+        """
+        self.interval = interval
+        self.factor = factor
+        self.max_interval = max_interval
+
+    def intervals(self):
+        """生成轮询间隔序列"""
+        interval = self.interval
+        while True:
+            yield interval
+            interval *= self.factor
+            if self.max_interval is not None:
+                interval = min(interval, self.max_interval)
+
+
+# 常用轮询策略
+FAST_POLLING = PollingStrategy(interval=0.1)
+DEFAULT_POLLING = PollingStrategy(interval=0.1, factor=1.5, max_interval=1.0)
+
+
+def poll_until(condition, timeout=10, polling=None):
+    """
+    反复检查条件直到返回真值或超时
+
+    Args:
+        condition: 无参可调用对象，返回真值表示条件满足
+        timeout: 超时时间（秒）
+        polling: 轮询策略，默认DEFAULT_POLLING
+
+    Returns:
+        条件的返回值，超时返回None
+    """
+    polling = polling or DEFAULT_POLLING
+    deadline = time.monotonic() + timeout
+
+    for interval in polling.intervals():
+        try:
+            result = condition()
+            if result:
+                return result
+        except Exception as e:
+            logging.debug(f"等待条件检查出错: {e}")
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(interval, remaining))
+
+
+class PageWaiter:
+    """页面就绪等待器"""
+
+    def __init__(self, driver):
+        """
+        Args:
+            driver: ChromiumPage或ChromiumTab实例
+        """
+        self.driver = driver
+        self.selectors = SelectorProbe(driver)
+
+    def until(self, condition, timeout=10, polling=None):
+        """等待任意条件成立，返回条件的值（超时返回None）"""
+        return poll_until(condition, timeout=timeout, polling=polling)
+
+    def element(self, locators, timeout=10, polling=None, enabled=False):
+        """
+        等待任一候选定位符对应的元素出现
+
+        Args:
+            locators: 定位符或定位符列表，每轮在一次页面脚本中按顺序检查
+            timeout: 超时时间（秒）
+            polling: 轮询策略
+            enabled: 是否跳过disabled元素
+
+        Returns:
+            找到的元素，超时返回None
+        """
+        return self.match(locators, timeout=timeout, polling=polling, enabled=enabled)[1]
+
+    def match(self, locators, timeout=10, polling=None, enabled=False):
+        """
+        等待任一候选定位符命中，同时返回命中的定位符
+
+        Returns:
+            tuple: (定位符, 元素)，超时返回(None, None)
+        """
+        def find():
+            locator, ele = self.selectors.first(locators, enabled=enabled)
+            return (locator, ele) if ele else None
+
+        return self.until(find, timeout=timeout, polling=polling) or (None, None)
+
+    def probe(self, locators, enabled=False):
+        """
+        立即检查整组候选定位符（不等待）
+
+        Returns:
+            list: [(定位符, 元素), ...]，只包含命中的定位符
+        """
+        return self.selectors.probe(locators, enabled=enabled)
+
+    def url_change(self, contains=None, excludes=None, timeout=10, polling=None):
+        """
+        等待URL满足条件（包含contains，且不包含excludes，大小写不敏感）
+
+        Returns:
+            bool: 是否在超时前满足条件
+        """
+        def matched():
+            url = (self.driver.url or '').lower()
+            if contains and contains.lower() not in url:
+                return False
+            if excludes and excludes.lower() in url:
+                return False
+            return True
+
+        return bool(self.until(matched, timeout=timeout, polling=polling))
+
+    def document_ready(self, timeout=10, polling=None):
+        """等待document.readyState为complete"""
+        return bool(self.until(
+            lambda: self.driver.run_js('return document.readyState;') == 'complete',
+            timeout=timeout,
+            polling=polling
+        ))
+
+    def cookie(self, name, timeout=10, polling=None):
+        """
+        等待指定名称的cookie被设置
+
+        Returns:
+            cookie值，超时返回None
+        """
+        def find_cookie():
+            for cookie in self.driver.cookies():
+                if cookie.get('name') == name and cookie.get('value'):
+                    return cookie['value']
+            return None
+
+        return self.until(find_cookie, timeout=timeout, polling=polling)
+
+    def cloudflare_clearance(self, timeout=10, polling=None):
+        """等待Cloudflare验证通过后下发的cf_clearance cookie"""
+        return self.cookie('cf_clearance', timeout=timeout, polling=polling)
+
+    def response(self, timeout=10, predicate=None):
+        """
+        等待监听器捕获到满足条件的响应（需已调用driver.listen.start）
+
+        Args:
+            timeout: 超时时间（秒）
+            predicate: 可选过滤函数，接收数据包返回bool
+
+        Returns:
+            匹配的数据包，超时返回None
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+
+            packet = self.driver.listen.wait(timeout=remaining)
+            if not packet:
+                return None
+            if predicate is None or predicate(packet):
+                return packet
+
+    def json_response(self, timeout=10, predicate=None):
+        """
+        等待监听器捕获到状态码200的JSON响应
+
+        Returns:
+            dict: 响应体，超时或无有效响应返回None
+        """
+        def is_ok(packet):
+            if predicate and not predicate(packet):
+                return False
+            return packet.response is not None and packet.response.status == 200
+
+        packet = self.response(timeout=timeout, predicate=is_ok)
+        if not packet:
+            return None
+
+        body = packet.response.body
+        if isinstance(body, str):
+            try:
+                body = json.loads(body)
+            except ValueError:
+                return None
+        return body if isinstance(body, dict) else None
@@ -0,0 +1,167 @@
+"""
+资源拦截 - 通过CDP Fetch拦截自动化流程不需要的网络请求
+
+登录、签到等流程只需要页面DOM和少量接口请求，图片、字体、媒体以及统计脚本
+都可以直接丢弃，以缩短页面加载时间并节省流量。Cloudflare验证相关的请求在
+白名单中，始终放行。
+
+- URL规则在请求阶段拦截，请求不会发出
+- 资源类型规则在响应头阶段拦截，根据Content-Length统计节省的流量，响应体不会下载
+"""
+import logging
+import threading
+from fnmatch import fnmatchcase
+
+
+# 默认拦截的资源类型（CDP Network.ResourceType）
+DEFAULT_BLOCK_TYPES = ['Image', 'Font', 'Media']
+
+# 默认拦截的URL（统计与广告脚本）
+DEFAULT_BLOCK_PATTERNS = [
+    '*://hm.baidu.com/*',
+    '*://*.google-analytics.com/*',
+    '*://*.googletagmanager.com/*',
+    '*://*.doubleclick.net/*',
+    '*://*.clarity.ms/*'
+]
+
+# 始终放行的URL（Cloudflare验证所需资源）
+DEFAULT_ALLOW_PATTERNS = [
+    '*://challenges.cloudflare.com/*',
+    '*/cdn-cgi/*'
+]
+
+
+class ResourceBlocker:
+    """单个标签页的请求拦截器"""
+
+    def __init__(self, block_types=None, block_patterns=None, allow_patterns=None):
+        """
+        Args:
+            block_types: 拦截的资源类型列表
+            block_patterns: 拦截的URL通配符列表
+            allow_patterns: 始终放行的URL通配符列表（优先于拦截规则）
+        """
+        self.block_types = list(DEFAULT_BLOCK_TYPES if block_types is None else block_types)
+        self.block_patterns = list(DEFAULT_BLOCK_PATTERNS if block_patterns is None else block_patterns)
+        self.allow_patterns = list(DEFAULT_ALLOW_PATTERNS if allow_patterns is None else allow_patterns)
+
+        self._driver = None
+        self._lock = threading.Lock()
+        self._stats = {'requests_blocked': 0, 'bytes_saved': 0, 'requests_allowed': 0, 'by_type': {}}
+
+    def _is_allowed(self, url):
+        """URL是否在白名单中"""
+        return any(fnmatchcase(url, pattern) for pattern in self.allow_patterns)
+
+    @staticmethod
+    def _content_length(headers):
+        """从响应头中读取Content-Length"""
+        for header in headers or []:
+            if header.get('name', '').lower() == 'content-length':
+                try:
+                    return int(header.get('value', 0))
+                except ValueError:
+                    return 0
+        return 0
+
+    def attach(self, page):
+        """
+        在标签页上启用拦截（需在首次访问页面前调用）
+
+        Args:
+            page: ChromiumPage或ChromiumTab
+
+        Returns:
+            bool: 是否启用成功
+        """
+        patterns = [{'urlPattern': pattern, 'requestStage': 'Request'} for pattern in self.block_patterns]
+        patterns += [
+            {'urlPattern': '*', 'resourceType': resource_type, 'requestStage': 'Response'}
+            for resource_type in self.block_types
+        ]
+        if not patterns:
+            return False
+
+        self._driver = page._driver
+        self._driver.set_callback('Fetch.requestPaused', self._on_request_paused, immediate=True)
+        result = self._driver.run('Fetch.enable', patterns=patterns)
+        if isinstance(result, dict) and 'error' in result:
+            logging.warning(f"启用资源拦截失败: {result['error']}")
+            self._driver.set_callback('Fetch.requestPaused', None, immediate=True)
+            self._driver = None
+            return False
+
+        logging.debug(f"已启用资源拦截: 类型 {self.block_types}，URL规则 {len(self.block_patterns)} 条")
+        return True
+
+    def _on_request_paused(self, **params):
+        """处理被暂停的请求：白名单放行，其余直接失败"""
+        driver = self._driver
+        if driver is None:
+            return
+
+        request_id = params['requestId']
+        url = params.get('request', {}).get('url', '')
+
+        if self._is_allowed(url):
+            driver.run('Fetch.continueRequest', requestId=request_id)
+            with self._lock:
+                self._stats['requests_allowed'] += 1
+            return
+
+        driver.run('Fetch.failRequest', requestId=request_id, errorReason='BlockedByClient')
+
+        # 响应阶段暂停的请求才能知道响应体大小
+        size = 0
+        if 'responseStatusCode' in params:
+            size = self._content_length(params.get('responseHeaders'))
+
+        resource_type = params.get('resourceType', 'Other')
+        with self._lock:
+            self._stats['requests_blocked'] += 1
+            self._stats['bytes_saved'] += size
+            self._stats['by_type'][resource_type] = self._stats['by_type'].get(resource_type, 0) + 1
+
+    def detach(self):
+        """
+        停用拦截并将本次统计计入全局统计
+
+        Returns:
+            dict: 本次统计
+        """
+        driver, self._driver = self._driver, None
+        if driver is not None:
+            driver.set_callback('Fetch.requestPaused', None, immediate=True)
+            try:
+                driver.run('Fetch.disable')
+            except Exception as e:
+                logging.debug(f"停用资源拦截时出错: {e}")
+
+        stats = self.stats()
+        _record_totals(stats)
+        return stats
+
+    def stats(self):
+        """获取本次统计"""
+        with self._lock:
+            return {**self._stats, 'by_type': dict(self._stats['by_type'])}
+
+
+# 进程内累计统计
+_totals = {'runs': 0, 'requests_blocked': 0, 'bytes_saved': 0, 'requests_allowed': 0}
+_totals_lock = threading.Lock()
+
+
+def _record_totals(stats):
+    """累计一次拦截统计"""
+    with _totals_lock:
+        _totals['runs'] += 1
+        for key in ('requests_blocked', 'bytes_saved', 'requests_allowed'):
+            _totals[key] += stats.get(key, 0)
+
+
+def get_resource_blocking_stats():
+    """获取进程内累计的资源拦截统计"""
+    with _totals_lock:
+        return dict(_totals)
@@ -0,0 +1,209 @@
+"""
+选择器批量探测 - 在一次页面脚本调用中检查整组候选选择器
+
+逐个调用driver.ele检查候选选择器时，每个选择器都要经过多次CDP往返；
+探测脚本把整组选择器一次性交给页面执行，未命中的选择器不产生额外开销，
+命中时直接返回元素句柄。
+
+支持的定位符（DrissionPage语法的子集）：
+- xpath:/x: XPath表达式
+- css:/c: CSS选择器
+- #id、.class、tag:标签名
+- @属性=值、@属性:值、@属性^值、@属性$值
+- text=文本（完全匹配）、text:文本（包含）
+
+其他定位符无法转换为页面脚本，包含这类定位符时退回逐个调用driver.ele。
+"""
+import json
+import logging
+import re
+
+
+# 参数: arguments[0] 候选选择器JSON [[类型, 表达式], ...]
+#       arguments[1] 是否只返回第一个命中的选择器
+#       arguments[2] 是否跳过disabled元素
+# 返回: 只返回第一个时为 [序号, 元素] 或 null，否则为与候选顺序一致的元素/null数组
+PROBE_JS = """
+const specs = JSON.parse(arguments[0]);
+const firstOnly = arguments[1];
+const enabledOnly = arguments[2];
+const usable = el => el.nodeType === 1 && !(enabledOnly && (el.disabled || el.hasAttribute('disabled')));
+const find = ([kind, expr]) => {
+    try {
+        if (kind === 'xpath') {
+            const snapshot = document.evaluate(expr, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            for (let i = 0; i < snapshot.snapshotLength; i++) {
+                const node = snapshot.snapshotItem(i);
+                if (usable(node)) {
+                    return node;
+                }
+            }
+            return null;
+        }
+        for (const el of document.querySelectorAll(expr)) {
+            if (usable(el)) {
+                return el;
+            }
+        }
+    } catch (e) {
+        // 无效的选择器视为未命中
+    }
+    return null;
+};
+const found = [];
+for (let i = 0; i < specs.length; i++) {
+    const el = find(specs[i]);
+    if (el && firstOnly) {
+        return [i, el];
+    }
+    found.push(el);
+}
+return firstOnly ? null : found;
+"""
+
+# DrissionPage属性匹配方式 -> CSS属性选择器运算符
+_ATTR_OPERATORS = {'=': '=', ':': '*=', '^': '^=', '$': '$='}
+
+
+def _quote(value):
+    """转为带引号的CSS/XPath字符串字面量"""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _attr_spec(text):
+    """转换"属性=值"格式（DrissionPage的@属性语法），无法转换时返回None"""
+    match = re.match(r'([\w-]+)([=:^$])(.*)$', text, re.S)
+    if not match:
+        return None
+    name, operator, value = match.groups()
+    return ['css', f'[{name}{_ATTR_OPERATORS[operator]}{_quote(value)}]']
+
+
+def to_probe_spec(locator):
+    """
+    将定位符转换为探测脚本使用的[类型, 表达式]（匹配规则与DrissionPage一致）
+
+    Returns:
+        list: ['xpath'或'css', 表达式]，无法转换时返回None
+    """
+    for prefix in ('xpath:', 'xpath=', 'x:', 'x='):
+        if locator.startswith(prefix):
+            return ['xpath', locator[len(prefix):]]
+    for prefix in ('css:', 'css=', 'c:', 'c='):
+        if locator.startswith(prefix):
+            return ['css', locator[len(prefix):]]
+
+    if locator.startswith('tag:') and re.fullmatch(r'[\w-]+', locator[4:]):
+        return ['css', locator[4:].lower()]
+    if locator.startswith('text='):
+        return ['xpath', f'//*[text()={_quote(locator[5:])}]']
+    if locator.startswith('text:'):
+        return ['xpath', f'//*[contains(text(), {_quote(locator[5:])})]']
+
+    # DrissionPage中#和.分别是@id=和@class=的简写（完全匹配）
+    if locator.startswith('#') and len(locator) > 1:
+        return ['css', f'[id={_quote(locator[1:])}]']
+    if locator.startswith('.') and len(locator) > 1:
+        return ['css', f'[class={_quote(locator[1:])}]']
+
+    if locator.startswith('@') and not locator.startswith(('@@', '@|', '@!')):
+        return _attr_spec(locator[1:])
+
+    return None
+
+
+class SelectorProbe:
+    """在页面中批量检查候选选择器"""
+
+    def __init__(self, driver):
+        """
+        Args:
+            driver: ChromiumPage或ChromiumTab实例
+        """
+        self.driver = driver
+
+    @staticmethod
+    def compile(locators):
+        """
+        转换整组定位符
+
+        Returns:
+            str: 探测脚本参数（JSON），存在无法转换的定位符时返回None
+        """
+        specs = [to_probe_spec(locator) for locator in locators]
+        if any(spec is None for spec in specs):
+            return None
+        return json.dumps(specs, ensure_ascii=False)
+
+    def first(self, locators, enabled=False):
+        """
+        按顺序返回第一个命中的选择器及其元素
+
+        Args:
+            locators: 定位符或定位符列表
+            enabled: 是否跳过disabled元素
+
+        Returns:
+            tuple: (定位符, 元素)，全部未命中时返回(None, None)
+        """
+        if isinstance(locators, str):
+            locators = [locators]
+
+        specs = self.compile(locators)
+        if specs is None:
+            return self._first_sequential(locators, enabled)
+
+        found = self.driver.run_js(PROBE_JS, specs, True, enabled)
+        if not found:
+            return None, None
+        index, element = found
+        return locators[int(index)], element
+
+    def probe(self, locators, enabled=False):
+        """
+        检查整组选择器，返回所有命中的选择器及其元素
+
+        Args:
+            locators: 定位符列表
+            enabled: 是否跳过disabled元素
+
+        Returns:
+            list: [(定位符, 元素), ...]，按候选顺序排列，只包含命中的选择器
+        """
+        if isinstance(locators, str):
+            locators = [locators]
+
+        specs = self.compile(locators)
+        if specs is None:
+            return self._probe_sequential(locators, enabled)
+
+        found = self.driver.run_js(PROBE_JS, specs, False, enabled) or []
+        return [(locator, element) for locator, element in zip(locators, found) if element]
+
+    def _first_sequential(self, locators, enabled):
+        """逐个检查定位符（存在无法转换为页面脚本的定位符时使用）"""
+        for locator in locators:
+            element = self._find(locator, enabled)
+            if element:
+                return locator, element
+        return None, None
+
+    def _probe_sequential(self, locators, enabled):
+        """逐个检查所有定位符"""
+        matched = []
+        for locator in locators:
+            element = self._find(locator, enabled)
+            if element:
+                matched.append((locator, element))
+        return matched
+
+    def _find(self, locator, enabled):
+        """用driver.ele检查单个定位符"""
+        try:
+            element = self.driver.ele(locator, timeout=0)
+        except Exception as e:
+            logging.debug(f"检查选择器出错 {locator}: {e}")
+            return None
+        if element and enabled and element.attr('disabled') is not None:
+            return None
+        return element or None
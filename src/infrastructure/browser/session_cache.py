@@ -0,0 +1,235 @@
+"""
+登录会话缓存 - 将账号的登录状态（localStorage与cookies）加密保存到磁盘
+
+新的浏览器上下文可以直接恢复已保存的登录状态，只有会话过期或被网站拒绝时
+才需要重新填写登录表单。加密依赖cryptography库，未安装时缓存自动禁用，
+不会以明文保存任何登录凭证。
+"""
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:
+    Fernet = None
+    InvalidToken = Exception
+
+
+# 加密密钥的环境变量名（未设置时使用数据目录下自动生成的密钥文件）
+SESSION_KEY_ENV = 'GPTGOD_SESSION_KEY'
+
+# 匹配JWT格式的令牌
+_JWT_PATTERN = re.compile(r'^[A-Za-z0-9_-]+\.([A-Za-z0-9_-]+)\.[A-Za-z0-9_-]*$')
+
+
+def _jwt_expiry(value):
+    """解析JWT令牌的过期时间（exp），不是JWT或没有exp时返回None"""
+    if not isinstance(value, str):
+        return None
+
+    match = _JWT_PATTERN.match(value.strip().strip('"'))
+    if not match:
+        return None
+
+    try:
+        payload = match.group(1)
+        payload += '=' * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get('exp')
+        return float(exp) if exp else None
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def find_auth_token(local_storage):
+    """
+    从localStorage中找出登录令牌
+
+    优先使用常见的令牌键名，其次使用任意JWT格式的值。
+
+    Returns:
+        str: 令牌，找不到时返回None
+    """
+    for key in ('token', 'access_token', 'accessToken', 'Authorization'):
+        value = local_storage.get(key)
+        if isinstance(value, str) and value.strip('"'):
+            return value.strip('"')
+
+    for value in local_storage.values():
+        if isinstance(value, str) and _JWT_PATTERN.match(value.strip('"')):
+            return value.strip('"')
+    return None
+
+
+class SessionCache:
+    """账号登录会话缓存
+
+    每个(域名, 邮箱)对应一个加密文件，内容包括cookies、localStorage、
+    保存时间和过期时间。过期时间取保存时间 + max_age与localStorage中
+    JWT令牌exp的较早者；已过期的单个cookie在恢复时跳过。
+    """
+
+    def __init__(self, data_dir='accounts_data', max_age=259200):
+        """
+        Args:
+            data_dir: 数据存储目录
+            max_age: 会话最长有效期（秒）
+        """
+        self.data_dir = Path(data_dir)
+        self.cache_dir = self.data_dir / 'sessions'
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._fernet = None
+
+        if Fernet is None:
+            logging.warning("未安装cryptography库，登录会话缓存已禁用")
+            return
+
+        try:
+            self._fernet = Fernet(self._load_key())
+            self.cache_dir.mkdir(exist_ok=True, parents=True)
+        except Exception as e:
+            logging.error(f"初始化登录会话缓存失败，缓存已禁用: {e}")
+            self._fernet = None
+
+    @property
+    def enabled(self):
+        """缓存是否可用"""
+        return self._fernet is not None
+
+    def _load_key(self):
+        """读取加密密钥：优先环境变量，其次密钥文件，都没有则生成新密钥文件"""
+        key = os.environ.get(SESSION_KEY_ENV)
+        if key:
+            return key.encode()
+
+        key_file = self.data_dir / '.session_key'
+        if key_file.exists():
+            return key_file.read_bytes().strip()
+
+        self.data_dir.mkdir(exist_ok=True, parents=True)
+        key = Fernet.generate_key()
+        key_file.write_bytes(key)
+        try:
+            os.chmod(key_file, 0o600)
+        except OSError:
+            pass
+        logging.info(f"已生成登录会话加密密钥: {key_file}")
+        return key
+
+    def _path(self, domain, email):
+        """会话文件路径（文件名不包含明文邮箱）"""
+        digest = hashlib.sha256(f"{domain}|{email.lower()}".encode()).hexdigest()[:32]
+        return self.cache_dir / f"{digest}.session"
+
+    def _expires_at(self, state):
+        """计算会话的过期时间戳"""
+        expiries = [state['saved_at'] + self.max_age]
+
+        for value in state.get('local_storage', {}).values():
+            exp = _jwt_expiry(value)
+            if exp:
+                expiries.append(exp)
+
+        return min(expiries)
+
+    def load(self, domain, email):
+        """
+        读取有效的登录会话
+
+        Returns:
+            dict: {'cookies': list, 'local_storage': dict, 'user_agent', 'saved_at', 'expires_at'}，
+                  不存在、已过期或无法解密时返回None
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(domain, email)
+        try:
+            with self._lock:
+                if not path.exists():
+                    return None
+                token = path.read_bytes()
+            state = json.loads(self._fernet.decrypt(token))
+        except (InvalidToken, ValueError, OSError) as e:
+            logging.warning(f"登录会话缓存无法读取，已丢弃: {email} ({e})")
+            self.invalidate(domain, email)
+            return None
+
+        if state.get('expires_at', 0) <= time.time():
+            logging.info(f"登录会话缓存已过期: {email}")
+            self.invalidate(domain, email)
+            return None
+
+        return state
+
+    def save(self, domain, email, cookies, local_storage, user_agent=None):
+        """
+        加密保存登录会话
+
+        Args:
+            domain: 域名
+            email: 邮箱
+            cookies: cookies列表（包含name/value/domain/path/expires等字段）
+            local_storage: localStorage键值对
+            user_agent: 浏览器User-Agent（cf_clearance与UA绑定，HTTP客户端需使用相同UA）
+
+        Returns:
+            bool: 是否保存成功
+        """
+        if not self.enabled:
+            return False
+
+        state = {
+            'cookies': list(cookies or []),
+            'local_storage': dict(local_storage or {}),
+            'user_agent': user_agent,
+            'saved_at': time.time()
+        }
+        state['expires_at'] = self._expires_at(state)
+
+        if state['expires_at'] <= time.time():
+            logging.debug(f"登录会话已过期，不缓存: {email}")
+            return False
+
+        try:
+            token = self._fernet.encrypt(json.dumps(state).encode())
+            path = self._path(domain, email)
+            tmp_path = path.with_suffix('.tmp')
+            with self._lock:
+                tmp_path.write_bytes(token)
+                os.replace(tmp_path, path)
+            return True
+        except Exception as e:
+            logging.error(f"保存登录会话缓存失败: {e}")
+            return False
+
+    def invalidate(self, domain, email):
+        """删除账号的登录会话缓存"""
+        with self._lock:
+            try:
+                self._path(domain, email).unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.debug(f"删除登录会话缓存失败: {e}")
+
+
+# 全局会话缓存实例
+_session_cache = None
+_session_cache_lock = threading.Lock()
+
+
+def get_session_cache(max_age=259200):
+    """获取全局登录会话缓存实例"""
+    global _session_cache
+    with _session_cache_lock:
+        if _session_cache is None:
+            _session_cache = SessionCache(max_age=max_age)
+        return _session_cache
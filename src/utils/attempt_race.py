@@ -0,0 +1,92 @@
+"""
+并行尝试协调
+同一账号在多个域名上同时尝试时，保证不可重复的操作（如点击签到）只执行一次，
+并让落后的尝试在下一个检查点放弃。
+"""
+import threading
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Optional
+
+
+class AttemptRace:
+    """同一任务在多个域名上的并行尝试（线程安全）
+
+    - claim(): 第一个到达不可重复操作的尝试取得执行权，其他尝试必须放弃
+    - finish(): 第一个成功结束的尝试成为赢家；持有执行权的尝试失败时释放执行权，
+      其他尝试可以继续
+    - lost(): 已有其他尝试取得执行权或胜出时返回True，落后的尝试在检查点调用后放弃
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._owner = None
+        self._winner = None
+        # 首个尝试登录成功或结束时触发，用于判断是否需要发起对冲尝试
+        self.progressed = threading.Event()
+
+    def mark_progress(self) -> None:
+        """记录尝试已登录成功（或已结束）"""
+        self.progressed.set()
+
+    def claim(self, attempt: str) -> bool:
+        """
+        取得不可重复操作的执行权
+
+        Args:
+            attempt: 尝试标识（域名）
+
+        Returns:
+            bool: 是否取得执行权（已被其他尝试取得时返回False）
+        """
+        with self._lock:
+            if self._owner is None and self._winner in (None, attempt):
+                self._owner = attempt
+            return self._owner == attempt
+
+    def finish(self, attempt: str, success: bool) -> bool:
+        """
+        记录尝试结束
+
+        Returns:
+            bool: 该尝试是否为赢家
+        """
+        with self._lock:
+            if success and self._winner is None:
+                self._winner = attempt
+            elif not success and self._owner == attempt:
+                self._owner = None
+            return self._winner == attempt
+
+    def lost(self, attempt: str) -> bool:
+        """是否已有其他尝试取得执行权或胜出"""
+        with self._lock:
+            return (self._owner not in (None, attempt)) or (self._winner not in (None, attempt))
+
+    @property
+    def winner(self) -> Optional[str]:
+        """胜出的尝试标识"""
+        with self._lock:
+            return self._winner
+
+
+def collect_attempts(futures):
+    """
+    收集并行尝试的结果，直到收集到成功的结果或所有尝试都已结束
+
+    尝试在调用finish()之后才返回结果，不能用AttemptRace.winner作为停止条件，
+    否则落后的尝试先结束时，赢家的结果还没有收集到。
+
+    Args:
+        futures: 各尝试的Future，结果为包含success（以及可选abandoned）的字典
+
+    Returns:
+        tuple: (未放弃的结果列表, 被放弃的结果列表, 仍未结束的Future集合)
+    """
+    results, abandoned = [], []
+    pending = set(futures)
+    while pending and not any(result['success'] for result in results):
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            result = future.result()
+            (abandoned if result.get('abandoned') else results).append(result)
+    return results, abandoned, pending
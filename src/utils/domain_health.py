@@ -0,0 +1,270 @@
+"""
+域名健康状态
+记录每个域名的登录耗时、错误类型和Cloudflare验证情况，用熔断器暂停向故障域名
+分配账号，并在开启自动切换时优先使用最快的健康域名。
+登录耗时估计保存到数据库，新进程启动时加载。
+"""
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+
+class CircuitState:
+    """熔断器状态"""
+    CLOSED = 'closed'        # 正常
+    OPEN = 'open'            # 熔断中，不分配账号
+    HALF_OPEN = 'half_open'  # 冷却结束，允许一次试探
+
+
+class DomainHealthTracker:
+    """域名健康跟踪器（线程安全）
+
+    - 域名级错误（页面无法打开、Cloudflare验证失败、访问异常）连续达到阈值后熔断，
+      冷却期结束后放行一次试探，试探成功恢复，失败继续熔断
+    - 账号级错误（如账号密码被拒绝）说明域名可以访问，只计入错误统计，不触发熔断
+    - 登录耗时及其偏差使用指数滑动平均，用于挑选最快的域名和估计登录耗时上限；
+      提供store时启动时加载历史估计，每次更新后保存
+    """
+
+    # 计入熔断的域名级错误
+    DOMAIN_ERRORS = ('page_unavailable', 'cf_failed', 'exception')
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 300, latency_alpha: float = 0.3,
+                 store=None):
+        """
+        Args:
+            failure_threshold: 连续域名级错误达到多少次后熔断
+            cooldown: 熔断冷却时间（秒）
+            latency_alpha: 登录耗时滑动平均中本次结果的权重
+            store: 登录耗时估计的持久化存储（提供load()和save(domain, latency, latency_dev)），None表示只保存在内存
+        """
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown = cooldown
+        self.latency_alpha = latency_alpha
+        self.store = store
+        self._lock = threading.Lock()
+        self._domains: Dict[str, dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """从存储加载各域名的登录耗时估计"""
+        if self.store is None:
+            return
+        try:
+            estimates = self.store.load()
+        except Exception as e:
+            logging.warning(f"加载域名登录耗时失败: {e}")
+            return
+
+        with self._lock:
+            for domain, estimate in estimates.items():
+                entry = self._entry(domain)
+                entry['latency'] = estimate['latency']
+                entry['latency_dev'] = estimate['latency_dev']
+
+    def _entry(self, domain: str) -> dict:
+        """获取域名状态（调用方需持有锁）"""
+        entry = self._domains.get(domain)
+        if entry is None:
+            entry = self._domains[domain] = {
+                'state': CircuitState.CLOSED,
+                'opened_at': None,
+                'trial_in_flight': False,
+                'trial_started_at': None,
+                'consecutive_failures': 0,
+                'attempts': 0,
+                'successes': 0,
+                'failures': 0,
+                'errors': {},
+                'latency': None,
+                'latency_dev': 0.0,
+                'challenges': 0,
+                'challenges_passed': 0,
+                'last_error': None,
+                'last_success_at': None
+            }
+        return entry
+
+    def _refresh_state(self, entry: dict) -> None:
+        """冷却期结束的熔断转为半开（调用方需持有锁）"""
+        if entry['state'] == CircuitState.OPEN and time.monotonic() - entry['opened_at'] >= self.cooldown:
+            entry['state'] = CircuitState.HALF_OPEN
+            entry['trial_in_flight'] = False
+
+    def allow(self, domain: str) -> bool:
+        """
+        是否可以向该域名分配账号（半开状态下只放行一次试探，试探超过冷却时间
+        仍未记录结果时再放行一次）
+
+        Returns:
+            bool: 是否放行
+        """
+        with self._lock:
+            entry = self._entry(domain)
+            self._refresh_state(entry)
+            if entry['state'] == CircuitState.CLOSED:
+                return True
+            if entry['state'] == CircuitState.HALF_OPEN:
+                now = time.monotonic()
+                if not entry['trial_in_flight'] or now - entry['trial_started_at'] >= self.cooldown:
+                    entry['trial_in_flight'] = True
+                    entry['trial_started_at'] = now
+                    return True
+            return False
+
+    def record_success(self, domain: str, latency: Optional[float] = None) -> None:
+        """
+        记录一次成功登录
+
+        Args:
+            domain: 域名
+            latency: 登录耗时（秒）
+        """
+        with self._lock:
+            entry = self._entry(domain)
+            entry['attempts'] += 1
+            entry['successes'] += 1
+            entry['last_success_at'] = time.time()
+            if latency is not None:
+                if entry['latency'] is None:
+                    entry['latency'] = latency
+                    entry['latency_dev'] = latency / 2
+                else:
+                    error = latency - entry['latency']
+                    entry['latency'] += self.latency_alpha * error
+                    entry['latency_dev'] += self.latency_alpha * (abs(error) - entry['latency_dev'])
+            self._close(entry)
+            estimate = (entry['latency'], entry['latency_dev'])
+
+        if latency is not None and self.store is not None:
+            self.store.save(domain, *estimate)
+
+    def expected_login_time(self, domain: str) -> Optional[float]:
+        """
+        预计的登录耗时上限（平均耗时加4倍平均偏差），没有历史数据时返回None
+
+        Returns:
+            float: 秒
+        """
+        with self._lock:
+            entry = self._domains.get(domain)
+            if not entry or entry['latency'] is None:
+                return None
+            return entry['latency'] + 4 * entry['latency_dev']
+
+    def record_failure(self, domain: str, error: str) -> None:
+        """
+        记录一次失败
+
+        Args:
+            domain: 域名
+            error: 错误类型，DOMAIN_ERRORS中的错误计入熔断
+        """
+        with self._lock:
+            entry = self._entry(domain)
+            entry['attempts'] += 1
+            entry['failures'] += 1
+            entry['errors'][error] = entry['errors'].get(error, 0) + 1
+            entry['last_error'] = error
+
+            if error not in self.DOMAIN_ERRORS:
+                # 账号级错误说明域名可以正常访问
+                self._close(entry)
+                return
+
+            entry['consecutive_failures'] += 1
+            if entry['state'] == CircuitState.HALF_OPEN or entry['consecutive_failures'] >= self.failure_threshold:
+                entry['state'] = CircuitState.OPEN
+                entry['opened_at'] = time.monotonic()
+                entry['trial_in_flight'] = False
+
+    def record_challenge(self, domain: str, passed: bool) -> None:
+        """记录一次Cloudflare验证及其结果"""
+        with self._lock:
+            entry = self._entry(domain)
+            entry['challenges'] += 1
+            if passed:
+                entry['challenges_passed'] += 1
+
+    @staticmethod
+    def _close(entry: dict) -> None:
+        """恢复正常状态（调用方需持有锁）"""
+        entry['state'] = CircuitState.CLOSED
+        entry['opened_at'] = None
+        entry['trial_in_flight'] = False
+        entry['consecutive_failures'] = 0
+
+    def rank(self, domains: List[str], auto_switch: bool = True) -> List[str]:
+        """
+        按健康状态排列域名
+
+        未熔断的域名排在前面；开启auto_switch时未熔断的域名按登录耗时从快到慢排列
+        （没有耗时数据的域名保持配置顺序，排在有数据的域名之后）。
+        熔断中的域名放在最后，按冷却结束时间排列；是否向域名分配账号由allow()决定。
+
+        Returns:
+            list: 排序后的域名列表
+        """
+        with self._lock:
+            healthy, tripped = [], []
+            for index, domain in enumerate(domains):
+                entry = self._entry(domain)
+                self._refresh_state(entry)
+                if entry['state'] == CircuitState.OPEN:
+                    tripped.append((entry['opened_at'], index, domain))
+                elif auto_switch:
+                    latency = entry['latency']
+                    healthy.append(((latency is None, latency or 0, index), domain))
+                else:
+                    healthy.append(((index,), domain))
+
+        healthy.sort(key=lambda item: item[0])
+        tripped.sort()
+        return [domain for _, domain in healthy] + [domain for _, _, domain in tripped]
+
+    def snapshot(self) -> Dict[str, dict]:
+        """获取所有域名的健康状态（用于接口展示）"""
+        with self._lock:
+            now = time.monotonic()
+            result = {}
+            for domain, entry in self._domains.items():
+                self._refresh_state(entry)
+                retry_in = None
+                if entry['state'] == CircuitState.OPEN:
+                    retry_in = round(max(0.0, self.cooldown - (now - entry['opened_at'])), 1)
+                result[domain] = {
+                    'state': entry['state'],
+                    'retry_in': retry_in,
+                    'consecutive_failures': entry['consecutive_failures'],
+                    'attempts': entry['attempts'],
+                    'successes': entry['successes'],
+                    'failures': entry['failures'],
+                    'errors': dict(entry['errors']),
+                    'last_error': entry['last_error'],
+                    'avg_login_seconds': round(entry['latency'], 2) if entry['latency'] is not None else None,
+                    'challenges': entry['challenges'],
+                    'challenge_rate': round(entry['challenges'] / entry['attempts'], 3) if entry['attempts'] else None,
+                    'challenge_pass_rate': (
+                        round(entry['challenges_passed'] / entry['challenges'], 3) if entry['challenges'] else None
+                    ),
+                    'last_success_at': entry['last_success_at']
+                }
+            return result
+
+
+# 进程内共享的域名健康状态
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_domain_health(failure_threshold: int = 3, cooldown: float = 300) -> DomainHealthTracker:
+    """获取全局域名健康跟踪器（参数只在首次创建时生效，登录耗时估计保存在数据库中）"""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            from src.data.repositories.domain_health_repository import DomainHealthRepository
+            _tracker = DomainHealthTracker(
+                failure_threshold=failure_threshold, cooldown=cooldown, store=DomainHealthRepository()
+            )
+        return _tracker
@@ -0,0 +1,47 @@
+"""
+限流工具
+为并发签到等批量任务提供按域名的请求间隔控制
+"""
+import threading
+import time
+from typing import Dict
+
+
+class DomainRateLimiter:
+    """按域名限流器（线程安全）
+
+    保证同一域名相邻两次任务的启动间隔不小于min_interval秒，
+    不同域名之间互不影响。
+    """
+
+    def __init__(self, min_interval: float = 2.0):
+        """
+        初始化限流器
+
+        Args:
+            min_interval: 同一域名两次任务之间的最小间隔（秒）
+        """
+        self.min_interval = max(0.0, float(min_interval))
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def acquire(self, domain: str) -> float:
+        """
+        预约该域名的下一个可用时间片，并阻塞等待到该时间片
+
+        Args:
+            domain: 域名
+
+        Returns:
+            实际等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = slot + self.min_interval
+
+        wait_seconds = slot - time.monotonic()
+        if wait_seconds > 0:
+            time.sleep(wait_seconds)
+            return wait_seconds
+        return 0.0
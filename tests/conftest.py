@@ -0,0 +1,19 @@
+"""
+测试公共fixture
+"""
+import pytest
+
+from src.data.database import UnifiedDatabaseManager
+
+
+@pytest.fixture
+def temp_db(tmp_path):
+    """将统一数据库管理器单例指向临时数据库，测试结束后恢复"""
+    previous = UnifiedDatabaseManager._instance
+    UnifiedDatabaseManager._instance = None
+    db = UnifiedDatabaseManager(str(tmp_path / 'test.db'))
+    try:
+        yield db
+    finally:
+        db.close_all()
+        UnifiedDatabaseManager._instance = previous
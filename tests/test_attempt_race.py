@@ -0,0 +1,120 @@
+"""
+AttemptRace测试
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.attempt_race import AttemptRace, collect_attempts
+
+
+def test_first_claim_wins():
+    """第一个尝试取得执行权，另一个尝试判定为落后"""
+    race = AttemptRace()
+    assert race.claim('primary')
+    assert race.claim('primary')
+    assert not race.claim('backup')
+    assert race.lost('backup')
+    assert not race.lost('primary')
+
+
+def test_winner_blocks_other_attempts():
+    """成功结束的尝试成为赢家，其他尝试不能再取得执行权"""
+    race = AttemptRace()
+    assert race.claim('primary')
+    assert race.finish('primary', True)
+    assert race.winner == 'primary'
+    assert race.lost('backup')
+    assert not race.claim('backup')
+    assert not race.finish('backup', True)
+
+
+def test_failed_owner_releases_claim():
+    """持有执行权的尝试失败后释放执行权，另一个尝试可以继续签到"""
+    race = AttemptRace()
+    assert race.claim('primary')
+    assert race.lost('backup')
+
+    assert not race.finish('primary', False)
+    assert race.winner is None
+    assert not race.lost('backup')
+    assert race.claim('backup')
+    assert race.finish('backup', True)
+    assert race.winner == 'backup'
+
+
+def test_failed_non_owner_keeps_claim():
+    """没有执行权的尝试失败不影响当前持有者"""
+    race = AttemptRace()
+    assert race.claim('primary')
+    race.finish('backup', False)
+    assert race.lost('backup')
+    assert not race.claim('backup')
+
+
+def test_mark_progress():
+    """mark_progress触发progressed事件"""
+    race = AttemptRace()
+    assert not race.progressed.is_set()
+    race.mark_progress()
+    assert race.progressed.wait(0)
+
+
+def test_collect_waits_for_winner_result():
+    """赢家已finish但结果晚于落后的尝试返回时，仍要收集到赢家的结果"""
+    race = AttemptRace()
+    finished = threading.Event()
+    release = threading.Event()
+
+    def winner():
+        assert race.claim('backup')
+        race.finish('backup', True)
+        finished.set()
+        # 落后的尝试结束之后赢家才返回结果
+        release.wait(5)
+        return {'domain': 'backup', 'success': True}
+
+    def loser():
+        finished.wait(5)
+        assert race.lost('primary')
+        release.set()
+        return {'domain': 'primary', 'success': False, 'abandoned': True}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(loser), executor.submit(winner)]
+        results, abandoned, pending = collect_attempts(futures)
+
+    assert [result['domain'] for result in results] == ['backup']
+    assert [result['domain'] for result in abandoned] == ['primary']
+    assert not pending
+
+
+def test_collect_stops_after_success():
+    """收集到成功的结果后不再等待其他尝试"""
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return {'domain': 'primary', 'success': False}
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        slow_future = executor.submit(slow)
+        fast_future = executor.submit(lambda: {'domain': 'backup', 'success': True})
+        results, abandoned, pending = collect_attempts([slow_future, fast_future])
+        release.set()
+
+    assert [result['domain'] for result in results] == ['backup']
+    assert pending == {slow_future}
+
+
+def test_collect_all_failed():
+    """所有尝试都失败时等待全部结束"""
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(lambda: {'domain': 'primary', 'success': False}),
+            executor.submit(lambda: {'domain': 'backup', 'success': False, 'abandoned': True})
+        ]
+        results, abandoned, pending = collect_attempts(futures)
+
+    assert [result['domain'] for result in results] == ['primary']
+    assert [result['domain'] for result in abandoned] == ['backup']
+    assert not pending
@@ -0,0 +1,162 @@
+"""
+CheckinLoggerDB缓冲写入、统计缓存与签到日测试
+"""
+from datetime import datetime
+
+import pytest
+
+from src.data.repositories.checkin_repository import CheckinLoggerDB
+
+
+@pytest.fixture
+def logger(temp_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(CheckinLoggerDB, '_writers', {})
+    CheckinLoggerDB.invalidate_statistics()
+    yield CheckinLoggerDB(data_dir=str(tmp_path))
+    CheckinLoggerDB.invalidate_statistics()
+
+
+def log_count(logger, session_id):
+    return logger.db.execute_one(
+        'SELECT COUNT(*) FROM account_checkin_logs WHERE session_id = ?', (session_id,)
+    )[0]
+
+
+def session_counters(logger, session_id):
+    row = logger.db.execute_one('''
+        SELECT total_accounts, success_count, failed_count, already_checked_count, status
+        FROM checkin_sessions WHERE id = ?
+    ''', (session_id,))
+    return tuple(row)
+
+
+def test_writer_buffers_until_close(logger):
+    """开启写入器后结果先缓冲，close()时写入"""
+    session_id = logger.log_checkin_start()
+    writer = logger.open_result_writer(session_id, flush_size=10, flush_interval=3600)
+
+    logger.log_account_result(session_id, 'a@test.com', 'success', points=2000)
+    logger.log_account_result(session_id, 'b@test.com', 'failed', message='登录失败')
+    assert log_count(logger, session_id) == 0
+
+    writer.close()
+    assert log_count(logger, session_id) == 2
+    assert session_id not in CheckinLoggerDB._writers
+
+    # 关闭后直接写入
+    logger.log_account_result(session_id, 'c@test.com', 'already_checked')
+    assert log_count(logger, session_id) == 3
+
+
+def test_writer_flushes_when_full(logger):
+    """缓冲达到flush_size条时写入"""
+    session_id = logger.log_checkin_start()
+    logger.open_result_writer(session_id, flush_size=2, flush_interval=3600)
+
+    logger.log_account_result(session_id, 'a@test.com', 'success')
+    assert log_count(logger, session_id) == 0
+    logger.log_account_result(session_id, 'b@test.com', 'success')
+    assert log_count(logger, session_id) == 2
+
+
+def test_checkin_end_flushes_writer(logger):
+    """log_checkin_end先写入缓冲结果，再结束会话"""
+    session_id = logger.log_checkin_start()
+    logger.open_result_writer(session_id, flush_size=10, flush_interval=3600)
+    logger.log_account_result(session_id, 'a@test.com', 'success', points=2000)
+    logger.log_account_result(session_id, 'b@test.com', 'already_checked')
+
+    logger.log_checkin_end(session_id)
+    assert log_count(logger, session_id) == 2
+    assert session_counters(logger, session_id) == (2, 1, 0, 1, 'completed')
+    assert session_id not in CheckinLoggerDB._writers
+
+
+def test_write_results_updates_statistics(logger):
+    """批量写入累加账号统计和会话计数"""
+    first = logger.log_checkin_start()
+    logger._write_results(first, [
+        ('a@test.com', '2024-01-01T08:00:00', 'success', '', 2000, 'gptgod.online'),
+        ('b@test.com', '2024-01-01T08:01:00', 'failed', '登录失败', 0, 'gptgod.online'),
+        ('a@test.com', '2024-01-01T08:02:00', 'failed', '超时', 0, 'gptgod.work')
+    ])
+    second = logger.log_checkin_start()
+    logger._write_results(second, [
+        ('a@test.com', '2024-01-02T08:00:00', 'success', '', 2000, 'gptgod.online')
+    ])
+
+    assert session_counters(logger, first) == (3, 1, 2, 0, 'running')
+    assert session_counters(logger, second) == (1, 1, 0, 0, 'running')
+
+    stats = {item['email']: item for item in logger.get_account_statistics()}
+    assert stats['a@test.com']['total_checkins'] == 3
+    assert stats['a@test.com']['successful_checkins'] == 2
+    assert stats['a@test.com']['failed_checkins'] == 1
+    assert stats['a@test.com']['total_points'] == 4000
+    assert stats['a@test.com']['last_checkin'] == '2024-01-02T08:00:00'
+    assert stats['b@test.com']['failed_checkins'] == 1
+    first_checkin = logger.db.execute_one(
+        'SELECT first_checkin FROM account_statistics WHERE email = ?', ('a@test.com',)
+    )[0]
+    assert first_checkin == '2024-01-01T08:00:00'
+
+
+def test_statistics_cache_invalidated_by_write(logger):
+    """统计在缓存有效期内复用，签到写入后重新计算"""
+    session_id = logger.log_checkin_start()
+    logger.log_account_result(session_id, 'a@test.com', 'success', points=2000)
+    logger.log_checkin_end(session_id)
+
+    stats = logger.get_statistics()
+    assert stats['all_time']['successful_checkins'] == 1
+    assert stats['today']['sessions'] == 1
+
+    # 绕过日志记录器直接修改数据库时仍返回缓存
+    logger.db.execute('UPDATE checkin_sessions SET success_count = 5 WHERE id = ?', (session_id,))
+    assert logger.get_statistics()['all_time']['successful_checkins'] == 1
+
+    # 返回的是副本，修改不影响缓存
+    stats['all_time']['successful_checkins'] = 100
+    assert logger.get_statistics()['all_time']['successful_checkins'] == 1
+
+    logger.log_account_result(session_id, 'b@test.com', 'success', points=2000)
+    stats = logger.get_statistics()
+    assert stats['all_time']['successful_checkins'] == 6
+    assert stats['all_time']['total_points_earned'] == 4000
+
+
+@pytest.mark.parametrize('now, reset_hour, expected', [
+    (datetime(2024, 1, 2, 10, 30), 0, datetime(2024, 1, 2, 0, 0)),
+    (datetime(2024, 1, 2, 10, 30), 8, datetime(2024, 1, 2, 8, 0)),
+    (datetime(2024, 1, 2, 8, 0), 8, datetime(2024, 1, 2, 8, 0)),
+    (datetime(2024, 1, 2, 7, 59), 8, datetime(2024, 1, 1, 8, 0)),
+])
+def test_checkin_day_start(now, reset_hour, expected):
+    """签到日从reset_hour点开始，之前的时间属于前一个签到日"""
+    assert CheckinLoggerDB.checkin_day_start(reset_hour, now=now) == expected
+
+
+def test_daily_status_respects_reset_hour(logger):
+    """只返回当前签到日内成功或已签到的账号，取最近一条记录"""
+    session_id = logger.log_checkin_start()
+    logger._write_results(session_id, [
+        ('a@test.com', '2024-01-01T23:00:00', 'success', '', 2000, 'gptgod.online'),
+        ('b@test.com', '2024-01-02T05:00:00', 'failed', '登录失败', 0, 'gptgod.online'),
+        ('c@test.com', '2024-01-02T06:00:00', 'success', '', 2000, 'gptgod.online'),
+        ('c@test.com', '2024-01-02T09:00:00', 'already_checked', '', 0, 'gptgod.work'),
+        ('d@test.com', '2024-01-02T09:30:00', 'success', '', 2000, 'gptgod.online')
+    ])
+
+    # 8点重置：9点之后只有c、d算作当天已签到
+    status = logger.get_daily_status(CheckinLoggerDB.checkin_day_start(8, now=datetime(2024, 1, 2, 10, 0)))
+    assert set(status) == {'c@test.com', 'd@test.com'}
+    assert status['c@test.com']['status'] == 'already_checked'
+    assert status['c@test.com']['domain'] == 'gptgod.work'
+
+    # 0点重置：前一天23点的签到不计入
+    status = logger.get_daily_status(CheckinLoggerDB.checkin_day_start(0, now=datetime(2024, 1, 2, 10, 0)))
+    assert set(status) == {'c@test.com', 'd@test.com'}
+
+    # 8点重置且当前为7点：签到日从前一天8点开始
+    status = logger.get_daily_status(CheckinLoggerDB.checkin_day_start(8, now=datetime(2024, 1, 2, 7, 0)))
+    assert set(status) == {'a@test.com', 'c@test.com', 'd@test.com'}
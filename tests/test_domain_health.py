@@ -0,0 +1,79 @@
+"""
+DomainHealthTracker测试
+"""
+import pytest
+
+from src.utils.domain_health import DomainHealthTracker
+
+
+def test_expected_login_time_without_history():
+    """没有登录耗时数据时返回None"""
+    tracker = DomainHealthTracker()
+    assert tracker.expected_login_time('a.test') is None
+
+    tracker.record_failure('a.test', 'page_unavailable')
+    tracker.record_success('a.test')
+    assert tracker.expected_login_time('a.test') is None
+
+
+def test_expected_login_time_first_sample():
+    """第一次登录耗时作为平均值，偏差取一半"""
+    tracker = DomainHealthTracker()
+    tracker.record_success('a.test', latency=10)
+    assert tracker.expected_login_time('a.test') == pytest.approx(10 + 4 * 5)
+
+
+def test_expected_login_time_moving_average():
+    """后续耗时按指数滑动平均更新平均值和偏差"""
+    tracker = DomainHealthTracker(latency_alpha=0.5)
+    tracker.record_success('a.test', latency=10)
+    tracker.record_success('a.test', latency=20)
+    # 平均值 10 + 0.5 * 10 = 15，偏差 5 + 0.5 * (10 - 5) = 7.5
+    assert tracker.expected_login_time('a.test') == pytest.approx(15 + 4 * 7.5)
+
+
+def test_expected_login_time_converges_for_stable_latency():
+    """耗时稳定时偏差逐渐收敛，预计耗时接近平均值"""
+    tracker = DomainHealthTracker()
+    for _ in range(50):
+        tracker.record_success('a.test', latency=8)
+    assert tracker.expected_login_time('a.test') == pytest.approx(8, abs=0.01)
+
+
+def test_expected_login_time_per_domain():
+    """各域名的耗时互不影响"""
+    tracker = DomainHealthTracker()
+    tracker.record_success('a.test', latency=4)
+    assert tracker.expected_login_time('b.test') is None
+    assert tracker.expected_login_time('a.test') == pytest.approx(4 + 4 * 2)
+
+
+class MemoryStore:
+    """保存在内存中的登录耗时存储"""
+
+    def __init__(self, estimates=None):
+        self.estimates = dict(estimates or {})
+
+    def load(self):
+        return {domain: dict(estimate) for domain, estimate in self.estimates.items()}
+
+    def save(self, domain, latency, latency_dev):
+        self.estimates[domain] = {'latency': latency, 'latency_dev': latency_dev}
+
+
+def test_estimates_loaded_from_store():
+    """新的跟踪器从存储加载历史登录耗时"""
+    store = MemoryStore({'a.test': {'latency': 6, 'latency_dev': 1}})
+    tracker = DomainHealthTracker(store=store)
+    assert tracker.expected_login_time('a.test') == pytest.approx(6 + 4 * 1)
+    assert tracker.rank(['b.test', 'a.test']) == ['a.test', 'b.test']
+
+
+def test_estimates_saved_to_store():
+    """登录耗时更新后保存，下一个进程可以继续使用"""
+    store = MemoryStore()
+    DomainHealthTracker(store=store).record_success('a.test', latency=10)
+    assert store.estimates['a.test'] == {'latency': 10, 'latency_dev': 5}
+
+    tracker = DomainHealthTracker(store=store)
+    assert tracker.expected_login_time('a.test') == pytest.approx(10 + 4 * 5)
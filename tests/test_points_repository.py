@@ -0,0 +1,155 @@
+"""
+PointsHistoryManager批量导入与汇总表测试
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.data.repositories.points_repository import PointsHistoryManager
+
+EMAIL = 'a@test.com'
+UID = 1001
+
+
+def make_record(record_id, tokens=10, source='checkin', remark='', create_time='2024-01-01 08:00:00', uid=UID):
+    return {
+        'id': record_id,
+        'uid': uid,
+        'tokens': tokens,
+        'source': source,
+        'remark': remark,
+        'create_time': create_time
+    }
+
+
+@pytest.fixture
+def manager(temp_db, monkeypatch):
+    monkeypatch.setattr(PointsHistoryManager, '_rollups_checked', False)
+    return PointsHistoryManager()
+
+
+def rollup_statistics(manager):
+    """从汇总表得到的全局统计"""
+    return PointsHistoryManager.summarize_rollups(manager.get_account_rollups())
+
+
+def daily_from_history(manager):
+    """直接从points_history计算的每日汇总"""
+    rows = manager.db.execute('''
+        SELECT uid, DATE(create_time),
+               SUM(CASE WHEN tokens > 0 THEN tokens ELSE 0 END),
+               SUM(CASE WHEN tokens < 0 THEN -tokens ELSE 0 END),
+               SUM(tokens), COUNT(*)
+        FROM points_history
+        GROUP BY uid, DATE(create_time)
+        ORDER BY 1, 2
+    ''')
+    return [tuple(row) for row in rows]
+
+
+def daily_rollup(manager):
+    rows = manager.db.execute(
+        'SELECT uid, day, earned, spent, net, transactions FROM points_daily ORDER BY 1, 2'
+    )
+    return [tuple(row) for row in rows]
+
+
+def assert_rollups_consistent(manager):
+    assert rollup_statistics(manager) == manager.get_statistics()
+    assert daily_rollup(manager) == daily_from_history(manager)
+
+
+def test_duplicates_counted_once(manager):
+    """同一批中的重复记录和已存储的记录都不计入新增数"""
+    assert manager.batch_add_records([make_record(1), make_record(2)], EMAIL) == 2
+
+    records = [make_record(2), make_record(3), make_record(3), make_record(4, tokens=-5), make_record(1)]
+    assert manager.batch_add_records(records, EMAIL) == 2
+    assert manager.get_statistics(email=EMAIL)['total_count'] == 4
+    assert_rollups_consistent(manager)
+
+
+def test_generator_across_chunks(manager, monkeypatch):
+    """生成器输入跨越多个批次时逐批导入，跨批次的重复记录只插入一次"""
+    monkeypatch.setattr(PointsHistoryManager, 'IMPORT_CHUNK_SIZE', 3)
+    consumed = []
+
+    def records():
+        for record_id in [1, 2, 3, 3, 4, 5, 1, 6, 7]:
+            consumed.append(record_id)
+            yield make_record(record_id, tokens=record_id, create_time=f'2024-01-0{record_id} 08:00:00')
+
+    assert manager.batch_add_records(records(), EMAIL) == 7
+    assert len(consumed) == 9
+    assert manager.get_latest_record_id(email=EMAIL) == 7
+    assert manager.get_uid_by_email(EMAIL) == UID
+    assert_rollups_consistent(manager)
+
+
+def test_ip_extracted_from_remark(manager):
+    """remark为JSON时提取IP，不是JSON或没有IP字段时为空"""
+    manager.batch_add_records([
+        make_record(1, remark='{"ip": "1.2.3.4", "model": "gpt"}'),
+        make_record(2, remark='签到奖励'),
+        make_record(3, remark='{"model": "gpt"}'),
+        make_record(4, remark='')
+    ], EMAIL)
+
+    ips = {record['id']: record['ip'] for record in manager.get_records_by_email(EMAIL)}
+    assert ips == {1: '1.2.3.4', 2: None, 3: None, 4: None}
+
+
+def test_rollups_match_statistics_after_ingest(manager):
+    """增量累加的汇总表与直接从历史记录计算的统计一致"""
+    manager.batch_add_records([
+        make_record(1, tokens=100, source='checkin', create_time='2024-01-01 08:00:00'),
+        make_record(2, tokens=-30, source='usage', create_time='2024-01-01 09:00:00'),
+        make_record(3, tokens=50, source='redeem', create_time='2024-01-02 10:00:00')
+    ], EMAIL)
+    manager.batch_add_records([
+        make_record(3, tokens=50, source='redeem', create_time='2024-01-02 10:00:00'),
+        make_record(4, tokens=-20, source='usage', create_time='2023-12-31 23:00:00'),
+        make_record(5, tokens=10, source='checkin', create_time='2024-01-02 08:00:00')
+    ], EMAIL)
+    manager.batch_add_records([
+        make_record(11, tokens=40, uid=2002, create_time='2024-01-01 12:00:00')
+    ], 'b@test.com')
+
+    stats = rollup_statistics(manager)
+    assert stats['total_count'] == 6
+    assert stats['total_earned'] == 200
+    assert stats['total_spent'] == 50
+    assert stats['first_record'] == '2023-12-31 23:00:00'
+    assert stats['total_accounts'] == 2
+    assert_rollups_consistent(manager)
+
+
+def test_rollups_match_statistics_after_cleanup(manager):
+    """清理旧记录后汇总表重建，仍与历史记录一致"""
+    now = datetime.now()
+    old = (now - timedelta(days=400)).strftime('%Y-%m-%d %H:%M:%S')
+    recent = (now - timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S')
+    manager.batch_add_records([
+        make_record(1, tokens=100, create_time=old),
+        make_record(2, tokens=-10, source='usage', create_time=old),
+        make_record(3, tokens=20, create_time=recent)
+    ], EMAIL)
+
+    assert manager.cleanup_old_records(days_to_keep=365) == 2
+    stats = rollup_statistics(manager)
+    assert stats['total_count'] == 1
+    assert stats['net_points'] == 20
+    assert 'usage' not in stats['by_source']
+    assert_rollups_consistent(manager)
+
+
+def test_rebuild_rollups_matches_incremental(manager):
+    """全量重建的汇总表与增量累加的结果相同"""
+    manager.batch_add_records([
+        make_record(1, tokens=100, create_time='2024-01-01 08:00:00'),
+        make_record(2, tokens=-30, source='usage', create_time='2024-01-02 09:00:00')
+    ], EMAIL)
+    incremental = (rollup_statistics(manager), daily_rollup(manager))
+
+    assert manager.rebuild_rollups() == 1
+    assert (rollup_statistics(manager), daily_rollup(manager)) == incremental
@@ -0,0 +1,113 @@
+"""
+选择器批量探测测试
+"""
+import json
+
+import pytest
+
+from src.infrastructure.browser.selector_probe import PROBE_JS, SelectorProbe, to_probe_spec
+
+
+@pytest.mark.parametrize('locator, expected', [
+    ('xpath://button[@type="submit"]', ['xpath', '//button[@type="submit"]']),
+    ('xpath=//button', ['xpath', '//button']),
+    ('x://input', ['xpath', '//input']),
+    ('x=//input', ['xpath', '//input']),
+    ('css:button.primary', ['css', 'button.primary']),
+    ('css=input[type="email"]', ['css', 'input[type="email"]']),
+    ('c:#email', ['css', '#email']),
+    ('c=.btn', ['css', '.btn']),
+    ('tag:BUTTON', ['css', 'button']),
+    ('text=签到', ['xpath', '//*[text()="签到"]']),
+    ('text:已签到', ['xpath', '//*[contains(text(), "已签到")]']),
+    ('#email', ['css', '[id="email"]']),
+    ('.ant-btn', ['css', '[class="ant-btn"]']),
+    ('@type=submit', ['css', '[type="submit"]']),
+    ('@class:ant-btn', ['css', '[class*="ant-btn"]']),
+    ('@href^https://', ['css', '[href^="https://"]']),
+    ('@placeholder$邮箱', ['css', '[placeholder$="邮箱"]']),
+    ('@data-id=a"b', ['css', '[data-id="a\\"b"]']),
+])
+def test_supported_locators(locator, expected):
+    """支持的定位符转换为与DrissionPage匹配规则一致的XPath或CSS"""
+    assert to_probe_spec(locator) == expected
+
+
+@pytest.mark.parametrize('locator', [
+    '@@type=submit@@class=btn',
+    '@|type=submit@@type=button',
+    '@!disabled',
+    '@disabled',
+    'tag:button@type=submit',
+    'submit',
+    '#',
+    '.',
+])
+def test_unsupported_locators(locator):
+    """组合条件等无法转换的定位符返回None"""
+    assert to_probe_spec(locator) is None
+
+
+class FakeElement:
+    def __init__(self, name, disabled=False):
+        self.name = name
+        self.disabled = disabled
+
+    def attr(self, name):
+        if name == 'disabled' and self.disabled:
+            return ''
+        return None
+
+
+class FakeDriver:
+    """按定位符返回元素的driver，记录页面脚本和ele调用"""
+
+    def __init__(self, elements, js_result=None):
+        self.elements = elements
+        self.js_result = js_result
+        self.js_calls = []
+        self.ele_calls = []
+
+    def run_js(self, script, *args):
+        self.js_calls.append((script, args))
+        return self.js_result
+
+    def ele(self, locator, timeout=None):
+        self.ele_calls.append(locator)
+        return self.elements.get(locator)
+
+
+def test_supported_group_uses_single_script():
+    """全部定位符都能转换时只执行一次探测脚本"""
+    driver = FakeDriver({}, js_result=[1, 'element'])
+
+    assert SelectorProbe(driver).first(['#email', '@type=email']) == ('@type=email', 'element')
+    assert len(driver.js_calls) == 1
+    script, args = driver.js_calls[0]
+    assert script == PROBE_JS
+    assert json.loads(args[0]) == [['css', '[id="email"]'], ['css', '[type="email"]']]
+    assert driver.ele_calls == []
+
+
+def test_unsupported_locator_falls_back_to_sequential_first():
+    """包含无法转换的定位符时不执行探测脚本，逐个调用driver.ele"""
+    button = FakeElement('button')
+    driver = FakeDriver({'@@tag()=button@@type=submit': button})
+
+    locator, element = SelectorProbe(driver).first(['#missing', '@@tag()=button@@type=submit', '.other'])
+    assert (locator, element) == ('@@tag()=button@@type=submit', button)
+    assert driver.js_calls == []
+    assert driver.ele_calls == ['#missing', '@@tag()=button@@type=submit']
+
+
+def test_unsupported_locator_falls_back_to_sequential_probe():
+    """逐个检查时返回全部命中的定位符，并按enabled跳过disabled元素"""
+    enabled = FakeElement('enabled')
+    disabled = FakeElement('disabled', disabled=True)
+    driver = FakeDriver({'@!disabled': enabled, '#submit': disabled})
+
+    probe = SelectorProbe(driver)
+    assert probe.probe(['#submit', '@!disabled', '.none']) == [('#submit', disabled), ('@!disabled', enabled)]
+    assert probe.probe(['#submit', '@!disabled'], enabled=True) == [('@!disabled', enabled)]
+    assert probe.first(['#submit', '@!disabled'], enabled=True) == ('@!disabled', enabled)
+    assert driver.js_calls == []